@@ -0,0 +1,116 @@
+"""Build time of a bundle's fare index and latency of /fare_trends queries.
+
+Rebuilds the fare index of ``--bundle`` (default: the current bundle),
+then times ``--queries`` random trend queries: a random source/destination
+pair and date range, and half of them with an airline, stops or departure
+hour filter. Queries are answered by ``FareIndex.trends`` directly and
+through the inference service's ``GET /fare_trends`` (Flask test client).
+The report gives p50/p99 latency in milliseconds for both. Run from the
+project root:
+
+    python benchmarks/fare_trends_benchmark.py --queries 2000 --output fare_trends.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "dev"))
+
+from fare_index import build_index, FareIndex, index_dir, HOURS, CALENDAR_YEAR
+from model_bundle import current_bundle_path
+
+SEED = 0
+
+def random_queries(index, n, seed=SEED):
+    rng = np.random.default_rng(seed)
+    months = index.manifest["months"]
+    itineraries = index.manifest["itineraries"]
+    queries = []
+    for _ in range(n):
+        it = itineraries[rng.integers(len(itineraries))]
+        first, last = sorted(rng.integers(0, len(months) * 30, 2).tolist())
+        query = {
+            "source": it["source"],
+            "destination": it["destination"],
+            "start": (months[first // 30], first % 30 + 1),
+            "end": (months[last // 30], last % 30 + 1),
+        }
+        kind = rng.integers(6)
+        if kind == 0:
+            query["airline"] = it["airline"]
+        elif kind == 1:
+            query["stops"] = it["total_stops"]
+        elif kind == 2:
+            low = int(rng.integers(HOURS))
+            query["hours"] = (low, int(rng.integers(low, HOURS)))
+        queries.append(query)
+    return queries
+
+def url(query):
+    params = {"source": query["source"], "destination": query["destination"],
+              "date_from": "%d-%02d-%02d" % ((CALENDAR_YEAR,) + query["start"]),
+              "date_to": "%d-%02d-%02d" % ((CALENDAR_YEAR,) + query["end"])}
+    if "airline" in query:
+        params["airline"] = query["airline"]
+    if "stops" in query:
+        params["stops"] = query["stops"]
+    if "hours" in query:
+        params["dep_hour_from"], params["dep_hour_to"] = query["hours"]
+    return "/fare_trends?" + "&".join(f"{k}={v}" for k, v in params.items())
+
+def latency_ms(times):
+    return {"p50_ms": round(float(np.percentile(times, 50)) * 1000, 4),
+            "p99_ms": round(float(np.percentile(times, 99)) * 1000, 4)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bundle", help="bundle file (default: the current one)")
+    parser.add_argument("--queries", type=int, default=2000, help="random queries timed")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    bundle_path = args.bundle or current_bundle_path()
+    if not bundle_path:
+        raise SystemExit("❌ No bundle to index. Train the model first!")
+    manifest = build_index(bundle_path)
+    index = FareIndex(index_dir(bundle_path))
+    queries = random_queries(index, args.queries)
+
+    direct, days = [], 0
+    for query in queries:
+        start = time.perf_counter()
+        days += len(index.trends(**query))
+        direct.append(time.perf_counter() - start)
+
+    import inference_service
+    client = inference_service.app.test_client()
+    http = []
+    for query in queries:
+        start = time.perf_counter()
+        response = client.get(url(query)).get_json()
+        http.append(time.perf_counter() - start)
+        if response["status"] != "Success":
+            raise SystemExit(f"❌ {url(query)}: {response['message']}")
+
+    report = {
+        "model_version": manifest["model_version"],
+        "build_seconds": manifest["seconds"],
+        "predictions": manifest["predictions"],
+        "index_mb": round(sum(os.path.getsize(os.path.join(index_dir(bundle_path), name))
+                              for name in os.listdir(index_dir(bundle_path))) / 2 ** 20, 2),
+        "queries": len(queries),
+        "mean_days_per_query": round(days / len(queries), 1),
+        "trends": latency_ms(direct),
+        "http": latency_ms(http),
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
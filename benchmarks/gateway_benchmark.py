@@ -0,0 +1,164 @@
+"""End-to-end pipeline time: separate services vs the in-process gateway.
+
+Runs preprocess -> feature engineering -> train -> batch predict on a
+temporary copy of data/collected_airfare_data.csv (optionally scaled up)
+in two modes, each behind dev/serve.py:
+
+    services   preprocessing, feature_engineering, training_services and
+               inference_service as four processes; stages pass file names
+               over HTTP and hand data over through the intermediate CSVs
+    gateway    one ml_service process; POST /pipeline/run hands DataFrames
+               and arrays from stage to stage in memory, then
+               POST /inference/predict
+
+Training uses {"search": "fixed"} so the comparison is not dominated by the
+hyperparameter search. Both modes should report the same holdout MAE.
+
+    python benchmarks/gateway_benchmark.py --scale 10 --repeat 3 --output gateway.json
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SOURCE_FILE = os.path.join(ROOT, "data", "collected_airfare_data.csv")
+RAW_FILE = "collected_airfare_data.csv"
+TRAIN_OPTIONS = {"search": "fixed", "params": {"n_estimators": 50}}
+BATCH_ROWS = 1000
+SEED = 0
+
+SERVICES = {  # module -> port offset (the usual 5002..5005)
+    "preprocessing": 2,
+    "feature_engineering": 3,
+    "training_services": 4,
+    "inference_service": 5,
+}
+
+def post(port, path, payload, timeout=3600):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    conn.request("POST", path, json.dumps(payload), {"Content-Type": "application/json"})
+    body = json.loads(conn.getresponse().read())
+    if body.get("status") != "Success":
+        raise RuntimeError(f"POST {path} on port {port} failed: {body.get('message')}")
+    return body
+
+def wait_ready(port, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/metrics")
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def start(service, port, workspace):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "dev", "serve.py"), service,
+         "--host", "127.0.0.1", "--port", str(port), "--workers", "1"],
+        cwd=workspace, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process
+
+def stop(processes):
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.wait()
+
+def timed(timings, stage, fn):
+    start = time.perf_counter()
+    result = fn()
+    timings[stage] = round(time.perf_counter() - start, 4)
+    return result
+
+def run_services(workspace, base_port, batch):
+    ports = {service: base_port + offset for service, offset in SERVICES.items()}
+    processes = [start(service, port, workspace) for service, port in ports.items()]
+    try:
+        for port in ports.values():
+            wait_ready(port)
+        timings = {}
+        start_time = time.perf_counter()
+        timed(timings, "preprocess", lambda: post(ports["preprocessing"], "/preprocess", {"file_name": RAW_FILE}))
+        timed(timings, "feature_engineering", lambda: post(ports["feature_engineering"], "/feature_engineering",
+                                                           {"file_name": "preprocessed_airfare_data.csv"}))
+        trained = timed(timings, "train", lambda: post(ports["training_services"], "/train",
+                                                       dict(TRAIN_OPTIONS, sync=True)))
+        timed(timings, "predict_batch", lambda: post(ports["inference_service"], "/predict", batch))
+        timings["total"] = round(time.perf_counter() - start_time, 4)
+        return timings, trained["MAE"]
+    finally:
+        stop(processes)
+
+def run_gateway(workspace, base_port, batch):
+    process = start("ml_service", base_port, workspace)
+    try:
+        wait_ready(base_port)
+        timings = {}
+        start_time = time.perf_counter()
+        result = timed(timings, "pipeline", lambda: post(base_port, "/pipeline/run",
+                                                        {"file_name": RAW_FILE, "train": TRAIN_OPTIONS}))
+        timed(timings, "predict_batch", lambda: post(base_port, "/inference/predict", batch))
+        timings["total"] = round(time.perf_counter() - start_time, 4)
+        timings.update({f"pipeline.{stage}": seconds for stage, seconds in result["timings"].items()})
+        return timings, result["MAE"]
+    finally:
+        stop([process])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="rows sampled with replacement, as a multiple of the dataset")
+    parser.add_argument("--repeat", type=int, default=3, help="end-to-end runs per mode (median is reported)")
+    parser.add_argument("--port", type=int, default=5100, help="gateway port; services use port+2..port+5")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    base = pd.read_csv(SOURCE_FILE)
+    df = base if args.scale == 1 else base.sample(len(base) * args.scale, replace=True, random_state=SEED)
+
+    workspace = tempfile.mkdtemp(prefix="airfare-gateway-")
+    try:
+        os.makedirs(os.path.join(workspace, "data"))
+        os.makedirs(os.path.join(workspace, "models", "encoder"))
+        df.to_csv(os.path.join(workspace, "data", RAW_FILE), index=False)
+
+        # Prediction payload: model inputs of the first rows, as the inference service expects them
+        sys.path.insert(0, os.path.join(ROOT, "dev"))
+        from preprocessing import transform_chunk
+        batch = transform_chunk(base.head(BATCH_ROWS)).drop(columns=["Price"]).to_dict(orient="records")
+
+        report = {"scale": args.scale, "rows": len(df), "train_options": TRAIN_OPTIONS, "modes": {}}
+        for mode, run in [("services", run_services), ("gateway", run_gateway)]:
+            runs, mae = [], None
+            for _ in range(args.repeat):
+                timings, mae = run(workspace, args.port, batch)
+                runs.append(timings)
+                print(json.dumps({"mode": mode, **timings}))
+            report["modes"][mode] = {
+                "median": {stage: round(float(np.median([r[stage] for r in runs])), 4) for stage in runs[0]},
+                "MAE": mae,
+            }
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    services, gateway = report["modes"]["services"], report["modes"]["gateway"]
+    report["speedup"] = round(services["median"]["total"] / gateway["median"]["total"], 3)
+    report["same_MAE"] = services["MAE"] == gateway["MAE"]
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Sustained ingest throughput of dev/ingest_service.py against a local stand-in producer.
+
+Starts the ingest service in a temporary workspace (its own empty fare
+store), then streams ``--records`` fare records sampled from
+data/collected_airfare_data.csv to ``POST /ingest``. The records are sent as
+chunked NDJSON or CSV over ``--producers`` concurrent connections, as fast as
+the server accepts them, or at ``--rate`` records/sec in total. A share
+``--invalid`` of the records is corrupted so validation has something to
+reject. The report gives end-to-end records/sec and checks that the fare store
+holds exactly the accepted records.
+
+    python benchmarks/ingest_benchmark.py --records 200000 --producers 2 --format ndjson
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+SOURCE_FILE = os.path.join(ROOT, "data", "collected_airfare_data.csv")
+SEND_RECORDS = 1000   # records per HTTP chunk
+SEED = 0
+
+def make_records(n, invalid, seed=SEED):
+    base = pd.read_csv(SOURCE_FILE)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), n)].reset_index(drop=True)
+    bad = rng.random(n) < invalid
+    df["Duration"] = df["Duration"].astype(str).where(~bad, "unknown")
+    return df, int(bad.sum())
+
+# Pre-encoded HTTP chunks of the body, so the producer itself is not the bottleneck
+def encode_chunks(df, fmt):
+    chunks = []
+    for start in range(0, len(df), SEND_RECORDS):
+        part = df.iloc[start:start + SEND_RECORDS]
+        if fmt == "csv":
+            text = part.to_csv(index=False, header=(start == 0))
+        else:
+            text = part.to_json(orient="records", lines=True, force_ascii=False)
+            text = text if text.endswith("\n") else text + "\n"
+        chunks.append(text.encode("utf-8"))
+    return chunks
+
+def produce(port, chunks, fmt, rate, records_per_chunk, result):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=3600)
+    content_type = "text/csv" if fmt == "csv" else "application/x-ndjson"
+    conn.putrequest("POST", "/ingest")
+    conn.putheader("Content-Type", content_type)
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.endheaders()
+    start = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        if rate:
+            delay = start + i * records_per_chunk / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        conn.send(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+    conn.send(b"0\r\n\r\n")
+    result.update(json.loads(conn.getresponse().read()), client_seconds=time.perf_counter() - start)
+
+def wait_ready(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/ingest/stats")
+            return json.loads(conn.getresponse().read())
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Ingest service on port {port} did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200_000, help="records sent in total")
+    parser.add_argument("--producers", type=int, default=1, help="concurrent producer connections")
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument("--rate", type=float, default=0, help="total records/sec to send (0: as fast as possible)")
+    parser.add_argument("--invalid", type=float, default=0.01, help="share of records corrupted on purpose")
+    parser.add_argument("--port", type=int, default=5108)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    df, corrupted = make_records(args.records, args.invalid)
+    parts = np.array_split(np.arange(len(df)), args.producers)
+    payloads = [encode_chunks(df.iloc[part], args.format) for part in parts]
+
+    workspace = tempfile.mkdtemp(prefix="airfare-ingest-")
+    os.makedirs(os.path.join(workspace, "data"))
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "dev", "ingest_service.py"),
+                                "--host", "127.0.0.1", "--port", str(args.port)],
+                               cwd=workspace, stdout=subprocess.DEVNULL)
+    try:
+        wait_ready(args.port)
+        results = [{} for _ in payloads]
+        threads = [threading.Thread(target=produce, args=(args.port, chunks, args.format,
+                                                          args.rate / args.producers if args.rate else 0,
+                                                          SEND_RECORDS, result))
+                   for chunks, result in zip(payloads, results)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        stats = wait_ready(args.port)
+        with sqlite3.connect(os.path.join(workspace, "data", "airfare_data.db")) as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM Airfare_Prices").fetchone()[0]
+            preprocessed = conn.execute("SELECT COUNT(*) FROM Preprocessed_Airfare").fetchone()[0]
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    failed = [r.get("message") for r in results if r.get("status") != "Success"]
+    accepted = sum(r.get("accepted", 0) for r in results)
+    rejected = sum(r.get("rejected", 0) for r in results)
+    report = {
+        "format": args.format,
+        "records": args.records,
+        "producers": args.producers,
+        "target_rate": args.rate or None,
+        "seconds": round(seconds, 3),
+        "records_per_sec": round(args.records / seconds, 1),
+        "accepted": accepted,
+        "rejected": rejected,
+        "corrupted": corrupted,
+        "stored": stored,
+        "stored_preprocessed": preprocessed,
+        # Every record answered for and every accepted one stored once, raw and preprocessed
+        "consistent": not failed and stored == preprocessed == accepted and accepted + rejected == args.records,
+        "queue_full_waits": stats["queue_full_waits"],
+        "errors": failed,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Load test for the prefork inference server (dev/serve.py).
+
+Starts the inference service once per worker count, drives it with
+concurrent client processes for a fixed duration and reports throughput
+and latency percentiles, plus scaling efficiency relative to one worker.
+
+    python benchmarks/load_test.py --workers 1 2 4 8 --clients 32 --duration 20
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import time
+from multiprocessing import Pool
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+PAYLOAD = json.dumps({
+    "Airline": "IndiGo", "Source": "Delhi", "Destination": "Banglore", "Route": "DEL → BLR",
+    "Total_Stops": 0, "Additional_Info": "No info", "Duration": 120, "Journey_day": 10,
+    "Journey_month": 5, "Dep_Time_hour": 14, "Dep_Time_minute": 30,
+    "Arrival_Time_hour": 16, "Arrival_Time_minute": 30
+})
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("POST", "/predict", PAYLOAD, {"Content-Type": "application/json"})
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not start")
+
+def client(args):
+    port, duration = args
+    latencies, errors = [], 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            conn.request("POST", "/predict", PAYLOAD, {"Content-Type": "application/json"})
+            body = conn.getresponse().read()
+            if b'"Success"' not in body:
+                errors += 1
+        except OSError:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+def run(workers, threads, clients, duration, port):
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "dev", "serve.py"), "inference_service",
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--threads", str(threads)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        with Pool(clients) as pool:
+            results = pool.map(client, [(port, duration)] * clients)
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies = np.concatenate([r[0] for r in results]) * 1000
+    return {
+        "workers": workers,
+        "threads": threads,
+        "clients": clients,
+        "requests": int(len(latencies)),
+        "errors": int(sum(r[1] for r in results)),
+        "throughput_rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--port", type=int, default=5105)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    report = {"cpu_count": os.cpu_count(), "runs": []}
+    for workers in sorted(set(args.workers)):
+        result = run(workers, args.threads, args.clients, args.duration, args.port)
+        report["runs"].append(result)
+        print(json.dumps(result))
+
+    base = report["runs"][0]
+    for result in report["runs"]:
+        speedup = result["throughput_rps"] / base["throughput_rps"] if base["throughput_rps"] else 0
+        result["speedup"] = round(speedup, 2)
+        result["scaling_efficiency"] = round(speedup * base["workers"] / result["workers"], 2)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Memory footprint and operation speed of fare data: default vs compact (fare_schema) dtypes.
+
+For the raw, preprocessed and processed datasets, sampled with replacement
+to ``--scale`` times their size, compares the deep memory usage of a
+default ``pd.read_csv`` frame with the same frame after
+``fare_schema.apply_schema`` (what every loader returns). It also times,
+on the preprocessed data:
+
+    groupby     mean price per (Source, Destination, Airline)
+    encode      FeaturePipeline.transform_array (category codes + scaling)
+    preprocess  transform_chunk on the raw data
+
+Each timing is the median of ``--repeat`` runs. Results on the two kinds of
+frames are checked to be equal.
+
+    python benchmarks/memory_benchmark.py --scale 10 --repeat 5 --output memory.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "dev"))
+
+from fare_schema import apply_schema, memory_bytes
+from feature_pipeline import FeaturePipeline, NUMERICAL_COLS
+from category_encoding import CATEGORICAL_COLS
+from preprocessing import transform_chunk
+
+DATASETS = {
+    "raw": os.path.join(ROOT, "data", "collected_airfare_data.csv"),
+    "preprocessed": os.path.join(ROOT, "data", "preprocessed_airfare_data.csv"),
+    "processed": os.path.join(ROOT, "data", "processed_airfare_data.csv"),
+}
+GROUP_KEYS = ["Source", "Destination", "Airline"]
+SEED = 0
+
+def median_seconds(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=10, help="rows sampled with replacement, as a multiple of each dataset")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timed operation (median is reported)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    frames, report = {}, {"scale": args.scale, "memory": {}, "operations": {}}
+    for name, path in DATASETS.items():
+        base = pd.read_csv(path)
+        default = base.sample(len(base) * args.scale, replace=True, random_state=SEED).reset_index(drop=True)
+        compact = apply_schema(default)
+        frames[name] = (default, compact)
+        default_bytes, compact_bytes = memory_bytes(default), memory_bytes(compact)
+        report["memory"][name] = {
+            "rows": len(default),
+            "default_mb": round(default_bytes / 2 ** 20, 2),
+            "compact_mb": round(compact_bytes / 2 ** 20, 2),
+            "ratio": round(default_bytes / compact_bytes, 2),
+            "dtypes": {col: str(dtype) for col, dtype in compact.dtypes.items()},
+        }
+        print(json.dumps({"dataset": name, **{k: v for k, v in report["memory"][name].items() if k != "dtypes"}}))
+
+    pre_default, pre_compact = frames["preprocessed"]
+    raw_default, raw_compact = frames["raw"]
+    pipeline = FeaturePipeline.fit(pre_default, CATEGORICAL_COLS, NUMERICAL_COLS)
+    features = pipeline.feature_order
+    operations = {
+        "groupby": lambda df: df.groupby(GROUP_KEYS, observed=True, sort=True)["Price"].mean(),
+        "encode": lambda df: pipeline.transform_array(df[features]),
+        "preprocess": lambda df: transform_chunk(df.copy()),
+    }
+    inputs = {"groupby": frames["preprocessed"], "encode": frames["preprocessed"], "preprocess": frames["raw"]}
+    for name, fn in operations.items():
+        default, compact = inputs[name]
+        default_seconds, expected = median_seconds(lambda: fn(default), args.repeat)
+        compact_seconds, result = median_seconds(lambda: fn(compact), args.repeat)
+        if isinstance(expected, np.ndarray):
+            same = np.array_equal(expected, result)
+        elif name == "groupby":
+            same = np.allclose(expected.to_numpy(), result.to_numpy(), rtol=1e-6) and \
+                [tuple(map(str, key)) for key in expected.index] == [tuple(map(str, key)) for key in result.index]
+        else:
+            same = expected.astype(str).equals(result.astype(str))
+        report["operations"][name] = {
+            "default_seconds": round(default_seconds, 5),
+            "compact_seconds": round(compact_seconds, 5),
+            "speedup": round(default_seconds / compact_seconds, 2),
+            "same_result": bool(same),
+        }
+        print(json.dumps({"operation": name, **report["operations"][name]}))
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+"""Offline benchmark of every pipeline stage on synthetically scaled data.
+
+Builds 1x/10x/100x copies of data/collected_airfare_data.csv (rows sampled
+with replacement, fixed seed) in a temporary workspace, then times each
+stage there, so nothing under data/ or models/ is touched:
+
+    load_csv / load_xlsx     dev_run_v0.load_data, cold (cache miss) and warm
+    preprocess               preprocessing.preprocess_data (and streaming mode)
+    feature_engineering      feature_engineering.fit_feature_pipeline
+    encode                   FeaturePipeline.transform (the training-side encoding)
+    train                    one RandomForestRegressor fit with fixed parameters
+    inference_single         inference_service.preprocess_input + predict (sklearn and compiled)
+    inference_batch          inference_service.preprocess_batch + predict, 1000 rows
+    log_prediction           monitoring_service /log_prediction at growing log sizes
+
+Run, then compare two runs and flag stages that got slower:
+
+    python benchmarks/pipeline_benchmark.py --scales 1 10 100 --output bench.json
+    python benchmarks/pipeline_benchmark.py --compare base.json bench.json --threshold 0.15
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "dev"))
+
+SOURCE_FILE = os.path.join(ROOT, "data", "collected_airfare_data.csv")
+SEED = 0
+TRAIN_PARAMS = {"n_estimators": 50, "max_depth": 20, "min_samples_split": 5, "random_state": 42, "n_jobs": -1}
+BATCH_ROWS = 1000
+SINGLE_CALLS = 200
+LOG_CALLS = 1000
+
+def scaled_frame(base, scale):
+    if scale == 1:
+        return base
+    return base.sample(len(base) * scale, replace=True, random_state=SEED).reset_index(drop=True)
+
+def quiet(fn, *args, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(*args, **kwargs)
+
+class Bench:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    # Time fn() `repeat` times (setup() runs untimed before each call)
+    def run(self, stage, scale, rows, fn, setup=None, repeat=None):
+        times = []
+        for _ in range(repeat or self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        median = float(np.median(times))
+        return self.record(stage, scale, rows, {
+            "repeat": len(times),
+            "median_s": round(median, 6),
+            "min_s": round(min(times), 6),
+            "max_s": round(max(times), 6),
+            "rows_per_sec": round(rows / median, 1) if median > 0 else None,
+        })
+
+    # Per-call latency of fn(i) over `calls` calls
+    def latency(self, stage, scale, rows, fn, calls):
+        fn(0)  # warm up
+        times = []
+        for i in range(calls):
+            start = time.perf_counter()
+            fn(i)
+            times.append(time.perf_counter() - start)
+        return self.record(stage, scale, rows, {
+            "calls": calls,
+            "median_s": round(float(np.median(times)), 9),
+            "p50_ms": round(float(np.percentile(times, 50)) * 1000, 4),
+            "p99_ms": round(float(np.percentile(times, 99)) * 1000, 4),
+        })
+
+    def record(self, stage, scale, rows, stats):
+        result = dict({"stage": stage, "scale": scale, "rows": rows}, **stats)
+        print(json.dumps(result))
+        self.results.append(result)
+        return result
+
+def bench_scale(bench, base, scale, args):
+    from dev_run_v0 import load_data
+    from preprocessing import preprocess_data, preprocess_file_streaming
+    from feature_engineering import fit_feature_pipeline
+    from feature_pipeline import TARGET_COL, CATEGORICAL_COLS, NUMERICAL_COLS
+
+    df = scaled_frame(base, scale)
+    rows = len(df)
+    csv_name = f"collected_{scale}x.csv"
+    df.to_csv(os.path.join("data", csv_name), index=False)
+    clear_cache = lambda: shutil.rmtree(os.path.join("data", ".cache"), ignore_errors=True)
+
+    # Loading
+    bench.run("load_csv_cold", scale, rows, lambda: quiet(load_data, csv_name), setup=clear_cache)
+    bench.run("load_csv_warm", scale, rows, lambda: quiet(load_data, csv_name))
+    if scale <= args.xlsx_max_scale:
+        xlsx_name = f"collected_{scale}x.xlsx"
+        df.to_excel(os.path.join("data", xlsx_name), index=False)
+        bench.run("load_xlsx_cold", scale, rows, lambda: quiet(load_data, xlsx_name), setup=clear_cache)
+        bench.run("load_xlsx_warm", scale, rows, lambda: quiet(load_data, xlsx_name))
+
+    # Preprocessing
+    raw = quiet(load_data, csv_name)
+    bench.run("preprocess", scale, rows, lambda: preprocess_data(raw.copy()))
+    bench.run("preprocess_streaming", scale, rows, lambda: preprocess_file_streaming(csv_name))
+    preprocessed, _ = preprocess_data(raw.copy())
+
+    # Feature engineering (fit + transform + save) and training-side encoding
+    categorical_cols = [c for c in CATEGORICAL_COLS if c in preprocessed]
+    bench.run("feature_engineering", scale, rows,
+              lambda: fit_feature_pipeline(preprocessed.copy(), categorical_cols, NUMERICAL_COLS))
+    processed, pipeline = fit_feature_pipeline(preprocessed.copy(), categorical_cols, NUMERICAL_COLS)
+    bench.run("encode", scale, rows, lambda: pipeline.transform(preprocessed))
+
+    if scale > args.train_max_scale:
+        return
+    from sklearn.ensemble import RandomForestRegressor
+    from model_bundle import save_bundle, get_bundle
+    X = processed.drop(columns=[TARGET_COL]).to_numpy(dtype=np.float64)
+    y = processed[TARGET_COL].to_numpy()
+    model = RandomForestRegressor(**TRAIN_PARAMS)
+    bench.run("train", scale, rows, lambda: model.fit(X, y), repeat=1)
+    model.set_params(n_jobs=None)
+    save_bundle(model, pipeline, {"benchmark_scale": scale})
+
+    # Inference on the model just trained
+    import inference_service
+    from compiled_forest import CompiledForest
+    bundle = get_bundle()
+    records = preprocessed.drop(columns=[TARGET_COL]).head(BATCH_ROWS).to_dict(orient="records")
+    compiled = CompiledForest(bundle.model)
+
+    def single(predictor):
+        def call(i):
+            x, error = inference_service.preprocess_input(records[i % len(records)], bundle)
+            predictor.predict(x)
+        return call
+
+    bench.latency("inference_single_sklearn", scale, 1, single(bundle.model), min(SINGLE_CALLS, 50))
+    bench.latency("inference_single_compiled", scale, 1, single(compiled), SINGLE_CALLS)
+
+    def batch():
+        X_batch, valid, errors = inference_service.preprocess_batch(pd.DataFrame.from_records(records), bundle)
+        bundle.predictor.predict(X_batch)
+    bench.run("inference_batch", scale, len(records), batch)
+
+def bench_logging(bench, base, scales):
+    from prediction_log import PredictionLog, LOG_COLUMNS
+    import monitoring_service
+
+    record = {col: None for col in LOG_COLUMNS}
+    record.update(base.iloc[0].to_dict())
+    record.update(Predicted_Price=1000.0, Actual_Price=1000, User_Feedback="")
+    client = monitoring_service.app.test_client()
+
+    for scale in scales:
+        # Prefill a log of scale x the dataset's row count, then log through the endpoint
+        path = os.path.join("data", f"inference_logs_{scale}x.csv")
+        rows = len(base) * scale
+        pd.DataFrame([record] * rows, columns=LOG_COLUMNS).to_csv(path, index=False)
+        monitoring_service.prediction_log = PredictionLog(path)
+        bench.latency("log_prediction", scale, rows,
+                      lambda i: client.post("/log_prediction", json=record), LOG_CALLS)
+        monitoring_service.prediction_log.flush()  # before the workspace is removed
+
+def metadata(scales):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    import sklearn
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "commit": commit or None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "scales": scales,
+        "seed": SEED,
+    }
+
+def run_suite(args):
+    base = pd.read_csv(SOURCE_FILE)
+    bench = Bench(args.repeat)
+    workspace = tempfile.mkdtemp(prefix="airfare-bench-")
+    cwd = os.getcwd()
+    try:
+        os.chdir(workspace)
+        os.makedirs("data")
+        os.makedirs("models/encoder")
+        for scale in args.scales:
+            bench_scale(bench, base, scale, args)
+        bench_logging(bench, base, args.scales)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workspace, ignore_errors=True)
+    return {"meta": metadata(args.scales), "results": bench.results}
+
+# Stages whose median time grew by more than `threshold` (relative) between two reports
+def compare(base_report, new_report, threshold):
+    base = {(r["stage"], r["scale"]): r for r in base_report["results"]}
+    rows = []
+    for result in new_report["results"]:
+        before = base.get((result["stage"], result["scale"]))
+        if before is None or not before["median_s"]:
+            continue
+        change = result["median_s"] / before["median_s"] - 1
+        rows.append({
+            "stage": result["stage"],
+            "scale": result["scale"],
+            "base_s": before["median_s"],
+            "new_s": result["median_s"],
+            "change": round(change, 4),
+            "regression": change > threshold,
+        })
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage (median is reported)")
+    parser.add_argument("--xlsx-max-scale", type=int, default=10, help="largest scale also written and loaded as XLSX")
+    parser.add_argument("--train-max-scale", type=int, default=10, help="largest scale that is trained and served")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two reports instead of running")
+    parser.add_argument("--threshold", type=float, default=0.15, help="relative slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            base_report = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            new_report = json.load(f)
+        rows = compare(base_report, new_report, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['stage']:<28}{row['scale']:>5}x {row['base_s']:>12.6f}s {row['new_s']:>12.6f}s "
+                  f"{row['change']:>+8.1%} {flag}")
+        report = {"threshold": args.threshold, "comparisons": rows,
+                  "regressions": sum(row["regression"] for row in rows)}
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        sys.exit(1 if report["regressions"] else 0)
+
+    report = run_suite(args)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
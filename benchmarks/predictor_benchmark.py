@@ -0,0 +1,105 @@
+"""Latency of the sklearn forest vs the compiled forest predictor.
+
+Loads the current model bundle (or the legacy model), checks that the
+predictors return identical prices, then times ``predict`` for each batch
+size and reports p50/p99 latency and per-row throughput. "traversal" is
+the array traversal alone; "compiled" is the predictor as served, which
+hands batches above MAX_TRAVERSAL_ROWS to sklearn.
+
+    python benchmarks/predictor_benchmark.py --batch-sizes 1 10 100 1000 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(ROOT, "dev"))
+
+from compiled_forest import CompiledForest
+from model_bundle import get_bundle
+
+# Model inputs drawn from the processed dataset the model was trained on
+def sample_inputs(n_rows, seed=0):
+    from dataset_cache import load_cached
+    from feature_pipeline import TARGET_COL
+    df = load_cached(os.path.join("data", "processed_airfare_data.csv"))
+    X = df.drop(columns=[TARGET_COL]).to_numpy(dtype=np.float64)
+    return X[np.random.RandomState(seed).randint(0, len(X), n_rows)]
+
+def time_calls(predict, X, min_calls=20, min_seconds=1.0):
+    predict(X)  # warm up
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < min_calls or time.perf_counter() - start < min_seconds:
+        t = time.perf_counter()
+        predict(X)
+        latencies.append(time.perf_counter() - t)
+    return np.array(latencies)
+
+def summarize(latencies, batch_size):
+    return {
+        "calls": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 4),
+        "rows_per_sec": round(batch_size / float(np.median(latencies)), 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 100, 1000, 10000])
+    parser.add_argument("--min-seconds", type=float, default=1.0, help="minimum timing per batch size and predictor")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    bundle = get_bundle()
+    if bundle is None:
+        sys.exit("Model not found. Train the model first!")
+    model = bundle.model
+    model.set_params(n_jobs=None)  # as served
+
+    start = time.perf_counter()
+    compiled = CompiledForest(model)
+    compile_time = time.perf_counter() - start
+    traversal = CompiledForest(model, max_rows=None)
+
+    X = sample_inputs(max(args.batch_sizes))
+    identical = bool(np.array_equal(model.predict(X), traversal.predict(X)))
+    print(f"Compiled {compiled.n_trees} trees ({len(compiled.value)} nodes) in {compile_time:.3f}s; identical: {identical}")
+
+    results = []
+    for batch_size in args.batch_sizes:
+        batch = X[:batch_size]
+        sklearn_stats = summarize(time_calls(model.predict, batch, min_seconds=args.min_seconds), batch_size)
+        traversal_stats = summarize(time_calls(traversal.predict, batch, min_seconds=args.min_seconds), batch_size)
+        compiled_stats = summarize(time_calls(compiled.predict, batch, min_seconds=args.min_seconds), batch_size)
+        result = {
+            "batch_size": batch_size,
+            "sklearn": sklearn_stats,
+            "traversal": traversal_stats,
+            "compiled": compiled_stats,
+            "p50_speedup": round(sklearn_stats["p50_ms"] / compiled_stats["p50_ms"], 2),
+        }
+        print(json.dumps(result))
+        results.append(result)
+
+    report = {
+        "model_version": bundle.version,
+        "n_trees": compiled.n_trees,
+        "n_nodes": int(len(compiled.value)),
+        "max_depth": int(compiled.depth),
+        "compile_seconds": round(compile_time, 4),
+        "max_traversal_rows": compiled.max_rows,
+        "identical_predictions": identical,
+        "results": results,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
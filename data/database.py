@@ -1,10 +1,26 @@
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 import pandas as pd
 
 # Define correct database path for airfare data
 DB_PATH = "data/airfare_data.db"  # Changed from animal_shelter.db
 DATA_FILE = "data/Data_Train.xlsx"  # Correct dataset file
 
+# Full-width schema: every column of the dataset, in file order
+AIRFARE_COLUMNS = ['Airline', 'Date_of_Journey', 'Source', 'Destination', 'Route', 'Dep_Time',
+                   'Arrival_Time', 'Duration', 'Total_Stops', 'Additional_Info', 'Price']
+
+# Model-ready form of each record (the preprocessing output), linked to its raw row by fare_id
+PREPROCESSED_COLUMNS = ['Airline', 'Source', 'Destination', 'Route', 'Duration', 'Total_Stops',
+                        'Additional_Info', 'Price', 'Journey_day', 'Journey_month', 'Dep_Time_hour',
+                        'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
+TEXT_COLUMNS = {'Airline', 'Source', 'Destination', 'Route', 'Additional_Info'}
+
+POOL_SIZE = 4
+FETCH_CHUNKSIZE = 10_000
+
 def load_data():
     """Load airfare data from the Excel file."""
     try:
@@ -14,51 +30,189 @@ def load_data():
         print(f"❌ Error loading data: {e}")
         return None
 
-def create_airfare_table():
-    """Create the airfare price table in SQLite."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def normalize_date(value):
+    """Convert a dd/mm/yyyy journey date to ISO yyyy-mm-dd so it sorts and range-queries correctly."""
+    if value is None or isinstance(value, str) and "-" in value:
+        return value
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    day, month, year = str(value).strip().split("/")
+    return f"{int(year):04d}-{int(month):02d}-{int(day):02d}"
+
+class ConnectionPool:
+    """Small pool of reusable SQLite connections shared by the Flask service threads."""
+
+    def __init__(self, db_path=DB_PATH, size=POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.created = 0
+        self.lock = threading.Lock()
+        self.initialized = False
+
+    def _new_connection(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
 
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; waits for one to be returned when the pool is exhausted."""
+        with self.lock:
+            if not self.initialized:
+                conn = self._new_connection()
+                create_airfare_table(conn)
+                self.idle.put(conn)
+                self.created += 1
+                self.initialized = True
+            if self.idle.empty() and self.created < self.size:
+                self.idle.put(self._new_connection())
+                self.created += 1
+        conn = self.idle.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self.idle.put(conn)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get().close()
+        self.created = 0
+        self.initialized = False
+
+pool = ConnectionPool()
+
+def create_airfare_table(conn):
+    """Create the airfare price table and its query indexes in SQLite."""
     # Create airfare data table
-    cursor.execute("""
+    conn.execute("""
         CREATE TABLE IF NOT EXISTS Airfare_Prices (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             Airline TEXT,
+            Date_of_Journey TEXT,
             Source TEXT,
             Destination TEXT,
-            Date_of_Journey TEXT,
-            Duration REAL,
+            Route TEXT,
+            Dep_Time TEXT,
+            Arrival_Time TEXT,
+            Duration TEXT,
+            Total_Stops TEXT,
+            Additional_Info TEXT,
             Price REAL
         )
     """)
 
+    # Widen tables created by the old 6-column schema
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(Airfare_Prices)")}
+    for col in AIRFARE_COLUMNS:
+        if col not in existing:
+            conn.execute(f"ALTER TABLE Airfare_Prices ADD COLUMN {col} {'REAL' if col == 'Price' else 'TEXT'}")
+
+    # Route/date lookups and per-airline queries
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_airfare_route_date
+        ON Airfare_Prices (Source, Destination, Date_of_Journey)
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_airfare_airline ON Airfare_Prices (Airline)")
+
+    # Preprocessed rows written by the ingest service
+    columns = ", ".join(f"{col} {'TEXT' if col in TEXT_COLUMNS else 'NUMERIC'}" for col in PREPROCESSED_COLUMNS)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS Preprocessed_Airfare (
+            fare_id INTEGER PRIMARY KEY REFERENCES Airfare_Prices (id),
+            {columns}
+        )
+    """)
     conn.commit()
-    conn.close()
 
-def insert_airfare_record(Airline, Source, Destination, Date_of_Journey, Duration, Price):
+def _record_values(record):
+    values = [record.get(col) for col in AIRFARE_COLUMNS]
+    values[1] = normalize_date(values[1])
+    return values
+
+_INSERT_SQL = f"""
+    INSERT INTO Airfare_Prices ({", ".join(AIRFARE_COLUMNS)})
+    VALUES ({", ".join("?" for _ in AIRFARE_COLUMNS)})
+"""
+
+def insert_airfare_record(Airline, Source, Destination, Date_of_Journey, Duration, Price, **other_columns):
     """Insert an airfare record into the SQLite database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    record = dict(other_columns, Airline=Airline, Source=Source, Destination=Destination,
+                  Date_of_Journey=Date_of_Journey, Duration=Duration, Price=Price)
+    with pool.connection() as conn, conn:
+        conn.execute(_INSERT_SQL, _record_values(record))
 
-    cursor.execute("""
-        INSERT INTO Airfare_Prices (Airline, Source, Destination, Date_of_Journey, Duration, Price) 
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (Airline, Source, Destination, Date_of_Journey, Duration, Price))
+def bulk_insert_airfare_records(records):
+    """Insert many records (a DataFrame or an iterable of dicts) in a single transaction."""
+    if isinstance(records, pd.DataFrame):
+        records = records.astype(object).where(records.notna(), None).to_dict(orient="records")
+    rows = [_record_values(record) for record in records]
+    with pool.connection() as conn, conn:
+        conn.executemany(_INSERT_SQL, rows)
+    return len(rows)
 
-    conn.commit()
-    conn.close()
+# Rows of plain Python values (None for missing) in the given column order
+def _frame_rows(df, columns):
+    values = df.reindex(columns=columns).astype(object)
+    return values.where(values.notna(), None).values.tolist()
+
+_INSERT_PREPROCESSED_SQL = f"""
+    INSERT INTO Preprocessed_Airfare (fare_id, {", ".join(PREPROCESSED_COLUMNS)})
+    VALUES (?, {", ".join("?" for _ in PREPROCESSED_COLUMNS)})
+"""
+
+def bulk_insert_ingested(records, preprocessed):
+    """Insert raw records and their preprocessed rows (DataFrames, row i of one is row i of the
+    other) in a single transaction; returns the number of records written."""
+    if len(records) != len(preprocessed):
+        raise ValueError("records and preprocessed rows differ in length")
+    raw_rows = _frame_rows(records, AIRFARE_COLUMNS)
+    for row in raw_rows:
+        row[1] = normalize_date(row[1])
+    values = _frame_rows(preprocessed, PREPROCESSED_COLUMNS)
+    with pool.connection() as conn, conn:
+        # Each raw row's own id links its preprocessed row (ids need not be consecutive)
+        cursor = conn.cursor()
+        fare_ids = []
+        for row in raw_rows:
+            cursor.execute(_INSERT_SQL, row)
+            fare_ids.append(cursor.lastrowid)
+        conn.executemany(_INSERT_PREPROCESSED_SQL, [[fare_id] + row for fare_id, row in zip(fare_ids, values)])
+    return len(raw_rows)
 
-def fetch_all_airfare_records():
-    """Retrieve all airfare records from the SQLite database."""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def ingest_training_data(data_file=DATA_FILE):
+    """Bulk-load the training dataset into the fare store; returns the number of rows written."""
+    df = pd.read_excel(data_file) if data_file.endswith((".xlsx", ".xls")) else pd.read_csv(data_file)
+    return bulk_insert_airfare_records(df)
 
-    print("✅ Querying Airfare_Prices table...")  # Debugging Log
-    cursor.execute("SELECT * FROM Airfare_Prices")
-    records = cursor.fetchall()
-    conn.close()
+def iter_airfare_records(chunksize=FETCH_CHUNKSIZE, Source=None, Destination=None,
+                         date_from=None, date_to=None, Airline=None):
+    """Yield airfare records in chunks of DataFrames, optionally filtered by route, airline and
+    journey date range (inclusive, dd/mm/yyyy or ISO). Filters use the table indexes."""
+    clauses, params = [], []
+    for col, value in [("Source", Source), ("Destination", Destination), ("Airline", Airline)]:
+        if value is not None:
+            clauses.append(f"{col} = ?")
+            params.append(value)
+    if date_from is not None:
+        clauses.append("Date_of_Journey >= ?")
+        params.append(normalize_date(date_from))
+    if date_to is not None:
+        clauses.append("Date_of_Journey <= ?")
+        params.append(normalize_date(date_to))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
 
-    return records
+    with pool.connection() as conn:
+        cursor = conn.execute(f"SELECT id, {', '.join(AIRFARE_COLUMNS)} FROM Airfare_Prices {where}", params)
+        columns = [d[0] for d in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunksize)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns)
 
-# Run once to ensure the table exists
-create_airfare_table()
+if __name__ == "__main__":
+    print(f"✅ Loaded {ingest_training_data()} records into {DB_PATH}.")
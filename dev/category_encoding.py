@@ -0,0 +1,68 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+
+ENCODERS_DIR = "models/encoder/"
+CATEGORICAL_COLS = ['Airline', 'Source', 'Destination', 'Route', 'Total_Stops', 'Additional_Info']
+
+# Code used for categories that were not seen when the encoder was fitted
+UNKNOWN_CODE = -1
+
+class CategoryLookup:
+    """Precompiled lookup table for a fitted LabelEncoder.
+
+    Maps each class to the code ``encoder.transform`` would give it, using a
+    hash table for single values and a hashed ``pd.Index`` for whole columns.
+    Values outside ``classes_`` map to ``UNKNOWN_CODE``.
+    """
+
+    def __init__(self, classes):
+        self.classes_ = np.asarray(classes)
+        self.index = pd.Index(self.classes_)
+        self.table = {value: code for code, value in enumerate(self.classes_.tolist())}
+
+    def encode(self, value):
+        try:
+            return self.table.get(value, UNKNOWN_CODE)
+        except TypeError:  # Unhashable input can never be a known category
+            return UNKNOWN_CODE
+
+    def encode_many(self, values):
+        if isinstance(getattr(values, "dtype", None), pd.CategoricalDtype):
+            # Look up each category once and gather by code; code -1 (missing) picks the appended UNKNOWN_CODE
+            values = pd.Categorical(values)
+            return np.append(self.encode_many(values.categories), UNKNOWN_CODE)[values.codes]
+        try:
+            return self.index.get_indexer(values).astype(np.int64)
+        except TypeError:  # Unhashable values in the column: fall back to per-value lookups
+            return np.array([self.encode(value) for value in values], dtype=np.int64)
+
+    def decode(self, code):
+        return self.classes_[code] if 0 <= code < len(self.classes_) else None
+
+    def __contains__(self, value):
+        return self.encode(value) != UNKNOWN_CODE
+
+    def __len__(self):
+        return len(self.classes_)
+
+# Turn a fitted LabelEncoder into a lookup table
+def compile_encoder(encoder):
+    return CategoryLookup(encoder.classes_)
+
+# Load and compile the saved encoders for the given columns
+def load_lookups(encoder_dir=ENCODERS_DIR, columns=CATEGORICAL_COLS):
+    lookups = {}
+    for col in columns:
+        encoder_path = os.path.join(encoder_dir, f"{col}_encoder.pkl")
+        if os.path.exists(encoder_path):
+            lookups[col] = compile_encoder(joblib.load(encoder_path))
+    return lookups
+
+# Encode every categorical column of a DataFrame in place (unseen values become UNKNOWN_CODE)
+def apply_lookups(df, lookups):
+    for col, lookup in lookups.items():
+        if col in df:
+            df[col] = lookup.encode_many(df[col])
+    return df
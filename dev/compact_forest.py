@@ -0,0 +1,133 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+CHUNK_ROWS = 2048
+
+def node_bytes(model):
+    """Memory held by a forest's tree arrays (sklearn or compact)."""
+    if isinstance(model, CompactForest):
+        return model.nbytes
+    return sum(tree.tree_.__getstate__()["nodes"].nbytes + tree.tree_.value.nbytes for tree in model.estimators_)
+
+# Round float64 thresholds down to float32. No float32 lies in (t32, t], so a float32 input x
+# satisfies x <= t exactly when x <= t32: tree decisions are unchanged.
+def floor_float32(values):
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+# One tree as preorder node lists, with every subtree whose leaves all hold the same value
+# collapsed into a single leaf (predictions are unchanged)
+def compact_tree(tree):
+    left, right = tree.children_left.tolist(), tree.children_right.tolist()
+    feature, threshold = tree.feature.tolist(), tree.threshold.tolist()
+    value = tree.value[:, 0, 0].tolist()
+    missing = getattr(tree, "missing_go_to_left", None)
+    missing = missing.tolist() if missing is not None else [0] * tree.node_count
+
+    # Children always have larger ids than their parent, so reverse id order is a postorder
+    uniform = [None] * tree.node_count
+    for node in range(tree.node_count - 1, -1, -1):
+        if left[node] == -1:
+            uniform[node] = value[node]
+        elif uniform[left[node]] is not None and uniform[left[node]] == uniform[right[node]]:
+            uniform[node] = uniform[left[node]]
+
+    out = {"right": [], "feature": [], "threshold": [], "value": [], "missing": []}
+    depth = 0
+    stack = [(0, None, 0)]  # (node, index of the parent whose right child this is, depth)
+    while stack:
+        node, parent, level = stack.pop()
+        index = len(out["value"])
+        if parent is not None:
+            out["right"][parent] = index
+        depth = max(depth, level)
+        if uniform[node] is not None:
+            # Leaf: points to itself; a NaN threshold never sends it left
+            out["right"].append(index)
+            out["feature"].append(0)
+            out["threshold"].append(np.nan)
+            out["value"].append(uniform[node])
+            out["missing"].append(0)
+        else:
+            out["right"].append(-1)  # patched when the right subtree is emitted
+            out["feature"].append(feature[node])
+            out["threshold"].append(threshold[node])
+            out["value"].append(0.0)
+            out["missing"].append(missing[node])
+            stack.append((right[node], index, level + 1))
+            stack.append((left[node], None, level + 1))  # preorder: the left child is index + 1
+    return out, depth
+
+class CompactForest:
+    """Memory-compact form of a RandomForestRegressor for serving.
+
+    Trees are stored in preorder (the left child of node ``i`` is ``i + 1``)
+    with subtrees of identical leaves collapsed, and only what prediction
+    reads is kept: uint8 split features, int32 right children, float32
+    thresholds rounded down (decisions are identical to the original) and
+    leaf values as ``value_dtype``. Impurities, sample counts and the
+    sklearn estimator objects are dropped. ``n_trees`` keeps only the first
+    trees of the forest, which is lossy.
+    """
+
+    def __init__(self, model, n_trees=None, value_dtype=np.float32):
+        if not isinstance(model, RandomForestRegressor) or model.n_outputs_ != 1:
+            raise TypeError(f"Cannot compact {type(model).__name__}; a fitted single-output RandomForestRegressor is required.")
+        estimators = model.estimators_[:n_trees] if n_trees else model.estimators_
+
+        parts, roots, depth = [], [], 0
+        offset = 0
+        for estimator in estimators:
+            tree, tree_depth = compact_tree(estimator.tree_)
+            tree["right"] = np.asarray(tree["right"], dtype=np.int64) + offset
+            roots.append(offset)
+            offset += len(tree["value"])
+            depth = max(depth, tree_depth)
+            parts.append(tree)
+
+        if offset >= np.iinfo(np.int32).max:
+            raise ValueError("Forest has too many nodes to compact.")
+        self.right = np.concatenate([p["right"] for p in parts]).astype(np.int32)
+        self.feature = np.concatenate([p["feature"] for p in parts]).astype(np.uint8 if model.n_features_in_ <= 256 else np.int32)
+        self.threshold = floor_float32(np.concatenate([p["threshold"] for p in parts]).astype(np.float64))
+        self.value = np.concatenate([p["value"] for p in parts]).astype(value_dtype)
+        missing = np.concatenate([p["missing"] for p in parts]).astype(bool)
+        self.missing_left = missing if missing.any() else None
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.depth = depth
+        self.n_trees = len(estimators)
+        self.n_features_in_ = model.n_features_in_
+
+    @property
+    def nbytes(self):
+        arrays = [self.right, self.feature, self.threshold, self.value, self.roots]
+        if self.missing_left is not None:
+            arrays.append(self.missing_left)
+        return sum(a.nbytes for a in arrays)
+
+    @property
+    def node_count(self):
+        return len(self.value)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1] if X.ndim else 0} features, but the model expects {self.n_features_in_}.")
+        if len(X) <= CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[i:i + CHUNK_ROWS]) for i in range(0, len(X), CHUNK_ROWS)])
+
+    def _predict_chunk(self, X):
+        nodes = np.broadcast_to(self.roots.astype(np.intp), (len(X), self.n_trees)).copy()
+        has_nan = self.missing_left is not None and np.isnan(X).any()
+        for _ in range(self.depth):
+            x = np.take_along_axis(X, self.feature[nodes].astype(np.intp), axis=1)
+            go_left = x <= self.threshold[nodes]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[nodes]
+            nodes = np.where(go_left, nodes + 1, self.right[nodes])
+
+        # Sequential float64 sum in tree order, as sklearn accumulates
+        return np.cumsum(self.value[nodes].astype(np.float64), axis=1)[:, -1] / self.n_trees
@@ -0,0 +1,81 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.tree import DecisionTreeRegressor
+
+CHUNK_ROWS = 2048  # rows traversed together; bounds the (rows x trees) work arrays
+
+# Above this many rows sklearn's compiled per-tree loops are faster than array traversal
+# (crossover measured at a few hundred rows for the 300-tree model), so larger batches are delegated
+MAX_TRAVERSAL_ROWS = 256
+
+class CompiledForest:
+    """A fitted RandomForestRegressor flattened into NumPy node arrays.
+
+    The nodes of all trees are concatenated into one set of arrays, with
+    leaves pointing to themselves. Prediction walks every (row, tree) pair
+    one level per step with gathers instead of calling each tree, so a call
+    costs a few dozen array operations regardless of the number of trees.
+
+    Results match ``model.predict`` bit for bit: inputs are compared as
+    float32 like sklearn's trees do, NaNs follow each split's learned
+    missing-value direction, and the tree outputs are summed sequentially
+    in tree order before averaging. Batches above ``max_rows`` rows (None:
+    no limit) are passed to the sklearn model, which is faster there and
+    gives the same result.
+    """
+
+    def __init__(self, model, max_rows=MAX_TRAVERSAL_ROWS):
+        if not isinstance(model, RandomForestRegressor) or not all(
+                isinstance(tree, DecisionTreeRegressor) for tree in model.estimators_):
+            raise TypeError(f"Cannot compile {type(model).__name__}; a fitted RandomForestRegressor is required.")
+        if model.n_outputs_ != 1:
+            raise TypeError("Only single-output forests can be compiled.")
+
+        trees = [tree.tree_ for tree in model.estimators_]
+        sizes = np.array([tree.node_count for tree in trees])
+        offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+
+        left, right = [], []
+        for tree, offset in zip(trees, offsets):
+            own = np.arange(tree.node_count) + offset
+            is_leaf = tree.children_left == -1
+            left.append(np.where(is_leaf, own, tree.children_left + offset))
+            right.append(np.where(is_leaf, own, tree.children_right + offset))
+
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.feature = np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.intp)
+        self.threshold = np.concatenate([tree.threshold for tree in trees])
+        self.value = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+        missing = [getattr(tree, "missing_go_to_left", None) for tree in trees]
+        self.missing_left = (np.concatenate(missing).astype(bool)
+                             if all(m is not None for m in missing) else np.zeros(len(self.value), dtype=bool))
+        self.model = model
+        self.max_rows = max_rows
+        self.roots = offsets.astype(np.intp)
+        self.depth = max(tree.max_depth for tree in trees)
+        self.n_features_in_ = model.n_features_in_
+        self.n_trees = len(trees)
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float32)  # sklearn trees compare float32 inputs
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1] if X.ndim else 0} features, but the model expects {self.n_features_in_}.")
+        if self.max_rows is not None and len(X) > self.max_rows:
+            return self.model.predict(X)
+        if len(X) <= CHUNK_ROWS:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[i:i + CHUNK_ROWS]) for i in range(0, len(X), CHUNK_ROWS)])
+
+    def _predict_chunk(self, X):
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        has_nan = np.isnan(X).any()
+        for _ in range(self.depth):
+            x = np.take_along_axis(X, self.feature[nodes], axis=1)
+            go_left = x <= self.threshold[nodes]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        # Sequential sum in tree order (cumsum does not reorder), as sklearn accumulates
+        return np.cumsum(self.value[nodes], axis=1)[:, -1] / self.n_trees
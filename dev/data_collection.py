@@ -2,8 +2,10 @@ from flask import Flask, request, jsonify
 import pandas as pd
 import os
 from dev_run_v0 import load_data  # Use existing load_data function
+from metrics import instrument
 
 app = Flask(__name__)
+instrument(app, "data_collection")
 
 # **Preprocessing Function**
 def preprocess_data(df):
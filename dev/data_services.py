@@ -6,8 +6,10 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from dev.preprocessing import preprocess_data
+from metrics import instrument  # same module instance as the one dev.preprocessing registers with
 
 app = Flask(__name__)
+instrument(app, "data_services")
 
 @app.route('/')
 def home():
@@ -23,4 +25,4 @@ def preprocess():
         return jsonify({"status": "Error", "message": str(e)})
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    app.run(host='0.0.0.0', port=5007, debug=True)  # 5000 is the ml_service gateway
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+from fare_schema import apply_schema
+
+CACHE_DIR = "data/.cache/"
+CACHE_FORMAT = 2  # bump when the stored layout changes; older entries are then rebuilt
+
+# Cache entries live at CACHE_DIR/<hash of source path>/<mtime_ns>-<size>-v<format>/, one .npy file per
+# column, with the compact dtypes of fare_schema. Numeric columns are memory-mapped on load; text
+# columns are stored as category codes plus a small categories array and come back as categoricals
+# built on the mapped codes, so they are memory-mapped too and never decoded to strings.
+def _source_dir(data_path, cache_dir):
+    digest = hashlib.sha1(os.path.abspath(data_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(cache_dir, digest)
+
+def _entry_dir(data_path, cache_dir):
+    stat = os.stat(data_path)
+    return os.path.join(_source_dir(data_path, cache_dir), f"{stat.st_mtime_ns}-{stat.st_size}-v{CACHE_FORMAT}")
+
+def _read_source(data_path):
+    return pd.read_csv(data_path) if data_path.endswith('.csv') else pd.read_excel(data_path)
+
+def _column_file(entry_dir, index, suffix=""):
+    return os.path.join(entry_dir, f"{index}{suffix}.npy")
+
+# Write a DataFrame to a new cache entry (atomically, via a temporary directory)
+def write_cache(df, data_path, cache_dir=CACHE_DIR):
+    entry_dir = _entry_dir(data_path, cache_dir)
+    tmp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    df = apply_schema(df)
+    columns = []
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if values.dtype.kind in "biufcmM" and not isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            np.save(_column_file(tmp_dir, i), values.to_numpy())
+            columns.append({"name": col, "kind": "array"})
+        else:
+            # Categorical codes have the smallest integer type for their number of categories,
+            # which is what Categorical.from_codes expects, so loading them does not copy
+            values = pd.Categorical(values)
+            np.save(_column_file(tmp_dir, i), values.codes)
+            np.save(_column_file(tmp_dir, i, "_categories"), np.asarray(values.categories, dtype=object), allow_pickle=True)
+            columns.append({"name": col, "kind": "category"})
+
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"source": os.path.abspath(data_path), "rows": len(df), "columns": columns}, f)
+
+    # Replace any stale entries for this source file
+    source_dir = os.path.dirname(entry_dir)
+    for name in os.listdir(source_dir):
+        path = os.path.join(source_dir, name)
+        if path not in (tmp_dir, entry_dir) and ".tmp-" not in name:
+            shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:  # Another process cached the same version first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+# Read a cache entry, memory-mapping only the requested columns
+def read_cache(entry_dir, columns=None):
+    with open(os.path.join(entry_dir, "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    data = {}
+    for i, meta in enumerate(manifest["columns"]):
+        if columns is not None and meta["name"] not in columns:
+            continue
+        # Copy-on-write mapping: pages are shared until a caller modifies them
+        values = np.load(_column_file(entry_dir, i), mmap_mode="c" if manifest["rows"] else None)
+        values = values.view(np.ndarray)  # still backed by the mapping
+        if meta["kind"] == "category":
+            categories = np.load(_column_file(entry_dir, i, "_categories"), allow_pickle=True)
+            values = pd.Categorical.from_codes(values, categories=pd.Index(categories, dtype=object))
+        data[meta["name"]] = values
+
+    if columns is not None:
+        missing = [col for col in columns if col not in data]
+        if missing:
+            raise KeyError(f"Columns not found in {manifest['source']}: {missing}")
+        data = {col: data[col] for col in columns}
+    return pd.DataFrame(data, copy=False)
+
+# Load a CSV/XLSX file through the cache: parse it once, then serve typed columnar reads
+def load_cached(data_path, columns=None, cache_dir=CACHE_DIR):
+    entry_dir = _entry_dir(data_path, cache_dir)
+    if not os.path.exists(os.path.join(entry_dir, "manifest.json")):
+        os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+        write_cache(_read_source(data_path), data_path, cache_dir)
+    return read_cache(entry_dir, columns)
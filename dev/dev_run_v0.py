@@ -1,7 +1,7 @@
-import pandas as pd
 import os
+from dataset_cache import load_cached
 
-def load_data(file_name):
+def load_data(file_name, columns=None):
     # Define the path relative to the project directory
     data_path = os.path.join('data', file_name)
     
@@ -10,9 +10,9 @@ def load_data(file_name):
         print(f"❌ Error: File {data_path} not found.")
         return None
 
-    # Load the dataset
+    # Load the dataset (parsed once, then served from the columnar cache)
     print(f"✅ Loading data from {data_path}...")
-    df = pd.read_csv(data_path) if file_name.endswith('.csv') else pd.read_excel(data_path)
+    df = load_cached(data_path, columns)
 
     # Debugging
     print(f"📊 Loaded data type: {type(df)}")
@@ -0,0 +1,312 @@
+import bisect
+import math
+import os
+import threading
+from collections import deque
+import numpy as np
+from category_encoding import CATEGORICAL_COLS
+from feature_pipeline import NUMERICAL_COLS, load_pipeline
+from prediction_log import parse_value
+
+REFERENCE_FILE = "data/processed_airfare_data.csv"
+DRIFT_WINDOW = 5000    # most recent logged predictions the distributions and PSI cover
+ERROR_WINDOW = 1000    # most recent predictions with an Actual_Price the rolling MAE covers
+PSI_BINS = 10          # numerical features are binned at the training deciles
+PSI_EPSILON = 1e-4     # floor for empty bins, so PSI stays finite
+MIN_PSI_ROWS = 100     # fewer window rows than this are reported but not rated
+OTHER = "__other__"    # categories not seen in training
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Population stability index between two sets of bin proportions
+def psi(expected, actual):
+    expected = np.maximum(np.asarray(expected, dtype=np.float64), PSI_EPSILON)
+    actual = np.maximum(np.asarray(actual, dtype=np.float64), PSI_EPSILON)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+def psi_rating(value):
+    if value < 0.1:
+        return "stable"
+    return "moderate" if value < 0.25 else "significant"
+
+# Approximate quantiles of a histogram, interpolating linearly inside each bin
+def histogram_quantiles(edges, counts, low, high, quantiles=QUANTILES):
+    total = sum(counts)
+    if not total:
+        return {}
+    bounds = [low] + list(edges) + [high]
+    result = {}
+    for q in quantiles:
+        target, cumulative = q * total, 0
+        for i, count in enumerate(counts):
+            if count and cumulative + count >= target:
+                lower, upper = bounds[i], max(bounds[i], bounds[i + 1])
+                result[f"p{round(q * 100):g}"] = round(lower + (target - cumulative) / count * (upper - lower), 4)
+                break
+            cumulative += count
+    return result
+
+class Reference:
+    """Training distribution of each monitored feature, in the raw units that are logged.
+
+    Built from the processed dataset by undoing the fitted pipeline: codes
+    are decoded to category names and scaled values are unscaled. Numerical
+    features keep their decile edges and the share of training rows in each
+    bin; categorical features keep the share of each category.
+    """
+
+    def __init__(self, df, pipeline, bins=PSI_BINS):
+        self.numeric = {}
+        self.categorical = {}
+        offsets = {col: (center, spread) for _, col, table, center, spread in pipeline.plan if table is None}
+        for col in NUMERICAL_COLS:
+            if col not in df or col not in offsets:
+                continue
+            center, spread = offsets[col]
+            values = np.round(df[col].to_numpy(dtype=np.float64) * spread + center, 6)
+            edges = np.unique(np.round(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]), 6)).tolist()
+            counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+            self.numeric[col] = {"edges": edges, "expected": (counts / len(values)).tolist(),
+                                 "min": float(values.min()), "max": float(values.max())}
+        for col in CATEGORICAL_COLS:
+            if col not in df or col not in pipeline.classes:
+                continue
+            classes = pipeline.classes[col].tolist()
+            codes, counts = np.unique(df[col].to_numpy(), return_counts=True)
+            self.categorical[col] = {classes[int(code)] if 0 <= code < len(classes) else OTHER: count / len(df)
+                                     for code, count in zip(codes.tolist(), counts.tolist())}
+
+    def bin(self, col, value):
+        return bisect.bisect_right(self.numeric[col]["edges"], value)
+
+    def category(self, col, value):
+        try:
+            return value if value in self.categorical[col] else OTHER
+        except TypeError:  # unhashable
+            return OTHER
+
+def to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+class DriftMonitor:
+    """Streaming accuracy and drift statistics over logged predictions.
+
+    ``update`` costs O(1) per record no matter how many predictions were
+    logged: it adds the record to fixed-size windows and adjusts running
+    counts and sums (evicting the oldest record once a window is full).
+    ``stats`` derives rolling and lifetime MAE, per-feature histograms,
+    quantiles and frequency counts, and PSI against the training
+    distribution from those counts.
+
+    The monitoring service feeds it with ``sync``, which reads only the rows
+    appended to the prediction log since the previous call. Statistics
+    therefore cover the whole log, not just the records this process
+    received. They survive restarts (the first sync replays the log), and
+    every serve.py worker reports the same numbers once it has synced. Rows
+    still queued in another worker are counted after its next flush.
+    """
+
+    def __init__(self, reference_file=REFERENCE_FILE, window=DRIFT_WINDOW, error_window=ERROR_WINDOW):
+        self.reference_file = reference_file
+        self.window = window
+        self.error_window = error_window
+        self.lock = threading.Lock()
+        self.reference = None
+        self.reference_error = None
+        self.reference_mtime = None
+        self.sync_lock = threading.Lock()
+        self.clear()
+
+    # Empty windows and lifetime statistics, read from the start of the log on the next sync
+    def clear(self):
+        self.log_path = None
+        self.log_cursor = (None, 0)  # iter_rows (offset, row id) of the next log row to read
+        self.rows = deque()    # (numerical values, categorical values) of the drift window
+        self.errors = deque()  # (absolute error, signed error) of the error window
+        self.error_sum = 0.0
+        self.signed_error_sum = 0.0
+        self.lifetime_errors = 0
+        self.lifetime_error_sum = 0.0
+        self.rows_seen = 0
+        self.lifetime_min = {col: math.inf for col in NUMERICAL_COLS}
+        self.lifetime_max = {col: -math.inf for col in NUMERICAL_COLS}
+        self.reset_counts()
+
+    # Add the rows appended to a prediction log (PredictionLogReader or PredictionLog) since the last sync
+    def sync(self, log):
+        with self.sync_lock:
+            if log.path != self.log_path:
+                with self.lock:
+                    self.clear()
+                self.log_path = log.path
+            try:
+                for row_id, next_offset, row in log.iter_rows(*self.log_cursor):
+                    # Log cells are CSV text: numbers are parsed back so they match training categories
+                    self.update({col: parse_value(value) for col, value in row.items()})
+                    self.log_cursor = (next_offset, row_id + 1)
+            except ValueError:  # the log was replaced by a shorter file: start over
+                with self.lock:
+                    self.clear()
+
+    def reset_counts(self):
+        self.bin_counts = {}
+        self.category_counts = {col: {} for col in CATEGORICAL_COLS}
+        self.missing = {col: 0 for col in NUMERICAL_COLS + CATEGORICAL_COLS}
+        self.sums = {col: [0, 0.0, 0.0] for col in NUMERICAL_COLS}  # count, sum, sum of squares
+        if self.reference is not None:
+            self.bin_counts = {col: [0] * (len(ref["edges"]) + 1) for col, ref in self.reference.numeric.items()}
+
+    # (Re)build the training reference when the processed dataset changed; the window is re-binned
+    def refresh_reference(self):
+        try:
+            mtime = os.stat(self.reference_file).st_mtime_ns
+        except OSError:
+            self.reference_error = f"Reference data not found: {self.reference_file}"
+            return
+        if mtime == self.reference_mtime:
+            return
+        from dataset_cache import load_cached
+        try:
+            reference = Reference(load_cached(self.reference_file), load_pipeline())
+        except Exception as e:
+            self.reference_error = f"Could not build the reference distribution: {e}"
+            return
+        with self.lock:
+            self.reference, self.reference_mtime, self.reference_error = reference, mtime, None
+            self.reset_counts()
+            for row in self.rows:
+                self._count(row, 1)
+
+    def _count(self, row, sign):
+        numeric, categorical = row
+        reference = self.reference
+        for col, value in zip(NUMERICAL_COLS, numeric):
+            if value is None:
+                self.missing[col] += sign
+                continue
+            sums = self.sums[col]
+            sums[0] += sign
+            sums[1] += sign * value
+            sums[2] += sign * value * value
+            if col in self.bin_counts:
+                self.bin_counts[col][reference.bin(col, value)] += sign
+        for col, value in zip(CATEGORICAL_COLS, categorical):
+            if value is None:
+                self.missing[col] += sign
+                continue
+            if reference is not None and col in reference.categorical:
+                value = reference.category(col, value)
+            counts = self.category_counts[col]
+            counts[value] = counts.get(value, 0) + sign
+            if not counts[value]:
+                del counts[value]
+
+    # Add one logged prediction (a /log_prediction payload)
+    def update(self, record):
+        if self.reference is None and self.reference_error is None:
+            self.refresh_reference()
+        numeric = tuple(to_float(record.get(col)) for col in NUMERICAL_COLS)
+        categorical = []
+        for col in CATEGORICAL_COLS:
+            value = record.get(col)
+            if isinstance(value, (list, dict)):
+                value = OTHER  # unhashable, never a training category
+            categorical.append(None if value is None or value == "" else value)
+        row = (numeric, tuple(categorical))
+        predicted, actual = to_float(record.get("Predicted_Price")), to_float(record.get("Actual_Price"))
+
+        with self.lock:
+            self.rows_seen += 1
+            for col, value in zip(NUMERICAL_COLS, numeric):
+                if value is not None:
+                    self.lifetime_min[col] = min(self.lifetime_min[col], value)
+                    self.lifetime_max[col] = max(self.lifetime_max[col], value)
+            self.rows.append(row)
+            self._count(row, 1)
+            if len(self.rows) > self.window:
+                self._count(self.rows.popleft(), -1)
+
+            # Feedback rows (an Actual_Price was logged) update the error statistics
+            if predicted is not None and actual is not None and actual > 0:
+                error = predicted - actual
+                self.errors.append((abs(error), error))
+                self.error_sum += abs(error)
+                self.signed_error_sum += error
+                self.lifetime_errors += 1
+                self.lifetime_error_sum += abs(error)
+                if len(self.errors) > self.error_window:
+                    old_abs, old_signed = self.errors.popleft()
+                    self.error_sum -= old_abs
+                    self.signed_error_sum -= old_signed
+
+    def stats(self):
+        self.refresh_reference()
+        with self.lock:
+            window_rows = len(self.rows)
+            errors = len(self.errors)
+            accuracy = {
+                "rolling_window": self.error_window,
+                "rolling_rows": errors,
+                "rolling_mae": round(self.error_sum / errors, 2) if errors else None,
+                "rolling_mean_error": round(self.signed_error_sum / errors, 2) if errors else None,
+                "lifetime_rows": self.lifetime_errors,
+                "lifetime_mae": round(self.lifetime_error_sum / self.lifetime_errors, 2) if self.lifetime_errors else None,
+            }
+
+            numerical = {}
+            for col in NUMERICAL_COLS:
+                count, total, squares = self.sums[col]
+                summary = {"count": count, "missing": self.missing[col]}
+                if count:
+                    mean = total / count
+                    summary["mean"] = round(mean, 4)
+                    summary["std"] = round(math.sqrt(max(squares / count - mean * mean, 0.0)), 4)
+                if self.reference is not None and col in self.reference.numeric:
+                    ref = self.reference.numeric[col]
+                    counts = self.bin_counts[col]
+                    low = min(ref["min"], self.lifetime_min[col])
+                    high = max(ref["max"], self.lifetime_max[col])
+                    summary["bin_edges"] = ref["edges"]
+                    summary["histogram"] = list(counts)
+                    summary["quantiles"] = histogram_quantiles(ref["edges"], counts, low, high)
+                    if count:
+                        summary.update(self._psi(ref["expected"], [c / count for c in counts], count))
+                numerical[col] = summary
+
+            categorical = {}
+            for col in CATEGORICAL_COLS:
+                counts = self.category_counts[col]
+                count = sum(counts.values())
+                summary = {"count": count, "missing": self.missing[col],
+                           # JSON keys are strings (Total_Stops categories are numbers)
+                           "frequencies": {str(key): value for key, value in
+                                           sorted(counts.items(), key=lambda item: -item[1])}}
+                if self.reference is not None and col in self.reference.categorical and count:
+                    expected = self.reference.categorical[col]
+                    keys = list(expected) + ([OTHER] if OTHER not in expected else [])
+                    summary["unseen"] = counts.get(OTHER, 0)
+                    summary.update(self._psi([expected.get(key, 0.0) for key in keys],
+                                             [counts.get(key, 0) / count for key in keys], count))
+                categorical[col] = summary
+
+        scores = [s["psi"] for s in list(numerical.values()) + list(categorical.values()) if s.get("rating")]
+        return {
+            "rows_seen": self.rows_seen,
+            "drift_window": self.window,
+            "window_rows": window_rows,
+            "reference": self.reference_file if self.reference is not None else None,
+            "reference_error": self.reference_error,
+            "max_psi": max(scores) if scores else None,
+            "drift": psi_rating(max(scores)) if scores else None,
+            "accuracy": accuracy,
+            "numerical": numerical,
+            "categorical": categorical,
+        }
+
+    @staticmethod
+    def _psi(expected, actual, count):
+        value = round(psi(expected, actual), 4)
+        return {"psi": value, "rating": psi_rating(value) if count >= MIN_PSI_ROWS else None}
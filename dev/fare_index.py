@@ -0,0 +1,326 @@
+"""Precomputed fare grid of a model bundle, for instant price-trend queries.
+
+When a bundle is promoted, a separate process (``build_in_background``)
+scores with its model every combination of:
+
+- an itinerary seen in its training data (airline, source, destination,
+  route and stops that were flown together), read from the file recorded
+  in the bundle's "training_data" metadata;
+- a day of the journey months seen in training;
+- a departure hour, 0 to 23.
+
+Each itinerary's other features take its typical values: median duration
+and most common Additional_Info. Departures are on the hour, and the
+arrival time follows from the duration.
+
+The grid is stored next to the bundle as ``<version>.fare_index/``, in one
+.npy file per column that is memory-mapped on load:
+
+    key        int32    (source/destination pair, month, day), see date_key
+    itinerary  int16    row of manifest["itineraries"]
+    prices     float32  (24, rows): predicted price per departure hour
+    min_price  float32  cheapest of the 24 prices
+    min_hour   int8     departure hour of the cheapest price
+    mean_price float32  mean of the 24 prices
+
+Rows are sorted by (pair, date, itinerary). A date range for one pair is
+therefore a contiguous slice, found with two binary searches, and a query
+only reduces that slice: the per-row summaries when all departure hours
+count, the hourly prices when the query narrows them. Until a promoted
+bundle's index is built, ``get_index`` serves the most recently built one.
+"""
+import calendar
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from category_encoding import UNKNOWN_CODE
+from dataset_cache import load_cached
+
+PREPROCESSED_FILE = "data/preprocessed_airfare_data.csv"  # training data of bundles that do not record theirs
+INDEX_SUFFIX = ".fare_index"
+INDEX_FORMAT = 1
+
+ITINERARY_COLS = ['Source', 'Destination', 'Airline', 'Route', 'Total_Stops']
+HOURS = 24
+PAIR_STRIDE = 512     # > largest date code (12 * 32 + 31)
+CALENDAR_YEAR = 2019  # collected journeys are all in 2019; only used for month lengths
+PREDICT_ROWS = 65_536
+COLUMNS = ["key", "itinerary", "prices", "min_price", "min_hour", "mean_price"]
+
+# Sortable code of a calendar day, unique within a year
+def date_code(month, day):
+    return month * 32 + day
+
+def date_key(pair, month, day):
+    return pair * PAIR_STRIDE + date_code(month, day)
+
+def index_dir(bundle_path):
+    return os.path.splitext(bundle_path)[0] + INDEX_SUFFIX
+
+# One row per itinerary seen in training, sorted by ITINERARY_COLS, with its typical duration and
+# Additional_Info. Itineraries with a category the bundle's encoders do not know are left out.
+def training_itineraries(df, pipeline):
+    known = np.ones(len(df), dtype=bool)
+    for col in ITINERARY_COLS + ['Additional_Info']:
+        if col in pipeline.encoders:
+            known &= pipeline.encoders[col].encode_many(df[col]) != UNKNOWN_CODE
+    groups = df[known].groupby(ITINERARY_COLS, observed=True, sort=True)
+    itineraries = groups.agg(Duration=('Duration', 'median'),
+                             Additional_Info=('Additional_Info', lambda s: s.value_counts().index[0]),
+                             flights=('Duration', 'size')).reset_index()
+    itineraries['Duration'] = itineraries['Duration'].round().astype(np.int64)
+    return itineraries
+
+# Preprocessed rows of a bundle's training data. Bundles trained in memory from collected data
+# (ml_service without persist) record the raw file: it is preprocessed the same way here.
+def training_rows(data_path):
+    columns = ITINERARY_COLS + ['Additional_Info', 'Duration', 'Journey_month']
+    df = load_cached(data_path)
+    if 'Journey_month' not in df:
+        from preprocessing import transform_chunk
+        df = transform_chunk(df)
+    return df[columns]
+
+# Raw feature frame for grid rows given as (itinerary row, month, day, hour) arrays
+def grid_frame(itineraries, it, month, day, hour):
+    frame = {col: itineraries[col].array.take(it) for col in ITINERARY_COLS + ['Additional_Info']}
+    duration = itineraries['Duration'].to_numpy()[it]
+    arrival = hour * 60 + duration
+    frame.update({
+        'Duration': duration,
+        'Journey_day': day,
+        'Journey_month': month,
+        'Dep_Time_hour': hour,
+        'Dep_Time_minute': np.zeros(len(it), dtype=np.int64),
+        'Arrival_Time_hour': arrival // 60 % 24,
+        'Arrival_Time_minute': arrival % 60,
+    })
+    return pd.DataFrame(frame)
+
+def build_index(bundle_path, data_path=None):
+    """Score the full grid with the bundle's model and write its index; returns the manifest.
+
+    The itineraries come from ``data_path``, by default the bundle's training data.
+    """
+    from model_bundle import load_bundle  # model_bundle builds indexes on promotion
+
+    start = time.perf_counter()
+    bundle = load_bundle(bundle_path)
+    data_path = data_path or bundle.metadata.get("training_data") or PREPROCESSED_FILE
+    df = training_rows(data_path)
+    itineraries = training_itineraries(df, bundle.pipeline)
+    if itineraries.empty:
+        raise ValueError(f"No known itineraries in {data_path}")
+    months = sorted(int(m) for m in df['Journey_month'].unique())
+    dates = np.array([(m, d) for m in months for d in range(1, calendar.monthrange(CALENDAR_YEAR, m)[1] + 1)])
+
+    # Pair of each itinerary; itineraries are sorted by pair, so each pair's rows are contiguous
+    pair_names = itineraries[['Source', 'Destination']].astype(str).agg(tuple, axis=1)
+    pairs = list(dict.fromkeys(pair_names))
+    pair_of = np.array([pairs.index(name) for name in pair_names])
+
+    # Rows in (pair, date, itinerary) order, each with its 24 hourly prices
+    row_it, row_date = [], []
+    for pair in range(len(pairs)):
+        members = np.flatnonzero(pair_of == pair)
+        row_date.append(np.repeat(np.arange(len(dates)), len(members)))
+        row_it.append(np.tile(members, len(dates)))
+    row_it, row_date = np.concatenate(row_it), np.concatenate(row_date)
+    keys = (pair_of[row_it] * PAIR_STRIDE + date_code(dates[row_date, 0], dates[row_date, 1])).astype(np.int32)
+
+    prices = np.empty((len(row_it), HOURS), dtype=np.float32)
+    flat = prices.reshape(-1)
+    grid_it, grid_date = np.repeat(row_it, HOURS), np.repeat(row_date, HOURS)
+    grid_hour = np.tile(np.arange(HOURS), len(row_it))
+    for lo in range(0, len(flat), PREDICT_ROWS):
+        hi = lo + PREDICT_ROWS
+        frame = grid_frame(itineraries, grid_it[lo:hi], dates[grid_date[lo:hi], 0],
+                           dates[grid_date[lo:hi], 1], grid_hour[lo:hi])
+        X = bundle.pipeline.transform_array(frame[bundle.feature_order])
+        flat[lo:hi] = np.round(bundle.predictor.predict(X), 2)
+
+    manifest = {
+        "format": INDEX_FORMAT,
+        "model_version": bundle.version,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "source": os.path.abspath(data_path),
+        "rows": len(keys),
+        "predictions": int(prices.size),
+        "months": months,
+        "pairs": [list(pair) for pair in pairs],
+        "itineraries": [
+            {"airline": str(row.Airline), "source": str(row.Source), "destination": str(row.Destination),
+             "route": str(row.Route), "total_stops": int(row.Total_Stops), "duration": int(row.Duration),
+             "additional_info": str(row.Additional_Info), "flights": int(row.flights)}
+            for row in itineraries.itertuples(index=False)
+        ],
+    }
+
+    # Write the index directory atomically, via a temporary directory
+    path = index_dir(bundle_path)
+    tmp_dir = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = {
+        "key": keys,
+        "itinerary": row_it.astype(np.int16),
+        "prices": np.ascontiguousarray(prices.T),  # hour-major: hour ranges reduce over contiguous rows
+        "min_price": prices.min(axis=1),
+        "min_hour": prices.argmin(axis=1).astype(np.int8),
+        "mean_price": prices.mean(axis=1, dtype=np.float64).astype(np.float32),
+    }
+    for name in COLUMNS:
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), columns[name])
+    manifest["seconds"] = round(time.perf_counter() - start, 3)
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        os.rename(tmp_dir, path)
+    except OSError:  # Another process built the same index first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return manifest
+
+def has_index(bundle_path):
+    return os.path.exists(os.path.join(index_dir(bundle_path), "manifest.json"))
+
+# Build a bundle's index in a separate process (this module's command line) unless it exists, so a
+# promotion never waits for it and the build outlives short-lived callers such as training jobs.
+# Returns the process, or None if the index exists. Failures are reported by the process.
+def build_in_background(bundle_path):
+    if has_index(bundle_path):
+        return None
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--bundle", bundle_path])
+    threading.Thread(target=process.wait, daemon=True).start()  # reap it when it exits
+    return process
+
+class FareIndex:
+    """A bundle's fare grid, memory-mapped, answering per-day price trends."""
+
+    def __init__(self, path):
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.path = path
+        self.version = self.manifest["model_version"]
+        for name in COLUMNS:
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r"))
+        self.pairs = {tuple(pair): i for i, pair in enumerate(self.manifest["pairs"])}
+        itineraries = self.manifest["itineraries"]
+        self.airlines = np.array([it["airline"] for it in itineraries], dtype=object)
+        self.stops = np.array([it["total_stops"] for it in itineraries])
+
+    def trends(self, source, destination, start, end, airline=None, stops=None, hours=(0, HOURS - 1)):
+        """Per-day cheapest and mean predicted price from ``start`` to ``end`` ((month, day) tuples).
+
+        Days outside the index and itineraries not matching the filters are left out.
+        ``hours`` is the inclusive range of departure hours considered.
+        """
+        pair = self.pairs.get((source, destination))
+        if pair is None:
+            return []
+        lo = int(np.searchsorted(self.key, date_key(pair, *start), side="left"))
+        hi = int(np.searchsorted(self.key, date_key(pair, *end), side="right"))
+        rows = slice(lo, hi)
+        if airline is not None or stops is not None:
+            allowed = np.ones(len(self.airlines), dtype=bool)
+            if airline is not None:
+                allowed &= self.airlines == airline
+            if stops is not None:
+                allowed &= self.stops == stops
+            rows = lo + np.flatnonzero(allowed[self.itinerary[lo:hi]])
+        codes = self.key[rows] % PAIR_STRIDE
+        if not len(codes):
+            return []
+
+        first_hour, last_hour = hours
+        all_hours = (first_hour, last_hour) == (0, HOURS - 1)
+        if all_hours:  # precomputed
+            row_min, row_mean = self.min_price[rows], self.mean_price[rows]
+        else:
+            block = self.prices[first_hour:last_hour + 1, rows]
+            row_min, row_mean = block.min(axis=0), block.mean(axis=0)
+
+        # Rows of one day are contiguous: reduce each run of equal date codes
+        new_day = np.empty(len(codes), dtype=bool)
+        new_day[0] = True
+        np.not_equal(codes[1:], codes[:-1], out=new_day[1:])
+        starts = np.flatnonzero(new_day)
+        counts = np.diff(np.append(starts, len(codes)))
+        day_min = np.minimum.reduceat(row_min, starts)
+        day_mean = np.add.reduceat(row_mean.astype(np.float64), starts) / counts
+        cheapest = np.flatnonzero(row_min == np.repeat(day_min, counts))
+        best = cheapest[np.searchsorted(cheapest, starts)]  # first cheapest row of each day
+        best_it = self.itinerary[rows][best].tolist()
+        if all_hours:
+            best_hour = self.min_hour[rows][best]
+        else:
+            best_hour = block[:, best].argmin(axis=0) + first_hour
+
+        itineraries = self.manifest["itineraries"]
+        days = []
+        for code, low, mean, it, hour in zip(codes[starts].tolist(), day_min.tolist(), day_mean.tolist(),
+                                             best_it, best_hour.tolist()):
+            it = itineraries[it]
+            days.append({
+                "month": code // 32,
+                "day": code % 32,
+                "min_price": round(low, 2),
+                "mean_price": round(mean, 2),
+                "airline": it["airline"],
+                "route": it["route"],
+                "total_stops": it["total_stops"],
+                "dep_hour": hour,
+            })
+        return days
+
+_lock = threading.Lock()
+_loaded = {"path": None, "index": None}
+
+# Most recently built index next to a bundle, e.g. the previous bundle's while its own is being built
+def latest_index_dir(bundle_path):
+    folder = os.path.dirname(bundle_path) or "."
+    built = []
+    for name in os.listdir(folder):
+        manifest = os.path.join(folder, name, "manifest.json")
+        if name.endswith(INDEX_SUFFIX) and os.path.exists(manifest):
+            built.append((os.stat(manifest).st_mtime_ns, os.path.join(folder, name)))
+    return max(built)[1] if built else None
+
+# Index of a loaded bundle, or the latest built one until it has its own (None if there is none);
+# kept open until another index is asked for. Its ``version`` tells which model it belongs to.
+def get_index(bundle):
+    if bundle is None or not bundle.path:
+        return None
+    path = index_dir(bundle.path) if has_index(bundle.path) else latest_index_dir(bundle.path)
+    if path is None:
+        return None
+    if _loaded["path"] != path:
+        with _lock:
+            if _loaded["path"] != path:
+                _loaded["index"] = FareIndex(path)
+                _loaded["path"] = path
+    return _loaded["index"]
+
+if __name__ == "__main__":
+    import argparse
+    from model_bundle import current_bundle_path
+
+    parser = argparse.ArgumentParser(description="(Re)build the fare index of a model bundle.")
+    parser.add_argument("--bundle", help="bundle file (default: the current one)")
+    parser.add_argument("--data", help="training data (default: the one recorded in the bundle)")
+    args = parser.parse_args()
+    bundle_path = args.bundle or current_bundle_path()
+    if not bundle_path:
+        raise SystemExit("❌ No bundle to index. Train the model first!")
+    try:
+        manifest = build_index(bundle_path, args.data)
+    except Exception as e:
+        raise SystemExit(f"❌ Fare index not built for {bundle_path}: {e}")
+    print(f"✅ Fare index of {manifest['model_version']}: {manifest['rows']} rows, "
+          f"{manifest['predictions']} prices in {manifest['seconds']}s -> {index_dir(bundle_path)}")
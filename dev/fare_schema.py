@@ -0,0 +1,72 @@
+"""Compact in-memory dtypes for fare data, shared by every loader.
+
+With default dtypes, every text value is its own Python string, repeated
+across thousands of rows, and every number takes 8 bytes.
+``apply_schema`` converts:
+
+- text columns (Airline, Source, Destination, Route, Additional_Info, and
+  the raw date/time/duration/stops strings) to ``category``;
+- stops, day, month, hour and minute to int8 and duration (minutes) to
+  int16, or to the next wider type if their values do not fit;
+- other integer columns, such as category codes, to the smallest integer
+  type that holds their values;
+- Price to float32 (whole rupees far below 2**24, so exact). Predicted
+  and actual prices are model outputs with fractions and stay float64.
+
+Scaled features, the floats of the processed dataset, stay float64: they
+are model inputs, and rounding them would change predictions. The compact
+dtypes are for memory only: frames are written through ``csv_frame``, which
+turns whole-rupee prices back into integers, so written CSVs are the same
+text as with default dtypes ("3897", not "3897.0").
+"""
+import numpy as np
+import pandas as pd
+
+CATEGORY_COLS = ['Airline', 'Source', 'Destination', 'Route', 'Additional_Info']
+INT8_COLS = ['Total_Stops', 'Journey_day', 'Journey_month', 'Dep_Time_hour', 'Dep_Time_minute',
+             'Arrival_Time_hour', 'Arrival_Time_minute']
+INT16_COLS = ['Duration']
+FLOAT32_COLS = ['Price']
+
+INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+# Compact dtype for one column, or None to keep it as it is
+def column_dtype(name, values):
+    dtype = values.dtype
+    if isinstance(dtype, pd.CategoricalDtype):
+        return None
+    if dtype == object or pd.api.types.is_string_dtype(dtype):
+        return "category"
+    if name in FLOAT32_COLS and dtype.kind in "iuf":
+        return None if dtype == np.float32 else np.dtype(np.float32)
+    if dtype.kind in "iu":
+        smallest = np.int16 if name in INT16_COLS else np.int8
+        low, high = (int(values.min()), int(values.max())) if len(values) else (0, 0)
+        for candidate in INT_TYPES[INT_TYPES.index(smallest):]:
+            info = np.iinfo(candidate)
+            if info.min <= low and high <= info.max:
+                return None if dtype == candidate else np.dtype(candidate)
+    return None
+
+def apply_schema(df):
+    """``df`` with compact dtypes (a new frame unless every column already has one)."""
+    dtypes = {}
+    for col in df.columns:
+        dtype = column_dtype(col, df[col])
+        if dtype is not None:
+            dtypes[col] = dtype
+    return df.astype(dtypes) if dtypes else df
+
+def csv_frame(df):
+    """``df`` as default dtypes would write it: float32 prices holding whole numbers become int64."""
+    dtypes = {}
+    for col in FLOAT32_COLS:
+        if col in df and df[col].dtype == np.float32:
+            values = df[col].to_numpy()
+            if np.isfinite(values).all() and np.array_equal(values, np.floor(values)):
+                dtypes[col] = np.int64
+    return df.astype(dtypes) if dtypes else df
+
+def memory_bytes(df):
+    """Deep memory footprint of a DataFrame, strings and categories included."""
+    return int(df.memory_usage(deep=True).sum())
@@ -1,25 +1,57 @@
 import os
-import joblib
-import pandas as pd
 from flask import Flask, request, jsonify
 from dev_run_v0 import load_data  # Load data from dev_run_v0
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from feature_pipeline import FeaturePipeline, PIPELINE_FILE
+from fare_schema import csv_frame
+from parallel_features import parallel_feature_engineering, CHUNK_BYTES
+from metrics import instrument
 
 app = Flask(__name__)
+instrument(app, "feature_engineering")
 
 ENCODERS_DIR = "models/encoder/"
 os.makedirs(ENCODERS_DIR, exist_ok=True)  # Ensure encoder directory exists
+PROCESSED_FILE_PATH = os.path.join("data", "processed_airfare_data.csv")
 
-# Function to apply label encoding and save encoders
-# Function to apply label encoding and save encoders
-def encode_categorical_features(df, categorical_cols):
-    encoders = {}
-    for col in categorical_cols:
-        encoder = LabelEncoder()
-        df[col] = encoder.fit_transform(df[col])  # Ensure categorical values are transformed
-        encoders[col] = encoder
-        joblib.dump(encoder, os.path.join(ENCODERS_DIR, f"{col}_encoder.pkl"))  # Save encoder
-    return df, encoders
+# Categorical columns to encode and numerical columns to scale
+CATEGORICAL_COLS = ['Airline', 'Source', 'Destination', 'Route', 'Total_Stops', 'Additional_Info']
+NUMERICAL_COLS = ['Duration', 'Journey_day', 'Journey_month', 'Dep_Time_hour',
+                  'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
+
+# Fit the feature pipeline (label encoding + scaling), save it and transform the dataset once.
+# source is the file df was read from, recorded in the pipeline and in the bundles trained with it.
+def fit_feature_pipeline(df, categorical_cols, numerical_cols, source=None):
+    pipeline = FeaturePipeline.fit(df, categorical_cols, numerical_cols)
+    pipeline.source = source
+    pipeline.save(ENCODERS_DIR)  # pipeline.pkl plus the per-column encoders and scaler.pkl
+    return pipeline.transform(df), pipeline
+
+# Run feature engineering on a file in data/; returns the fitted pipeline and a summary.
+# Options: parallel (with workers, chunk_bytes, merge) to spread the work over a process pool.
+def run_feature_engineering(file_name, options=None):
+    options = options or {}
+
+    # Parallel mode: fit and transform chunks of a CSV across a process pool, writing shards
+    if options.get("parallel"):
+        merge = options.get("merge", True)
+        pipeline, info = parallel_feature_engineering(
+            os.path.join("data", file_name), CATEGORICAL_COLS, NUMERICAL_COLS, PROCESSED_FILE_PATH,
+            workers=options.get("workers"), chunk_bytes=int(options.get("chunk_bytes", CHUNK_BYTES)), merge=merge)
+        pipeline.source = os.path.join("data", file_name)
+        pipeline_path = pipeline.save(ENCODERS_DIR)
+        return pipeline, dict(info, processed_file=PROCESSED_FILE_PATH if merge else None, pipeline_file=pipeline_path)
+
+    df = load_data(file_name)
+    if df is None or df.empty:
+        raise ValueError("Failed to load data or empty file.")
+
+    df, pipeline = fit_feature_pipeline(df, CATEGORICAL_COLS, NUMERICAL_COLS, os.path.join("data", file_name))
+
+    # Save the feature-engineered dataset
+    csv_frame(df).to_csv(PROCESSED_FILE_PATH, index=False)
+
+    return pipeline, {"rows": len(df), "processed_file": PROCESSED_FILE_PATH,
+                      "pipeline_file": os.path.join(ENCODERS_DIR, PIPELINE_FILE)}
 
 @app.route("/feature_engineering", methods=["POST"])
 def feature_engineering():
@@ -30,33 +62,14 @@ def feature_engineering():
         if not file_name:
             return jsonify({"status": "Error", "message": "Missing file_name in request."})
 
-        df = load_data(file_name)
-        if df is None or df.empty:
-            return jsonify({"status": "Error", "message": "Failed to load data or empty file."})
-
-        # Identify categorical columns to encode
-        categorical_cols = ['Airline', 'Source', 'Destination','Route', 'Total_Stops', 'Additional_Info']
-        df, encoders = encode_categorical_features(df, categorical_cols)
-
-        # Apply Scaling
-        scaler = StandardScaler()
-        numerical_cols = ['Duration', 'Journey_day', 'Journey_month', 'Dep_Time_hour', 
-                          'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
-        df[numerical_cols] = scaler.fit_transform(df[numerical_cols])
-
-        # Save the scaler
-        joblib.dump(scaler, os.path.join(ENCODERS_DIR, "scaler.pkl"))
-
-        # Save the feature-engineered dataset
-        processed_file_path = os.path.join("data", "processed_airfare_data.csv")
-        df.to_csv(processed_file_path, index=False)
+        pipeline, info = run_feature_engineering(file_name, data)
 
         return jsonify({
             "status": "Success",
             "message": "Feature engineering completed successfully!",
-            "encoded_features": list(encoders.keys()),
-            "scaled_features": numerical_cols,
-            "processed_file": processed_file_path
+            "encoded_features": list(pipeline.encoders),
+            "scaled_features": NUMERICAL_COLS,
+            **info
         })
 
     except Exception as e:
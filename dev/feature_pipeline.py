@@ -0,0 +1,272 @@
+import os
+import threading
+from fractions import Fraction
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+from category_encoding import CategoryLookup, load_lookups, ENCODERS_DIR, CATEGORICAL_COLS, UNKNOWN_CODE
+
+PIPELINE_FILE = "pipeline.pkl"
+TARGET_COL = "Price"
+
+NUMERICAL_COLS = ['Duration', 'Journey_day', 'Journey_month', 'Dep_Time_hour',
+                  'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
+
+# Column order of processed_airfare_data.csv without the target, i.e. what models are fitted on
+FEATURE_ORDER = ['Airline', 'Source', 'Destination', 'Route', 'Duration', 'Total_Stops',
+                 'Additional_Info', 'Journey_day', 'Journey_month', 'Dep_Time_hour',
+                 'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
+
+EXACT_LIMIT = 2 ** 20  # integer features smaller than this in magnitude get exact sums
+SUM_BLOCK = 2 ** 22    # rows summed per int64 block, so sums of squares cannot overflow
+
+# Exact (sum, sum of squares) of small integers, as Python ints
+def exact_sums(values):
+    total, squares = 0, 0
+    for start in range(0, len(values), SUM_BLOCK):
+        block = values[start:start + SUM_BLOCK]
+        total += int(block.sum())
+        squares += int(np.dot(block, block))
+    return total, squares
+
+# [count, mean, M2, exact sum, exact sum of squares] of one column (exact sums are None for non-integers)
+def column_moments(values):
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    n = len(values)
+    mean = float(values.mean()) if n else 0.0
+    m2 = float(np.square(values - mean).sum()) if n else 0.0
+    total = squares = None
+    if not n or (np.abs(values).max() < EXACT_LIMIT and np.array_equal(values, np.floor(values))):
+        total, squares = exact_sums(values.astype(np.int64))
+    return [n, mean, m2, total, squares]
+
+# Sorted distinct values of a column, as LabelEncoder().fit(values).classes_; categoricals are read
+# off their categories instead of sorting every row. Integer classes are int64 whatever the column's
+# compact dtype, so the saved pipeline does not depend on it.
+def column_classes(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        classes = np.sort(values.cat.remove_unused_categories().cat.categories.to_numpy())
+    else:
+        classes = LabelEncoder().fit(values).classes_
+    return classes.astype(np.int64) if classes.dtype.kind in "iu" else classes
+
+# Combine the moments of two disjoint sets of rows (Chan et al.'s parallel update)
+def merge_moments(a, b):
+    n = a[0] + b[0]
+    if not a[0] or not b[0]:
+        mean, m2 = (a[1], a[2]) if a[0] else (b[1], b[2])
+    else:
+        delta = b[1] - a[1]
+        mean = a[1] + delta * b[0] / n
+        m2 = a[2] + b[2] + delta * delta * a[0] * b[0] / n
+    exact = a[3] is not None and b[3] is not None
+    return [n, mean, m2, a[3] + b[3] if exact else None, a[4] + b[4] if exact else None]
+
+class FeatureStats:
+    """Mergeable statistics a FeaturePipeline is fitted from.
+
+    Holds the categories of each categorical column and the moments of each
+    numerical column. Stats of disjoint chunks of rows ``merge`` into the
+    stats of all of them, so a fit can be split across processes. The
+    vocabularies do not depend on how the rows were split, and neither do
+    the scaler's mean and variance for integer columns (all features here),
+    which are computed exactly from integer sums and rounded once; other
+    columns are merged in floating point.
+    """
+
+    def __init__(self, categories, moments, feature_order):
+        self.categories = categories
+        self.moments = moments
+        self.feature_order = feature_order
+
+    @classmethod
+    def from_frame(cls, df, categorical_cols=CATEGORICAL_COLS, numerical_cols=NUMERICAL_COLS, target=TARGET_COL):
+        categories = {col: column_classes(df[col]) for col in categorical_cols}
+        moments = {col: column_moments(df[col]) for col in numerical_cols}
+        return cls(categories, moments, [col for col in df.columns if col != target])
+
+    def merge(self, other):
+        if other.feature_order != self.feature_order:
+            raise ValueError("Cannot merge stats of chunks with different columns.")
+        categories = {col: LabelEncoder().fit(np.concatenate([values, other.categories[col]])).classes_
+                      for col, values in self.categories.items()}
+        moments = {col: merge_moments(values, other.moments[col]) for col, values in self.moments.items()}
+        return FeatureStats(categories, moments, self.feature_order)
+
+    # A fitted StandardScaler from the merged moments: what StandardScaler().fit would set, with
+    # variances rounded once from exact sums rather than accumulated in floating point
+    def scaler(self):
+        columns = list(self.moments)
+        counts, means, variances = [], [], []
+        for n, mean, m2, total, squares in self.moments.values():
+            if total is not None and n:
+                mean = float(Fraction(total, n))
+                variance = float(Fraction(n * squares - total * total, n * n))
+            else:
+                variance = m2 / n if n else 0.0
+            counts.append(n)
+            means.append(mean)
+            variances.append(variance)
+
+        scaler = StandardScaler()
+        scaler.n_features_in_ = len(columns)
+        if all(isinstance(col, str) for col in columns):
+            scaler.feature_names_in_ = np.asarray(columns, dtype=object)
+        counts = np.asarray(counts, dtype=np.int64)
+        scaler.n_samples_seen_ = counts[0] if len(set(counts.tolist())) == 1 else counts
+        scaler.mean_ = np.asarray(means)
+        scaler.var_ = np.asarray(variances)
+
+        # Near-constant features keep a scale of 1, as in sklearn
+        eps = np.finfo(np.float64).eps
+        constant = scaler.var_ <= counts * eps * scaler.var_ + (counts * scaler.mean_ * eps) ** 2
+        scaler.scale_ = np.where(constant, 1.0, np.sqrt(scaler.var_))
+        return scaler
+
+    def pipeline(self):
+        return FeaturePipeline(self.categories, self.scaler(), self.feature_order, list(self.moments))
+
+class FeaturePipeline:
+    """Fitted feature transforms: category encoding, scaling and feature order.
+
+    Fitted once by feature engineering and saved as one artifact, then used
+    unchanged by training (through the processed dataset) and inference, so
+    every transform is applied exactly once. ``transform`` works on
+    DataFrames, ``transform_array`` returns the model matrix and
+    ``transform_row`` fills a reused vector for a single record without
+    building a DataFrame. ``source`` is the data file it was fitted on,
+    when known; bundles record it as their training data.
+    """
+
+    def __init__(self, classes, scaler, feature_order=FEATURE_ORDER, numerical_cols=NUMERICAL_COLS, source=None):
+        self.classes = {col: np.asarray(values) for col, values in classes.items()}
+        self.encoders = {col: CategoryLookup(values) for col, values in self.classes.items()}
+        self.scaler = scaler
+        self.feature_order = list(feature_order)
+        self.numerical_cols = list(numerical_cols)
+        self.source = source
+
+        # Per-feature plan for the single-row path: (position, column, lookup table, mean, scale)
+        mean = scaler.mean_ if scaler is not None and scaler.mean_ is not None else np.zeros(len(self.numerical_cols))
+        scale = scaler.scale_ if scaler is not None and scaler.scale_ is not None else np.ones(len(self.numerical_cols))
+        offsets = dict(zip(self.numerical_cols, zip(mean.tolist(), scale.tolist())))
+        self.plan = []
+        for i, col in enumerate(self.feature_order):
+            lookup = self.encoders.get(col)
+            center, spread = offsets.get(col, (0.0, 1.0)) if scaler is not None else (0.0, 1.0)
+            self.plan.append((i, col, lookup.table if lookup else None, center, spread))
+        self.categorical_positions = [(i, col) for i, col in enumerate(self.feature_order) if col in self.encoders]
+        self.buffers = threading.local()
+
+    def __reduce__(self):
+        return (FeaturePipeline, (self.classes, self.scaler, self.feature_order, self.numerical_cols, self.source))
+
+    # Merging FeatureStats of chunks of ``df`` (see parallel_features) gives the same fit
+    @classmethod
+    def fit(cls, df, categorical_cols=CATEGORICAL_COLS, numerical_cols=NUMERICAL_COLS, target=TARGET_COL):
+        classes = {col: column_classes(df[col]) for col in categorical_cols}
+        scaler = StandardScaler().fit(df[numerical_cols])
+        feature_order = [col for col in df.columns if col != target]
+        return cls(classes, scaler, feature_order, numerical_cols)
+
+    # Encode and scale a DataFrame (copy), keeping its other columns and column order
+    def transform(self, df):
+        df = df.copy()
+        for col, lookup in self.encoders.items():
+            if col in df:
+                df[col] = lookup.encode_many(df[col])
+        if self.scaler is not None:
+            df[self.numerical_cols] = self.scaler.transform(df[self.numerical_cols])
+        return df
+
+    # Model matrix (float64, feature order) for a DataFrame whose numerical columns are numeric
+    def transform_array(self, df):
+        X = np.empty((len(df), len(self.feature_order)))
+        for i, col, table, center, spread in self.plan:
+            if table is not None:
+                X[:, i] = self.encoders[col].encode_many(df[col])
+            else:
+                X[:, i] = (df[col].to_numpy(dtype=np.float64) - center) / spread
+        return X
+
+    # Number of UNKNOWN_CODE values per categorical column of a transformed matrix
+    def unknown_counts(self, X):
+        return {col: int(np.count_nonzero(X[:, i] == UNKNOWN_CODE)) for i, col in self.categorical_positions}
+
+    # Fill ``out`` (default: this thread's reused (1, n_features) buffer) from one record.
+    # Raises ValueError naming missing or non-numeric fields.
+    def transform_row(self, record, out=None):
+        if out is None:
+            out = getattr(self.buffers, "row", None)
+            if out is None:
+                out = self.buffers.row = np.empty((1, len(self.feature_order)))
+        row = out.reshape(-1)
+        try:
+            for i, col, table, center, spread in self.plan:
+                value = record[col]
+                if value is None:
+                    raise KeyError(col)
+                if table is not None:
+                    row[i] = table.get(value, UNKNOWN_CODE)
+                else:
+                    row[i] = (float(value) - center) / spread
+                    if row[i] != row[i]:  # NaN
+                        raise KeyError(col)
+        except (KeyError, TypeError, ValueError):
+            errors = self.row_errors(record)
+            if errors:
+                raise ValueError(errors) from None
+            # Valid record with an unhashable category value: encode it the slow way
+            for i, col, table, center, spread in self.plan:
+                value = record[col]
+                row[i] = self.encoders[col].encode(value) if table is not None else (float(value) - center) / spread
+        return out
+
+    # Why a record cannot be transformed, in the batch path's wording ("" if it can)
+    def row_errors(self, record):
+        missing, invalid = [], []
+        for col in self.feature_order:
+            value = record.get(col)
+            if value is None or (isinstance(value, float) and value != value):
+                missing.append(col)
+            elif col in self.encoders:
+                continue
+            else:
+                try:
+                    if float(value) != float(value):
+                        missing.append(col)
+                except (TypeError, ValueError):
+                    invalid.append(col)
+        errors = []
+        if missing:
+            errors.append("Missing fields: " + ", ".join(missing))
+        if invalid:
+            errors.append("Invalid numeric value for: " + ", ".join(invalid))
+        return "; ".join(errors)
+
+    # Save the pipeline, plus the per-column encoders and scaler older tooling loads
+    def save(self, encoder_dir=ENCODERS_DIR):
+        os.makedirs(encoder_dir, exist_ok=True)
+        for col, classes in self.classes.items():
+            encoder = LabelEncoder()
+            encoder.classes_ = classes
+            joblib.dump(encoder, os.path.join(encoder_dir, f"{col}_encoder.pkl"))
+        if self.scaler is not None:
+            joblib.dump(self.scaler, os.path.join(encoder_dir, "scaler.pkl"))
+        path = os.path.join(encoder_dir, PIPELINE_FILE)
+        tmp_path = f"{path}.tmp-{os.getpid()}"
+        joblib.dump(self, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+# Load the fitted pipeline; encoders/scaler saved before the pipeline artifact existed are assembled into one
+def load_pipeline(encoder_dir=ENCODERS_DIR, feature_order=FEATURE_ORDER):
+    path = os.path.join(encoder_dir, PIPELINE_FILE)
+    if os.path.exists(path):
+        return joblib.load(path)
+    scaler_path = os.path.join(encoder_dir, "scaler.pkl")
+    scaler = joblib.load(scaler_path) if os.path.exists(scaler_path) else None
+    classes = {col: lookup.classes_ for col, lookup in load_lookups(encoder_dir).items()}
+    return FeaturePipeline(classes, scaler, feature_order)
@@ -0,0 +1,105 @@
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import KFold, ParameterSampler
+
+# Forest hyperparameters searched by successive halving; the tree count is the budget
+PARAM_DISTRIBUTIONS = {
+    'max_depth': [10, 15, 20, None],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4]
+}
+MAX_ESTIMATORS = 300
+
+def tree_budgets(max_estimators=MAX_ESTIMATORS, factor=3, rungs=3):
+    """Tree counts per rung, growing by ``factor`` up to ``max_estimators`` (e.g. 33, 100, 300)."""
+    return [max(1, int(round(max_estimators / factor ** (rungs - 1 - i)))) for i in range(rungs)]
+
+def successive_halving_search(X, y, sample_weight=None, param_distributions=PARAM_DISTRIBUTIONS,
+                              n_candidates=18, max_estimators=MAX_ESTIMATORS, factor=3, rungs=3,
+                              cv=3, tol=0.002, random_state=42, n_jobs=-1, progress=None):
+    """Successive halving over forest hyperparameters with warm-started tree budgets.
+
+    Every candidate starts with a small forest per CV fold. After each rung only
+    the best ``1/factor`` candidates survive, and their fold forests are grown
+    to the next tree budget with ``warm_start``, so trees fitted in earlier
+    rungs are reused instead of refitted. A candidate whose validation MAE
+    improves by less than ``tol`` (relative) when trees are added stops
+    growing and keeps its score. Fold fits use ``sample_weight`` directly, so
+    the winning configuration needs no reweighted refit.
+
+    ``progress``, if given, is called after every fold fit with the counts of
+    candidate evaluations and fold fits done so far and planned.
+
+    Returns the best parameters (including ``n_estimators``) and a per-candidate
+    report with scores per rung, evaluation counts and wall-clock time.
+    """
+    X = np.asarray(X)
+    y = np.asarray(y)
+    folds = list(KFold(n_splits=cv, shuffle=True, random_state=random_state).split(X))
+    budgets = tree_budgets(max_estimators, factor, rungs)
+    candidates = list(ParameterSampler(param_distributions, n_candidates, random_state=random_state))
+    base = RandomForestRegressor(random_state=random_state, n_jobs=n_jobs, warm_start=True)
+
+    report = [{"params": params, "scores": [], "n_estimators": 0, "evaluations": 0,
+               "wall_time": 0.0, "stopped_early": False, "eliminated_at_rung": None}
+              for params in candidates]
+    forests = {}  # (candidate, fold) -> warm-started forest
+    alive = list(range(len(candidates)))
+
+    # Planned work (an upper bound: early-stopped candidates skip their remaining rungs)
+    per_rung = [len(candidates)]
+    for _ in budgets[1:]:
+        per_rung.append(max(1, per_rung[-1] // factor))
+    done = {"candidates_done": 0, "candidates_total": sum(per_rung),
+            "folds_done": 0, "folds_total": sum(per_rung) * cv}
+
+    for rung, n_estimators in enumerate(budgets):
+        for c in alive:
+            entry = report[c]
+            if entry["stopped_early"]:
+                continue
+            start = time.perf_counter()
+            fold_mae = []
+            for f, (train_idx, val_idx) in enumerate(folds):
+                forest = forests.get((c, f))
+                if forest is None:
+                    forest = forests[(c, f)] = clone(base).set_params(**candidates[c])
+                forest.set_params(n_estimators=n_estimators)
+                weights = sample_weight[train_idx] if sample_weight is not None else None
+                forest.fit(X[train_idx], y[train_idx], sample_weight=weights)
+                fold_mae.append(mean_absolute_error(y[val_idx], forest.predict(X[val_idx])))
+                entry["evaluations"] += 1
+                done["folds_done"] += 1
+                if progress:
+                    progress(dict(done, rung=rung))
+            entry["wall_time"] += time.perf_counter() - start
+            done["candidates_done"] += 1
+
+            mae = float(np.mean(fold_mae))
+            previous = entry["scores"][-1]["MAE"] if entry["scores"] else None
+            entry["scores"].append({"rung": rung, "n_estimators": n_estimators, "MAE": mae})
+            entry["n_estimators"] = n_estimators
+            if previous is not None and (previous - mae) < tol * previous:
+                entry["stopped_early"] = True
+
+        if rung == len(budgets) - 1:
+            break
+
+        # Keep the best 1/factor candidates for the next rung
+        ranked = sorted(alive, key=lambda c: report[c]["scores"][-1]["MAE"])
+        survivors = ranked[:max(1, len(ranked) // factor)]
+        for c in ranked[len(survivors):]:
+            report[c]["eliminated_at_rung"] = rung
+            for f in range(cv):
+                forests.pop((c, f), None)
+        alive = survivors
+
+    best = min(alive, key=lambda c: report[c]["scores"][-1]["MAE"])
+    best_params = dict(candidates[best], n_estimators=report[best]["n_estimators"])
+    for entry in report:
+        entry["wall_time"] = round(entry["wall_time"], 3)
+        entry["params"] = {k: (None if v is None else int(v)) for k, v in entry["params"].items()}
+    return best_params, report
@@ -0,0 +1,67 @@
+import os
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_error
+from prediction_log import PredictionLogReader
+
+FEEDBACK_LOG = "data/inference_logs.csv"
+NEW_TREES = 20          # trees added per incremental update
+MIN_FEEDBACK_ROWS = 10  # fewer new labelled rows than this is not worth a new version
+HOLDOUT_FRACTION = 0.2
+
+# Cursor just past the last logged row, stored in bundle metadata so the next update starts there
+def log_position(log_path=FEEDBACK_LOG):
+    if not os.path.exists(log_path):
+        return None
+    offset, row_id = PredictionLogReader(log_path).position()
+    return {"offset": offset, "row_id": row_id}
+
+# Logged rows with a usable Actual_Price added after ``position`` (None: from the start)
+def read_feedback(position=None, log_path=FEEDBACK_LOG):
+    if not os.path.exists(log_path):
+        return pd.DataFrame(), position
+    offset, row_id = (position["offset"], position["row_id"]) if position else (None, 0)
+    log = PredictionLogReader(log_path)
+    rows = []
+    end = position
+    for rid, next_offset, row in log.iter_rows(offset, row_id):
+        end = {"offset": next_offset, "row_id": rid + 1}
+        price = pd.to_numeric(row.get("Actual_Price"), errors="coerce")
+        if pd.notna(price) and price > 0:
+            rows.append(dict(row, Actual_Price=float(price)))
+    return pd.DataFrame(rows), end
+
+# Model features for feedback rows; rows with a missing or non-numeric feature are skipped, as in
+# batch inference. Logged values are CSV text, so categories with integer classes (Total_Stops)
+# are parsed back to numbers before encoding.
+def feedback_features(df, bundle):
+    pipeline = bundle.pipeline
+    features = df.reindex(columns=pipeline.feature_order)
+    numeric = features[pipeline.numerical_cols].apply(pd.to_numeric, errors="coerce")
+    valid = (features.notna().all(axis=1) & numeric.notna().all(axis=1)).to_numpy()
+    features = features[valid].copy()
+    features[pipeline.numerical_cols] = numeric[valid]
+    for col, classes in pipeline.classes.items():
+        if classes.dtype.kind in "iuf" and col in features:
+            features[col] = pd.to_numeric(features[col], errors="coerce")
+    X = pipeline.transform_array(features)
+    y = df["Actual_Price"].to_numpy()[valid]
+    return X, y, int((~valid).sum())
+
+# Deterministic holdout split of the new rows (at least one row on each side)
+def holdout_split(n_rows, fraction=HOLDOUT_FRACTION, random_state=42):
+    order = np.random.RandomState(random_state).permutation(n_rows)
+    n_holdout = min(max(1, int(round(n_rows * fraction))), n_rows - 1)
+    return order[n_holdout:], order[:n_holdout]
+
+# Grow a fitted forest by ``n_new`` trees trained on new data only; existing trees are kept as-is
+def add_trees(model, X, y, n_new=NEW_TREES):
+    if not hasattr(model, "warm_start") or not hasattr(model, "estimators_"):
+        raise ValueError(f"{type(model).__name__} cannot be grown incrementally.")
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_new, n_jobs=-1)
+    model.fit(X, y)
+    model.set_params(warm_start=False, n_jobs=None)
+    return model
+
+def holdout_mae(model, X, y):
+    return float(mean_absolute_error(y, model.predict(X)))
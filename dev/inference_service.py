@@ -1,96 +1,277 @@
 from flask import Flask, request, jsonify
 import pandas as pd
-import joblib
 import numpy as np
-import os
+import time
+from datetime import date, datetime
+from model_bundle import get_bundle
+from fare_index import get_index, HOURS, CALENDAR_YEAR
+from prediction_cache import PredictionCache, itinerary_key
+from metrics import instrument, stage_done, set_model_version, EventLogger, PREDICTIONS, UNKNOWN_CATEGORIES
+
+SERVICE = "inference_service"
 
 app = Flask(__name__)
+instrument(app, SERVICE)
+log = EventLogger(SERVICE)
 
-# Define model and encoders directory
-MODEL_PATH = "models/flight_fare_model.pkl"
-ENCODERS_DIR = "models/encoder/"
-SCALER_PATH = os.path.join(ENCODERS_DIR, "scaler.pkl")
-
-# Load the trained model
-if os.path.exists(MODEL_PATH):
-    model = joblib.load(MODEL_PATH)
-else:
-    model = None
-
-# Load scaler
-if os.path.exists(SCALER_PATH):
-    scaler = joblib.load(SCALER_PATH)
-else:
-    scaler = None
-
-# Load categorical encoders
-def load_encoders():
-    encoders = {}
-    for col in ['Airline', 'Source', 'Destination', 'Route', 'Total_Stops', 'Additional_Info']:
-        encoder_path = os.path.join(ENCODERS_DIR, f"{col}_encoder.pkl")
-        if os.path.exists(encoder_path):
-            encoders[col] = joblib.load(encoder_path)
-    return encoders
-
-encoders = load_encoders()
-
-# Function to preprocess input data
-def preprocess_input(data):
-    try:
-        df = pd.DataFrame([data])  # Convert input JSON to DataFrame
+# Model, encoders, scaler and feature order come from one versioned bundle, loaded lazily
+# on first use (and reloaded when a new bundle is promoted)
+def load_model():
+    return get_bundle()
 
-        # Apply categorical encoding
-        for col, encoder in encoders.items():
-            if col in df:
-                df[col] = df[col].map(lambda x: encoder.transform([x])[0] if x in encoder.classes_ else -1)
+# Predicted prices of recently seen itineraries, for the current model version
+prediction_cache = PredictionCache()
 
-        # Apply scaling
-        numerical_cols = ['Duration', 'Journey_day', 'Journey_month', 'Dep_Time_hour', 
-                          'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
-        
-        if scaler:
-            df[numerical_cols] = scaler.transform(df[numerical_cols])
+def cache_key(record, bundle):
+    key = itinerary_key(record, bundle.feature_order, bundle.numerical_cols)
+    try:
+        hash(key)
+    except TypeError:  # Unhashable input values are never cached
+        return None
+    return key
 
-        return df, None
+# Function to preprocess one input record into the pipeline's reused (1, n_features) buffer
+def preprocess_input(data, bundle):
+    try:
+        return bundle.pipeline.transform_row(data), None
     except Exception as e:
         return None, str(e)
 
+# Convert a batch payload (list of records or columnar dict of lists) to a DataFrame
+def batch_to_frame(data):
+    if isinstance(data, dict):
+        lengths = {len(v) for v in data.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns in a columnar payload must have the same length.")
+        return pd.DataFrame(data)
+    if not all(isinstance(row, dict) for row in data):
+        raise ValueError("Every item in a batch must be a JSON object.")
+    return pd.DataFrame.from_records(data)
+
+# Function to preprocess a batch of inputs; returns the features and per-row errors
+def preprocess_batch(df, bundle):
+    errors = [None] * len(df)
+    features = bundle.feature_order
+    numerical_cols = bundle.numerical_cols
+
+    # Flag rows with missing fields
+    for col in features:
+        if col not in df:
+            df[col] = np.nan
+    missing = df[features].isna()
+    for i in np.flatnonzero(missing.to_numpy().any(axis=1)):
+        errors[i] = "Missing fields: " + ", ".join(missing.columns[missing.iloc[i].to_numpy()])
+
+    # Flag rows with non-numeric values in numerical features
+    numeric = df[numerical_cols].apply(pd.to_numeric, errors='coerce')
+    invalid = numeric.isna() & ~missing[numerical_cols]
+    for i in np.flatnonzero(invalid.to_numpy().any(axis=1)):
+        message = "Invalid numeric value for: " + ", ".join(invalid.columns[invalid.iloc[i].to_numpy()])
+        errors[i] = message if errors[i] is None else errors[i] + "; " + message
+
+    valid = np.array([e is None for e in errors], dtype=bool)
+    X = df.loc[valid, features].copy()
+    X[numerical_cols] = numeric.loc[valid]
+
+    # Encode and scale every column at once, straight into the model matrix
+    return bundle.pipeline.transform_array(X), valid, errors
+
+# Count categorical values the encoders have never seen (encoded as -1)
+def count_unknowns(X, bundle):
+    for col, count in bundle.pipeline.unknown_counts(X).items():
+        if count:
+            UNKNOWN_CATEGORIES.inc(count, service=SERVICE, column=col, model_version=bundle.version)
+
+# Score a batch of itineraries with a single model.predict call
+def predict_batch(input_data, bundle):
+    start = time.perf_counter()
+    df = batch_to_frame(input_data)
+    t = stage_done(SERVICE, "frame", start, bundle.version)
+    X, valid, errors = preprocess_batch(df, bundle)
+    count_unknowns(X, bundle)
+    t = stage_done(SERVICE, "transform", t, bundle.version)
+    prices = np.empty(len(df))
+
+    # Serve repeated itineraries from the cache; only the rest go through the forest
+    valid_rows = np.flatnonzero(valid)
+    keys = [cache_key(record, bundle) for record in df.iloc[valid_rows].to_dict(orient="records")]
+    cached = [prediction_cache.get(bundle.version, key) if key is not None else None for key in keys]
+    miss = np.array([price is None for price in cached], dtype=bool)
+    prices[valid_rows[~miss]] = [price for price in cached if price is not None]
+    t = stage_done(SERVICE, "cache", t, bundle.version)
+
+    if miss.any():
+        predictions = np.round(bundle.predictor.predict(X[miss]), 2)
+        t = stage_done(SERVICE, "predict", t, bundle.version)
+        prices[valid_rows[miss]] = predictions
+        for key, price in zip((k for k, m in zip(keys, miss) if m), predictions):
+            if key is not None:
+                prediction_cache.put(bundle.version, key, float(price))
+    PREDICTIONS.inc(int(miss.sum()), service=SERVICE, mode="batch", cached="false", model_version=bundle.version)
+    PREDICTIONS.inc(int((~miss).sum()), service=SERVICE, mode="batch", cached="true", model_version=bundle.version)
+
+    results = []
+    for i in range(len(df)):
+        if valid[i]:
+            results.append({"index": i, "status": "Success", "predicted_price": round(float(prices[i]), 2)})
+        else:
+            results.append({"index": i, "status": "Error", "message": errors[i]})
+
+    elapsed = time.perf_counter() - start
+    return {
+        "status": "Success",
+        "message": "Batch prediction completed!",
+        "rows": len(df),
+        "failed_rows": int((~valid).sum()),
+        "cache_hits": int((~miss).sum()),
+        "elapsed_seconds": round(elapsed, 6),
+        "rows_per_sec": round(len(df) / elapsed, 2) if elapsed > 0 else None,
+        "model_version": bundle.version,
+        "results": results
+    }
+
+# A batch is a JSON array of itineraries or a columnar object of equal-length lists
+def is_batch(input_data):
+    if isinstance(input_data, list):
+        return True
+    return isinstance(input_data, dict) and len(input_data) > 0 and \
+        all(isinstance(v, list) for v in input_data.values())
+
 # API Endpoint for inference
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
-        if not model:
+        start = time.perf_counter()
+        bundle = load_model()
+        if not bundle:
             return jsonify({"status": "Error", "message": "Model not found. Train the model first!"})
+        version = bundle.version
+        set_model_version(SERVICE, version)
 
         # Get input data
+        t = time.perf_counter()
         input_data = request.json
+        t = stage_done(SERVICE, "parse", t, version)
         if not input_data:
             return jsonify({"status": "Error", "message": "No input data provided!"})
 
-        # Preprocess input
-        processed_input, error = preprocess_input(input_data)
+        # Batch mode
+        if is_batch(input_data):
+            result = predict_batch(input_data, bundle)
+            t = time.perf_counter()
+            response = jsonify(result)
+            stage_done(SERVICE, "serialize", t, version)
+            log.event("batch_prediction", model_version=version, rows=result["rows"],
+                      failed_rows=result["failed_rows"], cache_hits=result["cache_hits"],
+                      latency_ms=round((time.perf_counter() - start) * 1000, 3))
+            return response
+
+        # Hot itineraries are answered without touching the forest
+        key = cache_key(input_data, bundle)
+        cached_price = prediction_cache.get(version, key) if key is not None else None
+        t = stage_done(SERVICE, "cache", t, version)
+        if cached_price is not None:
+            PREDICTIONS.inc(service=SERVICE, mode="single", cached="true", model_version=version)
+            return jsonify({
+                "status": "Success",
+                "message": "Prediction successful!",
+                "predicted_price": cached_price,
+                "model_version": version,
+                "cached": True
+            })
+
+        # Preprocess input: encode, scale and order in one pass into the model's feature vector
+        processed_input, error = preprocess_input(input_data, bundle)
         if error:
+            log.warning("invalid_input", model_version=version, message=error)
             return jsonify({"status": "Error", "message": error})
+        count_unknowns(processed_input, bundle)
+        t = stage_done(SERVICE, "transform", t, version)
 
-        # Debug: Print expected and actual feature orders
-        print("Expected feature order by model:", model.feature_names_in_)
-        print("Processed input feature order:", processed_input.columns.tolist())
+        # Predict
+        prediction = bundle.predictor.predict(processed_input)
+        predicted_price = round(float(prediction[0]), 2)
+        t = stage_done(SERVICE, "predict", t, version)
+        if key is not None:
+            prediction_cache.put(version, key, predicted_price)
+        PREDICTIONS.inc(service=SERVICE, mode="single", cached="false", model_version=version)
 
-        # Reorder input features if necessary
-        expected_order = model.feature_names_in_
-        processed_input = processed_input[expected_order]
+        response = jsonify({
+            "status": "Success",
+            "message": "Prediction successful!",
+            "predicted_price": predicted_price,
+            "model_version": version
+        })
+        stage_done(SERVICE, "serialize", t, version)
+        log.event("prediction", model_version=version, predicted_price=predicted_price,
+                  latency_ms=round((time.perf_counter() - start) * 1000, 3))
+        return response
 
-        # Predict
-        prediction = model.predict(processed_input)
-        predicted_price = round(prediction[0], 2)
+    except Exception as e:
+        log.error("prediction_failed", message=str(e))
+        return jsonify({"status": "Error", "message": str(e)})
+
+# Prediction cache counters
+@app.route("/cache_stats", methods=["GET"])
+def cache_stats():
+    return jsonify({"status": "Success", "cache": prediction_cache.stats()})
+
+# Dates are accepted as 2019-05-01 or, like Date_of_Journey, 01/05/2019
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y")
+
+def parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Invalid date {value!r}; expected YYYY-MM-DD or DD/MM/YYYY")
+
+# Per-day cheapest and mean predicted price between two dates, from the current model's fare index
+# (or the previous model's while the current one is being built: see index_pending)
+@app.route("/fare_trends", methods=["GET"])
+def fare_trends():
+    try:
+        t = time.perf_counter()
+        bundle = load_model()
+        if not bundle:
+            return jsonify({"status": "Error", "message": "Model not found. Train the model first!"})
+        index = get_index(bundle)
+        if index is None:
+            return jsonify({"status": "Error", "message": f"No fare index for model version {bundle.version} yet. "
+                                                          "It is built after promotion, or with: python dev/fare_index.py"})
+        version = index.version
+
+        args = request.args
+        source, destination = args.get("source"), args.get("destination")
+        if not source or not destination:
+            return jsonify({"status": "Error", "message": "Missing source or destination."})
+        date_from = parse_date(args["date_from"]) if args.get("date_from") else date(CALENDAR_YEAR, 1, 1)
+        date_to = parse_date(args["date_to"]) if args.get("date_to") else date(date_from.year, 12, 31)
+        if date_from.year != date_to.year or date_from > date_to:
+            return jsonify({"status": "Error", "message": "date_from must not be after date_to, within one year."})
+        stops = args.get("stops", type=int)
+        hours = (args.get("dep_hour_from", 0, type=int), args.get("dep_hour_to", HOURS - 1, type=int))
+        if not 0 <= hours[0] <= hours[1] < HOURS:
+            return jsonify({"status": "Error", "message": f"Departure hours must be within 0-{HOURS - 1}."})
+
+        days = index.trends(source, destination, (date_from.month, date_from.day), (date_to.month, date_to.day),
+                            airline=args.get("airline"), stops=stops, hours=hours)
+        for day in days:
+            day["date"] = f"{date_from.year}-{day.pop('month'):02d}-{day.pop('day'):02d}"
+        stage_done(SERVICE, "lookup", t, bundle.version)
 
         return jsonify({
             "status": "Success",
-            "message": "Prediction successful!",
-            "predicted_price": predicted_price
+            "message": f"{len(days)} days found." if days else "No indexed fares match the query.",
+            "model_version": version,
+            "index_pending": version != bundle.version,
+            "indexed_months": index.manifest["months"],
+            "days": days
         })
 
     except Exception as e:
+        log.error("fare_trends_failed", message=str(e))
         return jsonify({"status": "Error", "message": str(e)})
 
 if __name__ == "__main__":
@@ -0,0 +1,358 @@
+"""Streaming bulk ingest of fare records, on an asyncio HTTP server.
+
+    python dev/ingest_service.py --port 5008
+
+``POST /ingest`` takes raw fare records (the columns of
+``data/collected_airfare_data.csv``) as NDJSON, one JSON object per line,
+or as CSV with a header line (``Content-Type: text/csv`` or
+``?format=csv``). The body may be sent with ``Transfer-Encoding: chunked``
+and of any length. It is read as it arrives and cut into micro-batches of
+``BATCH_RECORDS`` lines. The batches pass through a bounded queue to one
+processing thread, which for each batch:
+
+1. parses it and checks every record (``preprocessing.validate_chunk``);
+2. preprocesses the valid records with ``transform_chunk``, as
+   ``preprocess_data`` does;
+3. writes the raw and the preprocessed rows to the fare store
+   (``data/database.py``) in one transaction.
+
+Rejected records are counted and the first ``MAX_ERRORS`` are reported with
+their line number and reason. When ``QUEUE_BATCHES`` batches are waiting,
+the handlers stop reading their sockets until the queue drains. TCP flow
+control then slows the producers down, so memory stays bounded however fast
+the data arrives. The response is sent once all of the request's batches
+are written. ``GET /ingest/stats`` and ``GET /metrics`` report progress.
+
+Run from the project root (the fare store path is relative to it, like the
+other services).
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+import pandas as pd
+
+# Add project root directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from data.database import AIRFARE_COLUMNS, bulk_insert_ingested
+from metrics import CONTENT_TYPE, HTTP_LATENCY, HTTP_REQUESTS, Counter, Gauge, EventLogger, render, stage_done
+from preprocessing import transform_chunk, validate_chunk
+
+SERVICE = "ingest_service"
+DEFAULT_PORT = 5008
+BATCH_RECORDS = int(os.environ.get("INGEST_BATCH_RECORDS", 5000))  # records per micro-batch
+QUEUE_BATCHES = int(os.environ.get("INGEST_QUEUE_BATCHES", 4))     # batches waiting before readers pause
+READ_BYTES = 256 * 1024
+MAX_ERRORS = 20         # rejected records reported per request
+MAX_HEADER_LINES = 100
+
+INGESTED = Counter("ingest_records_total", "Records received by the ingest service, by outcome.", ("outcome",))
+QUEUE_DEPTH = Gauge("ingest_queue_batches", "Micro-batches waiting to be processed.")
+
+log = EventLogger(SERVICE)
+
+class BadRequest(Exception):
+    pass
+
+# Raw-schema DataFrame of parsed JSON records (other keys are ignored)
+def records_frame(records, index=None):
+    return pd.DataFrame({col: [record.get(col) for record in records] for col in AIRFARE_COLUMNS}, index=index)
+
+# Parse one micro-batch of body lines into a DataFrame of raw records (all as sent) and parse errors
+def parse_batch(lines, fmt, header):
+    errors = []
+    if fmt == "csv":
+        columns = next(csv.reader([header.decode("utf-8")]))
+        rows, positions = [], []
+        for i, row in enumerate(csv.reader(io.StringIO(b"\n".join(lines).decode("utf-8", "replace")))):
+            if len(row) != len(columns):
+                errors.append((i, f"Expected {len(columns)} fields, got {len(row)}"))
+                continue
+            rows.append(row)
+            positions.append(i)
+        return pd.DataFrame(rows, columns=columns, index=positions).reindex(columns=AIRFARE_COLUMNS), errors
+
+    try:  # one parse for the whole batch; line by line only to find the bad lines
+        records = json.loads(b"[" + b",".join(lines) + b"]")
+        if all(isinstance(record, dict) for record in records):
+            return records_frame(records), errors
+    except ValueError:
+        pass
+    records, positions = [], []
+    for i, line in enumerate(lines):
+        try:
+            record = json.loads(line)
+        except ValueError:
+            errors.append((i, "Invalid JSON"))
+            continue
+        if not isinstance(record, dict):
+            errors.append((i, "Expected a JSON object"))
+            continue
+        records.append(record)
+        positions.append(i)
+    return records_frame(records, positions), errors
+
+# Parse, validate, preprocess and store one micro-batch (runs on the processing thread)
+def process_batch(lines, fmt, header):
+    t = time.perf_counter()
+    df, errors = parse_batch(lines, fmt, header)
+    t = stage_done(SERVICE, "parse", t)
+
+    valid, messages = validate_chunk(df)
+    errors.extend((i, message) for i, message, ok in zip(df.index, messages, valid) if not ok)
+    records = df[valid].reset_index(drop=True)
+    records["Price"] = pd.to_numeric(records["Price"])
+    t = stage_done(SERVICE, "validate", t)
+
+    written = 0
+    if len(records):
+        preprocessed = transform_chunk(records.copy())
+        t = stage_done(SERVICE, "transform", t)
+        written = bulk_insert_ingested(records, preprocessed)
+        stage_done(SERVICE, "write", t)
+
+    errors.sort()
+    INGESTED.inc(written, outcome="accepted")
+    INGESTED.inc(len(errors), outcome="rejected")
+    return written, len(errors), errors[:MAX_ERRORS]
+
+class Ingestor:
+    """Bounded queue of micro-batches in front of a single processing thread.
+
+    One thread keeps writes to the fare store sequential (SQLite has one
+    writer) and leaves the event loop free to read sockets.
+    """
+
+    def __init__(self, queue_batches=QUEUE_BATCHES):
+        self.queue = asyncio.Queue(maxsize=queue_batches)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest")
+        self.totals = {"requests": 0, "received": 0, "accepted": 0, "rejected": 0, "batches": 0, "queue_full_waits": 0}
+        self.started = time.time()
+        self.worker = None
+
+    def start(self):
+        self.worker = asyncio.get_running_loop().create_task(self.work())
+
+    async def work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lines, fmt, header, future = await self.queue.get()
+            QUEUE_DEPTH.set(self.queue.qsize())
+            try:
+                result = await loop.run_in_executor(self.executor, process_batch, lines, fmt, header)
+            except Exception as e:
+                result = e
+            if not future.cancelled():
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+            self.queue.task_done()
+
+    # Queue a batch; waits (and so stops reading the request body) while the queue is full
+    async def submit(self, lines, fmt, header):
+        future = asyncio.get_running_loop().create_future()
+        if self.queue.full():
+            self.totals["queue_full_waits"] += 1
+        await self.queue.put((lines, fmt, header, future))
+        QUEUE_DEPTH.set(self.queue.qsize())
+        self.totals["batches"] += 1
+        return future
+
+    async def ingest(self, body, fmt):
+        start = time.perf_counter()
+        header, batch, pending, received = None, [], [], 0
+        async for lines in iter_lines(body):
+            if fmt == "csv" and header is None and lines:
+                header, lines = lines[0], lines[1:]
+            batch.extend(line for line in lines if line.strip())
+            while len(batch) >= BATCH_RECORDS:
+                pending.append((received, await self.submit(batch[:BATCH_RECORDS], fmt, header)))
+                received += BATCH_RECORDS
+                batch = batch[BATCH_RECORDS:]
+        if batch:
+            pending.append((received, await self.submit(batch, fmt, header)))
+            received += len(batch)
+
+        accepted, rejected, errors, failure = 0, 0, [], None
+        for offset, future in pending:
+            try:
+                written, failed, batch_errors = await future
+            except Exception as e:  # keep waiting for the other batches before answering
+                failure = failure or e
+                continue
+            accepted += written
+            rejected += failed
+            errors.extend({"record": offset + i + 1, "message": message} for i, message in batch_errors)
+        seconds = time.perf_counter() - start
+
+        self.totals["requests"] += 1
+        self.totals["received"] += received
+        self.totals["accepted"] += accepted
+        self.totals["rejected"] += rejected
+        result = {
+            "received": received,
+            "accepted": accepted,
+            "rejected": rejected,
+            "errors": errors[:MAX_ERRORS],
+            "seconds": round(seconds, 4),
+            "records_per_sec": round(received / seconds, 1) if seconds else None,
+        }
+        if failure is not None:
+            log.error("ingest_failed", error=str(failure), received=received, accepted=accepted)
+            return dict(result, status="Error", message=f"Failed to store records: {failure}")
+        log.event("ingest", **{key: result[key] for key in ("received", "accepted", "rejected", "seconds")})
+        return dict(result, status="Success", message="Records ingested successfully!")
+
+    def stats(self):
+        return dict(self.totals, queue_batches=self.queue.qsize(), queue_capacity=self.queue.maxsize,
+                    batch_records=BATCH_RECORDS, uptime_seconds=round(time.time() - self.started, 1))
+
+# Split a stream of byte blocks into lists of complete lines
+async def iter_lines(blocks):
+    rest = b""
+    async for block in blocks:
+        lines = (rest + block).split(b"\n")
+        rest = lines.pop()
+        yield [line.rstrip(b"\r") for line in lines]
+    if rest.strip():
+        yield [rest.rstrip(b"\r")]
+
+# Request body as it arrives, either chunked or Content-Length delimited
+async def iter_body(reader, headers):
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";")[0].strip(), 16)
+            except ValueError:
+                raise BadRequest("Malformed chunked body")
+            if size == 0:
+                while (await reader.readline()).strip():  # trailers
+                    pass
+                return
+            yield await reader.readexactly(size)
+            await reader.readexactly(2)
+    else:
+        remaining = int(headers.get("content-length") or 0)
+        while remaining > 0:
+            block = await reader.read(min(remaining, READ_BYTES))
+            if not block:
+                raise BadRequest("Request body ended early")
+            remaining -= len(block)
+            yield block
+
+async def drain_body(reader, headers):
+    async for _ in iter_body(reader, headers):
+        pass
+
+async def read_request_head(reader):
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise BadRequest("Malformed request line")
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if not line.strip():
+            return method.upper(), target, headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    raise BadRequest("Too many headers")
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+async def respond(writer, status, body, keep_alive=True, content_type="application/json"):
+    payload = body.encode("utf-8") if isinstance(body, str) else json.dumps(body).encode("utf-8")
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: {content_type}\r\n"
+            f"Content-Length: {len(payload)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    writer.write(head.encode("latin-1") + payload)
+    await writer.drain()
+
+def request_format(headers, query):
+    fmt = query.get("format", [""])[0].lower()
+    if fmt:
+        if fmt not in ("csv", "ndjson"):
+            raise BadRequest(f"Unsupported format: {fmt}")
+        return fmt
+    return "csv" if "csv" in headers.get("content-type", "").lower() else "ndjson"
+
+def create_handler(ingestor):
+    async def handle(reader, writer):
+        try:
+            while True:
+                try:
+                    head = await read_request_head(reader)
+                except BadRequest as e:
+                    await respond(writer, 400, {"status": "Error", "message": str(e)}, keep_alive=False)
+                    return
+                if head is None:
+                    return
+                method, target, headers = head
+                url = urlsplit(target)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                start = time.perf_counter()
+
+                try:
+                    if url.path == "/ingest" and method == "POST":
+                        fmt = request_format(headers, parse_qs(url.query))
+                        result = await ingestor.ingest(iter_body(reader, headers), fmt)
+                        status, body = (200 if result["status"] == "Success" else 500), result
+                    else:
+                        await drain_body(reader, headers)
+                        if url.path == "/ingest/stats" and method == "GET":
+                            status, body = 200, ingestor.stats()
+                        elif url.path == "/metrics" and method == "GET":
+                            await respond(writer, 200, render(), keep_alive, CONTENT_TYPE)
+                            continue
+                        elif url.path in ("/ingest", "/ingest/stats", "/metrics"):
+                            status, body = 405, {"status": "Error", "message": f"{method} not allowed on {url.path}"}
+                        else:
+                            status, body = 404, {"status": "Error", "message": f"Not found: {url.path}"}
+                except (BadRequest, ValueError, UnicodeDecodeError) as e:
+                    # Batches queued before the error are still written. The rest of the body is
+                    # unread, so the connection cannot be reused
+                    status, body, keep_alive = 400, {"status": "Error", "message": str(e)}, False
+
+                endpoint = url.path if status != 404 else "unmatched"
+                HTTP_REQUESTS.inc(service=SERVICE, endpoint=endpoint, method=method, status=status)
+                HTTP_LATENCY.observe(time.perf_counter() - start, service=SERVICE, endpoint=endpoint)
+                await respond(writer, status, body, keep_alive)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass  # client went away
+        finally:
+            writer.close()
+    return handle
+
+async def serve(host="127.0.0.1", port=DEFAULT_PORT):
+    ingestor = Ingestor()
+    ingestor.start()
+    server = await asyncio.start_server(create_handler(ingestor), host, port, limit=READ_BYTES)
+    print(f"✅ Ingest service listening on http://{host}:{port}/ingest")
+    async with server:
+        await server.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""In-process metrics in the Prometheus text format, and structured sampled logging.
+
+Every service calls ``instrument(app, "<service>")``, which counts and times
+each request by endpoint and adds ``GET /metrics``. Services record their
+own stages with ``STAGE_LATENCY``. Metrics live in the process that
+recorded them: under ``serve.py`` each worker exposes its own counters.
+"""
+import bisect
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from flask import Response, g, request
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+LOG_SAMPLE_RATE = float(os.environ.get("LOG_SAMPLE_RATE", 0.01))  # share of routine events logged
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in pairs) + "}"
+
+def format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self.lock:
+            items = sorted(self.values.items())
+        for key, value in items:
+            lines.extend(self.samples(key, value))
+        return lines
+
+    def samples(self, key, value):
+        return [f"{self.name}{format_labels(self.labelnames, key)} {format_number(value)}"]
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            self.values[key] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with self.lock:
+            state = self.values.get(key)
+            if state is None:
+                state = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def samples(self, key, state):
+        counts, total, count = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            labels = format_labels(self.labelnames, key, [("le", format_number(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {format_number(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+REGISTRY = []
+
+def render():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# Shared metrics
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests handled.",
+                        ("service", "endpoint", "method", "status"))
+HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency.",
+                         ("service", "endpoint"))
+STAGE_LATENCY = Histogram("stage_duration_seconds", "Latency of one processing stage of a request.",
+                          ("service", "stage", "model_version"))
+PREDICTIONS = Counter("predictions_total", "Itineraries scored.",
+                      ("service", "mode", "cached", "model_version"))
+UNKNOWN_CATEGORIES = Counter("unknown_categories_total",
+                             "Categorical values not seen in training (encoded as -1).",
+                             ("service", "column", "model_version"))
+MODEL_INFO = Gauge("model_info", "Model version currently served (value is always 1).",
+                   ("service", "model_version"))
+
+# Observe the time since `start` for a stage and return the new start time
+def stage_done(service, stage, start, model_version=""):
+    now = time.perf_counter()
+    STAGE_LATENCY.observe(now - start, service=service, stage=stage, model_version=model_version)
+    return now
+
+def set_model_version(service, model_version):
+    if (service, str(model_version)) not in MODEL_INFO.values:
+        with MODEL_INFO.lock:
+            for key in [key for key in MODEL_INFO.values if key[0] == service]:
+                del MODEL_INFO.values[key]
+        MODEL_INFO.set(1, service=service, model_version=model_version)
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        event = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname.lower(),
+            "service": record.name,
+            "event": record.getMessage(),
+        }
+        event.update(getattr(record, "fields", {}))
+        return json.dumps(event, default=str)
+
+class EventLogger:
+    """One-line JSON event logs. Routine events are sampled at ``sample_rate``; warnings and errors are always written."""
+
+    def __init__(self, service, sample_rate=LOG_SAMPLE_RATE):
+        self.logger = logging.getLogger(service)
+        if not self.logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(JsonFormatter())
+            self.logger.addHandler(handler)
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+        self.sample_rate = sample_rate
+
+    def event(self, name, **fields):
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        self.logger.info(name, extra={"fields": fields})
+
+    def warning(self, name, **fields):
+        self.logger.warning(name, extra={"fields": fields})
+
+    def error(self, name, **fields):
+        self.logger.error(name, extra={"fields": fields})
+
+# Request counting/timing for every route of a service, plus GET /metrics (once per app:
+# instrumenting an app again would count each request twice)
+def instrument(app, service):
+    if "metrics" in app.extensions:
+        return app
+    app.extensions["metrics"] = service
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop("metrics_start", None)
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        if endpoint != "/metrics":
+            HTTP_REQUESTS.inc(service=service, endpoint=endpoint, method=request.method, status=response.status_code)
+            if start is not None:
+                HTTP_LATENCY.observe(time.perf_counter() - start, service=service, endpoint=endpoint)
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        return Response(render(), content_type=CONTENT_TYPE)
+
+    return app
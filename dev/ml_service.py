@@ -1,11 +1,117 @@
-from flask import Flask, jsonify
+import importlib
+import os
+import time
+from flask import Flask, request, jsonify
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+from werkzeug.serving import run_simple
+from metrics import instrument
 
-app = Flask(__name__)
+# Stage services the gateway can host in its own process, each mounted under /<name>
+# (e.g. POST /inference/predict). Any of them can still run on its own port instead.
+HOSTED_SERVICES = {
+    "preprocessing": "preprocessing",
+    "feature_engineering": "feature_engineering",
+    "training": "training_services",
+    "inference": "inference_service",
+    "monitoring": "monitoring_service",
+}
 
-@app.route('/service', methods=['GET'])
+gateway = Flask(__name__)
+instrument(gateway, "ml_service")
+
+@gateway.route('/service', methods=['GET'])
 def service():
-    return jsonify({'status': 'ML service is running successfully!'}), 200
+    return jsonify({'status': 'ML service is running successfully!',
+                    'services': gateway.config.get("HOSTED_SERVICES", [])}), 200
+
+# Preprocess -> feature engineering -> train in this process, handing DataFrames and arrays
+# from stage to stage. The promoted bundle carries its own pipeline; the intermediate CSVs and
+# models/encoder/ are only written with persist=True, so without it the files the standalone
+# stages and pipeline_runner read stay consistent with each other.
+def run_in_memory(file_name, train_options=None, persist=False, log=print):
+    from dev_run_v0 import load_data
+    from preprocessing import transform_chunk, PROCESSED_FILE_PATH as PREPROCESSED_FILE_PATH
+    from feature_engineering import CATEGORICAL_COLS, NUMERICAL_COLS, ENCODERS_DIR, PROCESSED_FILE_PATH
+    from feature_pipeline import FeaturePipeline, TARGET_COL
+    from fare_schema import csv_frame
+    from training_services import run_training
+
+    timings = {}
+    start = time.perf_counter()
+
+    df = load_data(file_name)
+    if df is None or df.empty:
+        raise ValueError("Failed to load data or empty file.")
+    df = transform_chunk(df)
+    if persist:
+        csv_frame(df).to_csv(PREPROCESSED_FILE_PATH, index=False)
+    timings["preprocess"] = time.perf_counter() - start
+
+    # Fit the pipeline and build the model matrix directly (what training would read back from CSV)
+    t = time.perf_counter()
+    pipeline = FeaturePipeline.fit(df, CATEGORICAL_COLS, NUMERICAL_COLS)
+    pipeline.source = PREPROCESSED_FILE_PATH if persist else os.path.join("data", file_name)  # raw: see fare_index
+    X = pipeline.transform_array(df[pipeline.feature_order])
+    y = df[TARGET_COL].to_numpy()
+    if persist:
+        pipeline.save(ENCODERS_DIR)  # inference loads it from the model bundle, older tooling from here
+        csv_frame(pipeline.transform(df)).to_csv(PROCESSED_FILE_PATH, index=False)
+    timings["feature_engineering"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    result = run_training(train_options or {}, log=log, data=(pipeline, X, y))
+    timings["train"] = time.perf_counter() - t
+    timings["total"] = time.perf_counter() - start
+
+    return {
+        "rows": len(df),
+        "bundle": result["bundle"],
+        "MAE": result["MAE"],
+        "R2_Score": result["R2_Score"],
+        "timings": {stage: round(seconds, 4) for stage, seconds in timings.items()},
+    }
+
+@gateway.route('/pipeline/run', methods=['POST'])
+def pipeline_run():
+    try:
+        data = request.get_json(silent=True) or {}
+        file_name = data.get("file_name")
+        if not file_name:
+            return jsonify({"status": "Error", "message": "Missing file_name in request."})
+
+        result = run_in_memory(file_name, data.get("train"), bool(data.get("persist")))
+        return jsonify(dict(result, status="Success", message="Pipeline completed successfully!"))
+
+    except Exception as e:
+        return jsonify({"status": "Error", "message": str(e)})
+
+# The gateway plus the selected stage services (default: all; GATEWAY_SERVICES=inference,monitoring).
+# All of them are safe under serve.py's prefork workers: monitoring's prediction log restarts its
+# flusher in each worker and is flushed by shutdown() before the worker exits.
+def create_app(services=None):
+    if services is None:
+        services = [s for s in os.environ.get("GATEWAY_SERVICES", ",".join(HOSTED_SERVICES)).split(",") if s]
+    unknown = [name for name in services if name not in HOSTED_SERVICES]
+    if unknown:
+        raise ValueError(f"Unknown services: {unknown}")
+    gateway.config["HOSTED_SERVICES"] = list(services)
+    mounts = {f"/{name}": importlib.import_module(HOSTED_SERVICES[name]).app for name in services}
+    return DispatcherMiddleware(gateway, mounts)
+
+# Preload the model before serve.py forks workers (when inference is hosted)
+def preload():
+    if "inference" in gateway.config["HOSTED_SERVICES"]:
+        importlib.import_module("inference_service").load_model()
+
+# Flush the hosted services' per-process state before a serve.py worker exits
+def shutdown():
+    for name in gateway.config["HOSTED_SERVICES"]:
+        hook = getattr(importlib.import_module(HOSTED_SERVICES[name]), "shutdown", None)
+        if hook:
+            hook()
+
+app = create_app()
 
 if __name__ == '__main__':
     print("Starting ML Service Manager...")
-    app.run(port=5000, debug=True)  # Use port 5000 as a gateway
+    run_simple("127.0.0.1", 5000, app, use_reloader=True, use_debugger=True, threaded=True)  # Use port 5000 as a gateway
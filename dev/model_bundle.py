@@ -0,0 +1,144 @@
+import copy
+import os
+import threading
+import time
+import uuid
+import joblib
+import sklearn
+from category_encoding import ENCODERS_DIR
+from feature_pipeline import FeaturePipeline, load_pipeline, NUMERICAL_COLS
+from compiled_forest import CompiledForest
+from compact_forest import CompactForest
+
+BUNDLE_DIR = "models/bundles/"
+LEGACY_MODEL_PATH = "models/flight_fare_model.pkl"
+BUNDLE_FORMAT = 2
+PREDICTORS = ("sklearn", "compiled")
+
+# Object whose predict() serves requests: the model, or its compiled form when the service was
+# started with PREDICTOR=compiled. Requests are scored with arrays in pipeline.feature_order, so a
+# model fitted with column names is served through a shallow copy (sharing its trees) without them,
+# which keeps sklearn from re-validating the names on every predict call. The model itself keeps
+# them for training code that reuses it.
+def make_predictor(model, kind=None):
+    kind = kind or os.environ.get("PREDICTOR", "sklearn")
+    if kind not in PREDICTORS:
+        raise ValueError(f"Unknown predictor {kind!r}; expected one of {PREDICTORS}")
+    if kind == "compiled" and not isinstance(model, CompactForest):  # compact forests are already array-based
+        try:
+            return CompiledForest(model)
+        except TypeError as e:
+            print(f"❌ {e} Using the sklearn predictor.")
+    if hasattr(model, "feature_names_in_"):
+        model = copy.copy(model)
+        del model.feature_names_in_
+    return model
+
+class InferenceBundle:
+    """Everything inference needs, loaded from one versioned artifact.
+
+    ``pipeline`` is the fitted FeaturePipeline (encoders, scaler and the
+    feature order the model was fitted on) and ``metadata`` holds the
+    version, creation time, library versions and training metrics.
+    Serving code calls ``predictor.predict``, which is either ``model`` or
+    its CompiledForest.
+    """
+
+    def __init__(self, model, pipeline, metadata, path=None):
+        self.model = model
+        self.predictor = make_predictor(model)
+        self.pipeline = pipeline
+        self.encoders = pipeline.encoders
+        self.scaler = pipeline.scaler
+        self.feature_order = pipeline.feature_order
+        self.numerical_cols = pipeline.numerical_cols
+        self.metadata = metadata
+        self.version = metadata["version"]
+        self.path = path
+
+def new_version():
+    return time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:6]
+
+# Write a bundle (uncompressed, so it can be memory-mapped) and optionally make it current
+def save_bundle(model, pipeline, metadata=None, bundle_dir=BUNDLE_DIR, promote=True):
+    metadata = dict(metadata or {})
+    metadata.setdefault("version", new_version())
+    metadata.setdefault("created_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()))
+    metadata.setdefault("sklearn_version", sklearn.__version__)
+    metadata.setdefault("numerical_cols", pipeline.numerical_cols)
+    metadata["format"] = BUNDLE_FORMAT
+
+    payload = {
+        "model": model,
+        "pipeline": pipeline,
+        "metadata": metadata,
+    }
+
+    os.makedirs(bundle_dir, exist_ok=True)
+    path = os.path.join(bundle_dir, f"{metadata['version']}.joblib")
+    tmp_path = path + ".tmp"
+    joblib.dump(payload, tmp_path)
+    os.replace(tmp_path, path)
+
+    if promote:
+        promote_bundle(path, bundle_dir)
+    return path
+
+# Atomically point CURRENT at a bundle file, then start building its fare index (see fare_index);
+# /fare_trends serves the previous index until it is done
+def promote_bundle(path, bundle_dir=BUNDLE_DIR):
+    from fare_index import build_in_background  # fare_index loads bundles through this module
+
+    pointer = os.path.join(bundle_dir, "CURRENT")
+    tmp_pointer = f"{pointer}.tmp-{os.getpid()}"
+    with open(tmp_pointer, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(path))
+    os.replace(tmp_pointer, pointer)
+    build_in_background(path)
+
+def current_bundle_path(bundle_dir=BUNDLE_DIR):
+    pointer = os.path.join(bundle_dir, "CURRENT")
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, encoding="utf-8") as f:
+        return os.path.join(bundle_dir, f.read().strip())
+
+def load_bundle(path, mmap_mode="r"):
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    pipeline = payload.get("pipeline")
+    if pipeline is None:  # format 1: encoder classes, scaler and feature order stored separately
+        metadata = payload["metadata"]
+        pipeline = FeaturePipeline(payload["encoders"], payload["scaler"], payload["feature_order"],
+                                   metadata.get("numerical_cols", NUMERICAL_COLS))
+    return InferenceBundle(payload["model"], pipeline, payload["metadata"], path)
+
+# Fallback for trees trained before bundles existed: same files the services used to load
+def load_legacy_bundle(model_path=LEGACY_MODEL_PATH, encoders_dir=ENCODERS_DIR):
+    if not os.path.exists(model_path):
+        return None
+    model = joblib.load(model_path)
+    pipeline = load_pipeline(encoders_dir)
+    if hasattr(model, "feature_names_in_"):
+        pipeline = FeaturePipeline(pipeline.classes, pipeline.scaler, model.feature_names_in_, pipeline.numerical_cols)
+    metadata = {"version": f"legacy-{os.stat(model_path).st_mtime_ns}", "source": model_path}
+    return InferenceBundle(model, pipeline, metadata, model_path)
+
+_lock = threading.Lock()
+_loaded = {"key": None, "bundle": None}
+
+# Lazily load the current bundle, reloading only when a different one is promoted
+def get_bundle(bundle_dir=BUNDLE_DIR):
+    path = current_bundle_path(bundle_dir)
+    if path is not None:
+        key = path
+    elif os.path.exists(LEGACY_MODEL_PATH):
+        key = ("legacy", os.stat(LEGACY_MODEL_PATH).st_mtime_ns)
+    else:
+        return None
+
+    if _loaded["key"] != key:
+        with _lock:
+            if _loaded["key"] != key:
+                _loaded["bundle"] = load_bundle(path) if path is not None else load_legacy_bundle()
+                _loaded["key"] = key
+    return _loaded["bundle"]
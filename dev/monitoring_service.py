@@ -1,20 +1,96 @@
-from flask import Flask, request, jsonify
-import pandas as pd
+from flask import Flask, request, jsonify, Response, stream_with_context
+import csv
+import io
+import json
 import os
+from prediction_log import PredictionLog, FeedbackStore, parse_value
+from drift_monitor import DriftMonitor
+from metrics import instrument
 
 app = Flask(__name__)
+instrument(app, "monitoring_service")
 
 # Define file to store logs
 LOG_FILE = "data/inference_logs.csv"
+FEEDBACK_DB = "data/feedback.db"
 os.makedirs("data", exist_ok=True)
 
-# Ensure log file exists
-if not os.path.exists(LOG_FILE):
-    pd.DataFrame(columns=["Airline", "Source", "Destination", "Route", "Duration", "Total_Stops",
-                          "Additional_Info", "Journey_day", "Journey_month", "Dep_Time_hour", 
-                          "Dep_Time_minute", "Arrival_Time_hour", "Arrival_Time_minute", 
-                          "Predicted_Price", "Actual_Price", "User_Feedback"]
-                 ).to_csv(LOG_FILE, index=False)
+# Append-only prediction log (creates the file if missing) and keyed feedback store
+prediction_log = PredictionLog(LOG_FILE)
+feedback_store = FeedbackStore(FEEDBACK_DB)
+
+# Rolling error and drift statistics over the prediction log, shared by every process writing it.
+# The reference and the replay of the existing log are built at startup, not in a request.
+drift_monitor = DriftMonitor()
+drift_monitor.refresh_reference()
+drift_monitor.sync(prediction_log)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 1000
+
+# Cursors are opaque "<byte offset>-<row id>" strings pointing at the next row to read
+def encode_cursor(offset, row_id):
+    return f"{offset}-{row_id}"
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None, 0
+    try:
+        offset, row_id = (int(part) for part in cursor.split("-"))
+    except ValueError:
+        raise ValueError("Invalid cursor!")
+    return offset, row_id
+
+# Build a row predicate from the airline/source/destination and since/until (Logged_At) filters.
+# Rows logged before Logged_At existed have no timestamp and never match a since/until filter.
+def build_filter(args):
+    exact = {col: args[key] for key, col in
+             [("airline", "Airline"), ("source", "Source"), ("destination", "Destination")] if args.get(key)}
+    since, until = args.get("since"), args.get("until")
+
+    def matches(row):
+        if any(row.get(col) != value for col, value in exact.items()):
+            return False
+        logged_at = row.get("Logged_At") or ""
+        if since and (not logged_at or logged_at < since):
+            return False
+        if until and (not logged_at or logged_at >= until):
+            return False
+        return True
+
+    return matches
+
+# Yield filtered, projected rows with feedback applied, reading the log in bounded batches
+def iter_logs(offset, row_id, matches, fields, limit=None):
+    batch = []
+
+    def flush_batch():
+        feedback = feedback_store.get_many(batch[0][0], batch[-1][0] + 1)
+        for rid, next_offset, row in batch:
+            if rid in feedback:
+                row["User_Feedback"] = feedback[rid]
+            record = {"id": rid}
+            record.update((col, parse_value(row.get(col, ""))) for col in fields or row.keys())
+            yield next_offset, rid + 1, record
+
+    returned = 0
+    for rid, next_offset, row in prediction_log.iter_rows(offset, row_id):
+        if not matches(row):
+            continue
+        batch.append((rid, next_offset, row))
+        returned += 1
+        if len(batch) >= STREAM_BATCH_SIZE or returned == limit:
+            yield from flush_batch()
+            batch = []
+        if returned == limit:
+            return
+    if batch:
+        yield from flush_batch()
+
+# Write queued log records before the process exits (serve.py workers exit without running atexit)
+def shutdown():
+    prediction_log.flush()
 
 # Store Inference Logs
 @app.route("/log_prediction", methods=["POST"])
@@ -24,11 +100,8 @@ def log_prediction():
         if not data:
             return jsonify({"status": "Error", "message": "No data received!"})
 
-        df = pd.read_csv(LOG_FILE)
-
-        # Append new prediction to log
-        df = pd.concat([df, pd.DataFrame([data])], ignore_index=True)
-        df.to_csv(LOG_FILE, index=False)
+        # Queue the prediction; the background flusher appends it to the log
+        prediction_log.append(data)
 
         return jsonify({"status": "Success", "message": "Prediction logged successfully!"})
 
@@ -43,28 +116,84 @@ def submit_feedback():
         prediction_id = feedback_data.get("id")
         feedback = feedback_data.get("feedback")
 
-        df = pd.read_csv(LOG_FILE)
-        if prediction_id >= len(df):
+        if not isinstance(prediction_id, int) or not 0 <= prediction_id < prediction_log.row_count():
             return jsonify({"status": "Error", "message": "Invalid prediction ID!"})
 
         # Update feedback
-        df.at[prediction_id, "User_Feedback"] = feedback
-        df.to_csv(LOG_FILE, index=False)
+        feedback_store.set(prediction_id, feedback)
 
         return jsonify({"status": "Success", "message": "Feedback submitted successfully!"})
 
     except Exception as e:
         return jsonify({"status": "Error", "message": str(e)})
 
-# Retrieve Logged Predictions
+# Retrieve Logged Predictions (cursor-paginated, filterable, optionally streamed as NDJSON/CSV)
 @app.route("/get_logs", methods=["GET"])
 def get_logs():
     try:
-        df = pd.read_csv(LOG_FILE)
-        return jsonify({"status": "Success", "logs": df.to_dict(orient="records")})
+        args = request.args
+        offset, row_id = decode_cursor(args.get("cursor"))
+        fields = [f for f in args.get("fields", "").split(",") if f]
+        unknown = [f for f in fields if f not in prediction_log.columns]
+        if unknown:
+            return jsonify({"status": "Error", "message": f"Unknown fields: {unknown}"})
+        matches = build_filter(args)
+        output_format = args.get("format", "json")
+
+        prediction_log.flush()
+
+        # Streamed modes: whole log (or up to limit) with constant memory
+        if output_format in ("ndjson", "csv"):
+            limit = int(args["limit"]) if args.get("limit") else None
+            rows = iter_logs(offset, row_id, matches, fields, limit)
+            if output_format == "ndjson":
+                body = (json.dumps(record) + "\n" for _, _, record in rows)
+                return Response(stream_with_context(body), mimetype="application/x-ndjson")
+
+            columns = ["id"] + (fields or prediction_log.columns)
+
+            def csv_body():
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=columns)
+                writer.writeheader()
+                for _, _, record in rows:
+                    writer.writerow(record)
+                    if buffer.tell() > 64 * 1024:
+                        yield buffer.getvalue()
+                        buffer.seek(0)
+                        buffer.truncate()
+                yield buffer.getvalue()
+
+            return Response(stream_with_context(csv_body()), mimetype="text/csv")
+
+        if output_format != "json":
+            return jsonify({"status": "Error", "message": f"Unsupported format: {output_format}"})
+
+        # JSON mode: one page at a time
+        limit = min(int(args.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            return jsonify({"status": "Error", "message": "limit must be positive!"})
+        logs, next_cursor = [], None
+        for next_offset, next_row_id, record in iter_logs(offset, row_id, matches, fields, limit):
+            logs.append(record)
+            next_cursor = encode_cursor(next_offset, next_row_id)
+        if len(logs) < limit:
+            next_cursor = None
+
+        return jsonify({"status": "Success", "logs": logs, "count": len(logs), "next_cursor": next_cursor})
 
     except Exception as e:
         return jsonify({"status": "Error", "message": str(e)})
 
+# Rolling MAE, feature distributions and PSI against the training data, from running counts
+@app.route("/drift_stats", methods=["GET"])
+def drift_stats():
+    try:
+        prediction_log.flush()
+        drift_monitor.sync(prediction_log)
+        return jsonify({"status": "Success", **drift_monitor.stats()})
+    except Exception as e:
+        return jsonify({"status": "Error", "message": str(e)})
+
 if __name__ == "__main__":
     app.run(port=5006, debug=True)
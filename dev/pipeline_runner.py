@@ -0,0 +1,299 @@
+"""Local runner for the preprocess -> feature engineering -> train pipeline.
+
+Stages form a DAG and run in-process, without the Flask services. Each stage
+is keyed by a content hash of its code, its config section and the files it
+reads (including its upstream stages' outputs). A stage whose key and
+outputs are unchanged since its last successful run is skipped, so a
+training-only config change reruns only ``train``. A rerun stage that
+writes byte-identical outputs leaves its dependents fresh. Stages whose
+dependencies are done run concurrently on a thread pool, and every stage
+reports its status and timing.
+
+    python dev/pipeline_runner.py                          # run what is stale
+    python dev/pipeline_runner.py --config pipeline.json   # per-stage config sections
+    python dev/pipeline_runner.py --dry-run                # only show what would run
+    python dev/pipeline_runner.py --force train            # rerun a stage (or "all")
+
+Run from the project root (paths are relative to it, like the services).
+"""
+import argparse
+import ast
+import copy
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+DEV_DIR = os.path.dirname(os.path.abspath(__file__))
+if DEV_DIR not in sys.path:
+    sys.path.insert(0, DEV_DIR)
+
+STATE_FILE = "models/pipeline_state.json"
+HASH_BLOCK = 1024 * 1024
+
+DEFAULT_CONFIG = {
+    "preprocess": {"file_name": "collected_airfare_data.csv"},
+    "feature_engineering": {},
+    "train": {"search": "halving"},
+}
+
+# Options that change how a stage runs but not what it writes; they are left out of its key
+EXECUTION_OPTIONS = {"stream", "chunksize", "parallel", "workers", "chunk_bytes"}
+
+# Stages: dependencies, the modules (in dev/) their run function imports, and the files they read
+# besides their dependencies' outputs. run(config) returns a summary with the "outputs" written.
+# A stage's code is the import closure of its modules (see code_files), so its key covers every
+# module it can execute.
+def run_preprocess(config):
+    from preprocessing import preprocess_data, preprocess_file_streaming, PROCESSED_FILE_PATH, DEFAULT_CHUNKSIZE
+    from dev_run_v0 import load_data
+    if config.get("stream"):
+        rows, error = preprocess_file_streaming(config["file_name"], chunksize=int(config.get("chunksize", DEFAULT_CHUNKSIZE)))
+    else:
+        df = load_data(config["file_name"])
+        if df is None or df.empty:
+            raise ValueError("Failed to load data or empty file.")
+        df, error = preprocess_data(df)
+        rows = len(df) if df is not None else None
+    if error:
+        raise ValueError(error)
+    return {"rows": rows, "outputs": [PROCESSED_FILE_PATH]}
+
+def run_feature_engineering(config):
+    from feature_engineering import run_feature_engineering as feature_engineering
+    from preprocessing import PROCESSED_FILE_PATH
+    pipeline, info = feature_engineering(os.path.basename(PROCESSED_FILE_PATH), dict(config, merge=True))
+    return {"rows": info["rows"], "outputs": [info["processed_file"], info["pipeline_file"]]}
+
+def run_train(config):
+    from training_services import run_training
+    result = run_training(config, log=lambda message: print(f"[train] {message}"))
+    return {"bundle": result["bundle"], "MAE": round(float(result["MAE"]), 2), "outputs": [result["bundle"]]}
+
+STAGES = {
+    "preprocess": {
+        "deps": [],
+        "code": ["preprocessing.py", "dev_run_v0.py"],
+        "inputs": lambda config: [os.path.join("data", config["file_name"])],
+        "run": run_preprocess,
+    },
+    "feature_engineering": {
+        "deps": ["preprocess"],
+        "code": ["feature_engineering.py", "preprocessing.py"],
+        "inputs": lambda config: [],
+        "run": run_feature_engineering,
+    },
+    "train": {
+        "deps": ["feature_engineering"],
+        "code": ["training_services.py"],
+        "inputs": lambda config: [],
+        "run": run_train,
+    },
+}
+
+# Names of the dev/ modules a module imports, at any depth in its code (lazy imports included)
+def imported_modules(path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+            names.add(node.module.split(".")[0])
+    return {name + ".py" for name in names if os.path.isfile(os.path.join(DEV_DIR, name + ".py"))}
+
+# Sorted import closure (within dev/) of a stage's code modules
+def code_files(files):
+    seen, todo = set(), list(files)
+    while todo:
+        file = todo.pop()
+        if file not in seen:
+            seen.add(file)
+            todo.extend(imported_modules(os.path.join(DEV_DIR, file)) - seen)
+    return sorted(seen)
+
+def load_state(path=STATE_FILE):
+    if not os.path.exists(path):
+        return {"files": {}, "stages": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state, path=STATE_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+class FileHasher:
+    """SHA-256 of files, remembered by (size, mtime) so unchanged files are not read again."""
+
+    def __init__(self, known):
+        self.known = known
+        self.lock = threading.Lock()
+
+    def __call__(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        fingerprint = [stat.st_size, stat.st_mtime_ns]
+        with self.lock:
+            entry = self.known.get(path)
+        if entry and entry["fingerprint"] == fingerprint:
+            return entry["sha256"]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(HASH_BLOCK), b""):
+                digest.update(block)
+        with self.lock:
+            self.known[path] = {"fingerprint": fingerprint, "sha256": digest.hexdigest()}
+        return digest.hexdigest()
+
+def stage_config(config, name):
+    return {key: value for key, value in config.get(name, {}).items() if key not in EXECUTION_OPTIONS}
+
+# Content hash of everything a stage's output depends on
+def stage_key(name, config, state, hash_file):
+    stage = STAGES[name]
+    inputs = {path: hash_file(path) for path in stage["inputs"](config.get(name, {}))}
+    missing = [path for path, digest in inputs.items() if digest is None]
+    if missing:
+        raise FileNotFoundError(f"Input not found for {name}: {', '.join(missing)}")
+    key = {
+        "stage": name,
+        "code": {file: hash_file(os.path.join(DEV_DIR, file)) for file in code_files(stage["code"])},
+        "config": stage_config(config, name),
+        "inputs": inputs,
+        "deps": {dep: state["stages"][dep]["outputs"] for dep in stage["deps"]},
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+# A stage is fresh if its last successful run had the same key and its outputs are untouched
+def is_fresh(name, key, state, hash_file):
+    record = state["stages"].get(name)
+    if not record or record.get("key") != key:
+        return False
+    return all(hash_file(path) == digest for path, digest in record["outputs"].items())
+
+def run_pipeline(config=None, force=(), dry_run=False, workers=None, state_file=STATE_FILE, log=print):
+    """Run the stale stages of the DAG; returns one report entry per stage in start order."""
+    config = merge_config(DEFAULT_CONFIG, config or {})
+    state = load_state(state_file)
+    hash_file = FileHasher(state.setdefault("files", {}))
+    state.setdefault("stages", {})
+    force = set(STAGES) if "all" in force else set(force)
+
+    done, failed, report = set(), set(), []
+    pending = list(STAGES)
+    running = {}
+
+    def execute(name, key):
+        start = time.perf_counter()
+        summary = STAGES[name]["run"](config.get(name, {}))
+        outputs = {path: hash_file(path) for path in summary.pop("outputs")}
+        return summary, outputs, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=workers or len(STAGES)) as pool:
+        while pending or running:
+            # Start every stage whose dependencies are done; skip those whose dependencies failed
+            for name in list(pending):
+                deps = STAGES[name]["deps"]
+                if any(dep in failed for dep in deps):
+                    pending.remove(name)
+                    failed.add(name)
+                    report.append({"stage": name, "status": "blocked", "seconds": 0.0})
+                    log(f"⏭️  {name}: blocked by a failed dependency")
+                    continue
+                if not all(dep in done for dep in deps):
+                    continue
+                pending.remove(name)
+                start = time.perf_counter()
+                try:
+                    if dry_run and any(entry["status"] == "stale" for entry in report if entry["stage"] in deps):
+                        key = None  # upstream would rerun first, so the inputs are not known yet
+                    else:
+                        key = stage_key(name, config, state, hash_file)
+                except Exception as e:
+                    failed.add(name)
+                    report.append({"stage": name, "status": "failed", "seconds": 0.0, "error": str(e)})
+                    log(f"❌ {name}: {e}")
+                    continue
+                if key is not None and name not in force and is_fresh(name, key, state, hash_file):
+                    done.add(name)
+                    report.append({"stage": name, "status": "skipped", "key": key[:12],
+                                   "seconds": round(time.perf_counter() - start, 4)})
+                    log(f"✅ {name}: up to date ({key[:12]})")
+                elif dry_run:
+                    done.add(name)
+                    report.append({"stage": name, "status": "stale", "key": key[:12] if key else None, "seconds": 0.0})
+                    log(f"🔄 {name}: would run")
+                else:
+                    log(f"▶️  {name}: running ({key[:12]})")
+                    running[pool.submit(execute, name, key)] = (name, key)
+
+            if not running:
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                name, key = running.pop(future)
+                try:
+                    summary, outputs, seconds = future.result()
+                except Exception as e:
+                    failed.add(name)
+                    state["stages"].pop(name, None)
+                    report.append({"stage": name, "status": "failed", "key": key[:12], "error": str(e)})
+                    log(f"❌ {name}: {e}")
+                    continue
+                done.add(name)
+                state["stages"][name] = {"key": key, "outputs": outputs, "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                                         "seconds": round(seconds, 4), "summary": summary}
+                save_state(state, state_file)
+                report.append(dict({"stage": name, "status": "ran", "key": key[:12], "seconds": round(seconds, 4)}, **summary))
+                log(f"✅ {name}: finished in {seconds:.2f}s")
+
+    if not dry_run:
+        state["files"] = {path: entry for path, entry in state["files"].items() if os.path.exists(path)}
+        save_state(state, state_file)
+    return report
+
+def merge_config(base, override):
+    merged = copy.deepcopy(base)
+    for name, section in override.items():
+        if name not in STAGES:
+            raise ValueError(f"Unknown stage in config: {name}")
+        merged.setdefault(name, {}).update(section)
+    return merged
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--config", help="JSON file with per-stage sections, e.g. {\"train\": {\"search\": \"random\"}}")
+    parser.add_argument("--force", nargs="+", default=[], choices=list(STAGES) + ["all"], help="rerun these stages even if fresh")
+    parser.add_argument("--dry-run", action="store_true", help="report stale stages without running them")
+    parser.add_argument("--workers", type=int, help="stages run at the same time (default: all that are ready)")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config, encoding="utf-8") as f:
+            config = json.load(f)
+    start = time.perf_counter()
+    report = run_pipeline(config, args.force, args.dry_run, args.workers)
+    total = time.perf_counter() - start
+
+    print(f"\n{'stage':<22}{'status':<10}{'seconds':>10}")
+    for entry in report:
+        print(f"{entry['stage']:<22}{entry['status']:<10}{entry.get('seconds', 0.0):>10.2f}")
+    print(f"{'total':<32}{total:>10.2f}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"total_seconds": round(total, 4), "stages": report}, f, indent=2)
+    sys.exit(1 if any(entry["status"] in ("failed", "blocked") for entry in report) else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAXSIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 100_000))
+DEFAULT_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+
+# Numerical features are coerced to float by the pipeline, so "120", 120 and 120.0 share a key.
+# Categorical values are kept as-is: the encoders are exact-match lookups.
+def normalize_value(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+# Cache key for an itinerary: its normalized values in model feature order
+def itinerary_key(record, feature_order, numerical_cols):
+    return tuple(normalize_value(record.get(col)) if col in numerical_cols else record.get(col)
+                 for col in feature_order)
+
+class PredictionCache:
+    """In-process LRU cache of predicted prices with a per-entry TTL.
+
+    Entries belong to one model version; when a different version is seen the
+    cache is cleared, so a promoted model never serves stale prices.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def _check_version(self, version):
+        if version != self.version:
+            if self.entries:
+                self.invalidations += 1
+            self.entries.clear()
+            self.version = version
+
+    def get(self, version, key):
+        with self.lock:
+            self._check_version(version)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            price, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return price
+
+    def put(self, version, key, price):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self._check_version(version)
+            self.entries[key] = (price, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "model_version": self.version,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
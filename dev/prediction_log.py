@@ -0,0 +1,279 @@
+import atexit
+import csv
+import io
+import math
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOG_COLUMNS = ["Airline", "Source", "Destination", "Route", "Duration", "Total_Stops",
+               "Additional_Info", "Journey_day", "Journey_month", "Dep_Time_hour",
+               "Dep_Time_minute", "Arrival_Time_hour", "Arrival_Time_minute",
+               "Predicted_Price", "Actual_Price", "User_Feedback", "Logged_At"]
+
+FLUSH_INTERVAL = 0.5     # seconds between background flushes
+FLUSH_BATCH_SIZE = 1000  # flush early once this many records are queued
+
+# Convert a raw CSV cell to a JSON value ('' -> null); "nan"/"inf" stay strings, as JSON has no such numbers
+def parse_value(value):
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        number = float(value)
+    except ValueError:
+        return value
+    return number if math.isfinite(number) else value
+
+# Exclusive lock on a sidecar file, shared by every process writing the same log
+@contextmanager
+def file_lock(lock_path):
+    with open(lock_path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+class PredictionLogReader:
+    """Read-only view of a prediction log, for processes that never append.
+
+    Reads take no lock and start no thread. Rows are only read up to the
+    last complete line, so a reader never sees a row that is still being
+    written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(self.path, newline="", encoding="utf-8") as f:
+            self.columns = next(csv.reader(f), [])
+
+    # Stream (row_id, next_offset, row) from a byte offset without loading the file.
+    # next_offset is where the following row starts, so it can be used as a resume cursor.
+    def iter_rows(self, offset=None, row_id=0):
+        with open(self.path, "rb") as f:
+            header_line = f.readline()
+            if offset is None:
+                offset = f.tell()
+            elif not header_line or not len(header_line) <= offset <= os.path.getsize(self.path):
+                raise ValueError("Invalid cursor!")
+            f.seek(offset)
+
+            def lines():
+                while True:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):  # end of file, or a row still being written
+                        return
+                    yield line.decode("utf-8")
+
+            for values in csv.reader(lines()):
+                if values:
+                    yield row_id, f.tell(), dict(zip(self.columns, values))
+                    row_id += 1
+
+    # Rewrite the header with new trailing columns (rows are copied as they are). Byte offsets
+    # shift, so cursors issued before the migration are no longer valid.
+    def _migrate_header(self, columns):
+        tmp_path = f"{self.path}.tmp-{os.getpid()}"
+        with open(self.path, "rb") as src, open(tmp_path, "wb") as dst:
+            src.readline()
+            header = io.StringIO()
+            csv.writer(header).writerow(columns)
+            dst.write(header.getvalue().encode("utf-8"))
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp_path, self.path)
+        self.columns = columns
+
+    # Byte offset and row id just past the last complete row (an iter_rows cursor)
+    def position(self):
+        with open(self.path, "rb") as f:
+            end = (len(f.readline()), 0)
+        for row_id, next_offset, _ in self.iter_rows():
+            end = (next_offset, row_id + 1)
+        return end
+
+class PredictionLog(PredictionLogReader):
+    """Append-only CSV prediction log with a background flusher.
+
+    ``append`` only enqueues the record, so logging costs the same no matter
+    how large the log is. A daemon thread writes queued records in batches
+    under a file lock, which keeps concurrent worker processes from
+    interleaving rows. A forked child (a serve.py worker) gets its own empty
+    queue, locks and flusher thread; records queued before the fork are left
+    to the parent. Row ids are the 0-based data row positions, as before.
+    Logs created before a column was added get it appended to their header
+    when opened; their older, shorter rows read as missing that value.
+    """
+
+    def __init__(self, path, columns=LOG_COLUMNS, flush_interval=FLUSH_INTERVAL,
+                 batch_size=FLUSH_BATCH_SIZE):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.columns = columns
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.pending = queue.Queue()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+
+        # Rows counted so far and the file offset they end at; only the tail is rescanned
+        self.known_size = 0
+        self.known_rows = -1  # the header is not a data row
+
+        with file_lock(self.lock_path):
+            if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+                with open(self.path, "w", newline="", encoding="utf-8") as f:
+                    csv.writer(f).writerow(self.columns)
+            with open(self.path, newline="", encoding="utf-8") as f:
+                self.columns = next(csv.reader(f))
+            missing = [col for col in columns if col not in self.columns]
+            if missing:
+                self._migrate_header(self.columns + missing)
+            self._sync_row_count()
+
+        self._start_flusher()
+        atexit.register(self.flush)
+        if hasattr(os, "register_at_fork"):
+            after_fork = weakref.WeakMethod(self._after_fork)
+            os.register_at_fork(after_in_child=lambda: after_fork() and after_fork()())
+
+    def _start_flusher(self):
+        self.flusher = threading.Thread(target=self._run, name="prediction-log-flusher", daemon=True)
+        self.flusher.start()
+
+    # Threads do not survive a fork, and a lock held by one of them at that moment would stay held
+    def _after_fork(self):
+        self.pending = queue.Queue()
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self._start_flusher()
+
+    def append(self, record):
+        if "Logged_At" not in record:
+            record = dict(record, Logged_At=datetime.now(timezone.utc).isoformat(timespec="milliseconds"))
+        self.pending.put(record)
+        if self.pending.qsize() >= self.batch_size:
+            self.wakeup.set()
+
+    def flush(self):
+        with self.write_lock:
+            batch = []
+            while True:
+                try:
+                    batch.append(self.pending.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return 0
+
+            with file_lock(self.lock_path):
+                self._sync_row_count()
+                with open(self.path, "a", newline="", encoding="utf-8") as f:
+                    writer = csv.DictWriter(f, fieldnames=self.columns, extrasaction="ignore")
+                    writer.writerows(batch)
+                self.known_size = os.path.getsize(self.path)
+                self.known_rows += len(batch)
+            return len(batch)
+
+    def row_count(self):
+        with self.write_lock, file_lock(self.lock_path):
+            self._sync_row_count()
+            return self.known_rows + self.pending.qsize()
+
+    # Byte offset and row id where the next appended row will start (an iter_rows cursor)
+    def position(self):
+        with self.write_lock, file_lock(self.lock_path):
+            self._sync_row_count()
+            return self.known_size, self.known_rows
+
+    # Count rows appended (by any process) since the last sync, reading only the new tail
+    def _sync_row_count(self):
+        size = os.path.getsize(self.path)
+        if size == self.known_size:
+            return
+        with open(self.path, "r+", newline="", encoding="utf-8") as f:
+            f.seek(self.known_size)
+            self.known_rows += sum(1 for row in csv.reader(f) if row)
+            f.seek(0, os.SEEK_END)
+            if f.tell() and not self._ends_with_newline():
+                f.write("\n")
+        self.known_size = os.path.getsize(self.path)
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Error flushing prediction log: {e}")
+                time.sleep(self.flush_interval)
+
+class FeedbackStore:
+    """Feedback keyed by prediction id, kept out of the append-only log (SQLite upserts)."""
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS Feedback (
+                    prediction_id INTEGER PRIMARY KEY,
+                    feedback TEXT,
+                    updated_at REAL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:  # commit on success, roll back on error
+                yield conn
+        finally:
+            conn.close()
+
+    def set(self, prediction_id, feedback):
+        with self._connect() as conn:
+            conn.execute("""
+                INSERT INTO Feedback (prediction_id, feedback, updated_at) VALUES (?, ?, ?)
+                ON CONFLICT(prediction_id) DO UPDATE SET feedback = excluded.feedback,
+                                                         updated_at = excluded.updated_at
+            """, (prediction_id, feedback, time.time()))
+
+    def get_many(self, start=0, stop=None):
+        query = "SELECT prediction_id, feedback FROM Feedback WHERE prediction_id >= ?"
+        params = [start]
+        if stop is not None:
+            query += " AND prediction_id < ?"
+            params.append(stop)
+        with self._connect() as conn:
+            return dict(conn.execute(query, params).fetchall())
@@ -1,48 +1,57 @@
 from flask import Flask, request, jsonify
-import joblib
-import pandas as pd
+import numpy as np
 import os
+import time
+from category_encoding import UNKNOWN_CODE
+from model_bundle import get_bundle, current_bundle_path, LEGACY_MODEL_PATH
+from metrics import instrument, stage_done, set_model_version, PREDICTIONS
 
-app = Flask(__name__)
+SERVICE = "prediction_service"
 
-# Load models
-model_path = "models/flight_fare_model.pkl"
-encoder_airline_path = "models/encoder_airline.pkl"
-encoder_source_path = "models/encoder_source.pkl"
-encoder_destination_path = "models/encoder_destination.pkl"
-scaler_path = "models/scaler.pkl"
+app = Flask(__name__)
+instrument(app, SERVICE)
 
-# Ensure model exists
-if not os.path.exists(model_path):
+# Ensure a model exists; it is loaded lazily from the same bundle the inference service uses
+if current_bundle_path() is None and not os.path.exists(LEGACY_MODEL_PATH):
     raise FileNotFoundError("Trained model not found. Please train the model first.")
 
-# Load the trained model and encoders
-model = joblib.load(model_path)
-encoder_airline = joblib.load(encoder_airline_path)
-encoder_source = joblib.load(encoder_source_path)
-encoder_destination = joblib.load(encoder_destination_path)
-scaler = joblib.load(scaler_path)
-
 def safe_encode(label, encoder):
-    """Safely encode labels, replacing unknowns with 'Unknown'."""
-    if label in encoder.classes_:
-        return encoder.transform([label])[0]
-    else:
-        return encoder.transform(["Unknown"])[0]  # Ensure "Unknown" is in training
+    """Safely encode labels, replacing unknowns with 'Unknown' (or UNKNOWN_CODE if it was never fitted)."""
+    code = encoder.encode(label)
+    if code == UNKNOWN_CODE:
+        code = encoder.encode("Unknown")  # Ensure "Unknown" is in training
+    return code
+
+# processed_data rows as a model matrix, or an error. A row is a list of already encoded and scaled
+# values, one per feature of the bundle, in its feature order; processed_data is one row or a list of rows.
+def processed_rows(processed_data, feature_order):
+    if not isinstance(processed_data, list) or not processed_data:
+        return None, "processed_data must be a row or a non-empty list of rows."
+    rows = processed_data if isinstance(processed_data[0], list) else [processed_data]
+    bad = [i for i, row in enumerate(rows) if not isinstance(row, list) or len(row) != len(feature_order)]
+    if bad:
+        return None, (f"Every row of processed_data must have {len(feature_order)} values, in the order "
+                      f"{', '.join(feature_order)}; rows {bad[:10]} do not.")
+    return np.asarray(rows, dtype=np.float64), None
 
 @app.route("/predict", methods=["POST"])
 def predict():
     try:
         json_data = request.get_json()
-        processed_data = json_data["processed_data"]  # Use already preprocessed data
-        df = pd.DataFrame(processed_data, columns=['Airline', 'Source', 'Destination', 'Journey_day', 'Journey_month'])
-
-
-        # Select model features
-        X = df[['Airline', 'Source', 'Destination', 'Journey_day', 'Journey_month']]
-        prediction = model.predict(X)
-
-        return jsonify({"status": "Success", "predicted_price": prediction.tolist()})
+        bundle = get_bundle()
+        set_model_version(SERVICE, bundle.version)
+
+        # Use already preprocessed data, in the feature order the model was trained with
+        start = time.perf_counter()
+        X, error = processed_rows(json_data["processed_data"], bundle.feature_order)
+        if error:
+            return jsonify({"status": "Error", "message": error})
+        prediction = bundle.predictor.predict(X)
+        stage_done(SERVICE, "predict", start, bundle.version)
+        PREDICTIONS.inc(len(X), service=SERVICE, mode="batch" if len(X) > 1 else "single", cached="false",
+                        model_version=bundle.version)
+
+        return jsonify({"status": "Success", "predicted_price": prediction.tolist(), "model_version": bundle.version})
 
     except Exception as e:
         return jsonify({"status": "Error", "message": str(e)})
@@ -1,56 +1,159 @@
 import os
+import numpy as np
 import pandas as pd
+import openpyxl
 from flask import Flask, request, jsonify
 from dev_run_v0 import load_data  # Load data function
+from metrics import instrument
+from fare_schema import apply_schema, csv_frame
 
 app = Flask(__name__)
+instrument(app, "preprocessing")
 
 PROCESSED_FILE_PATH = "data/preprocessed_airfare_data.csv"
 
+PROCESSED_COLUMNS = ['Airline', 'Source', 'Destination', 'Route', 'Duration', 'Total_Stops',
+                     'Additional_Info', 'Price', 'Journey_day', 'Journey_month', 'Dep_Time_hour',
+                     'Dep_Time_minute', 'Arrival_Time_hour', 'Arrival_Time_minute']
+DEFAULT_CHUNKSIZE = 100_000
+
+STOPS_MAP = {'non-stop': 0, '1 stop': 1, '2 stops': 2, '3 stops': 3, '4 stops': 4}
+
+# Explicit formats: "24/03/2019", "22:20" / "01:10 22 Mar", "2h 50m" / "19h" / "5m"
+DATE_PATTERN = r'^\s*(\d{1,2})/(\d{1,2})/\d{4}'
+TIME_PATTERN = r'^\s*(\d{1,2}):(\d{2})'
+DURATION_PATTERN = r'^\s*(?:(\d+)h)?\s*(?:(\d+)m)?\s*$'
+
+# Raw columns transform_chunk needs, and the ones it parses with the patterns above
+RAW_COLUMNS = ['Airline', 'Date_of_Journey', 'Source', 'Destination', 'Route', 'Dep_Time',
+               'Arrival_Time', 'Duration', 'Total_Stops', 'Additional_Info', 'Price']
+FIELD_PATTERNS = {'Date_of_Journey': DATE_PATTERN, 'Dep_Time': TIME_PATTERN,
+                  'Arrival_Time': TIME_PATTERN, 'Duration': DURATION_PATTERN}
+
+# Extract regex groups from a column, failing loudly on values that do not match.
+# Dates, times and durations repeat a lot, so each distinct value is parsed once.
+def extract_parts(series, pattern, name):
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    parts = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.extract(pattern)
+    unmatched = parts.isna().all(axis=1).to_numpy()[codes]
+    if unmatched.any():
+        raise ValueError(f"Unparseable {name} values: {series[unmatched].head(5).tolist()}")
+    return parts.iloc[codes].set_axis(series.index)
+
+# Vectorized transform of one (chunk of a) raw DataFrame; every column is parsed once.
+# The result has the compact dtypes of fare_schema.
+def transform_chunk(df):
+    # Drop missing values
+    df = df.dropna().reset_index(drop=True)
+
+    # Extract Date Features
+    date_parts = extract_parts(df['Date_of_Journey'], DATE_PATTERN, 'Date_of_Journey').astype('int32')
+    df['Journey_day'] = date_parts[0]
+    df['Journey_month'] = date_parts[1]
+
+    # Convert Duration to Minutes
+    duration_parts = extract_parts(df['Duration'], DURATION_PATTERN, 'Duration').fillna('0').astype('int64')
+    df['Duration'] = duration_parts[0] * 60 + duration_parts[1]
+
+    # Convert Total Stops to Numerical (unmapped values are kept as they are)
+    stops = df['Total_Stops'].map(STOPS_MAP)
+    if stops.notna().all():
+        df['Total_Stops'] = stops.astype('int64')
+    else:
+        df['Total_Stops'] = df['Total_Stops'].replace(STOPS_MAP)
+
+    # Extract Hour and Minute from Departure and Arrival Time
+    for col in ['Dep_Time', 'Arrival_Time']:
+        time_parts = extract_parts(df[col], TIME_PATTERN, col).astype('int32')
+        df[f'{col}_hour'] = time_parts[0]
+        df[f'{col}_minute'] = time_parts[1]
+
+    return apply_schema(df.drop(columns=['Date_of_Journey', 'Dep_Time', 'Arrival_Time']))
+
+# Per-row check of raw records against what transform_chunk parses; returns (valid mask, messages).
+# Rows that pass can go through transform_chunk without being dropped or raising.
+def validate_chunk(df):
+    messages = [[] for _ in range(len(df))]
+    present = df.reindex(columns=RAW_COLUMNS)
+    missing = present.isna() | present.isin([''])  # empty strings are what read_csv turns into NaN
+
+    for i in missing.any(axis=1).to_numpy().nonzero()[0]:
+        fields = [col for col, flag in zip(RAW_COLUMNS, missing.iloc[i]) if flag]
+        messages[i].append(f"Missing {', '.join(fields)}")
+    for col, pattern in FIELD_PATTERNS.items():
+        # Same test as extract_parts without building the groups: every group captures digits, so
+        # a match containing a digit has matched a group (all of Duration's groups are optional)
+        codes, uniques = pd.factorize(present[col].astype(str))
+        parsed = pd.Series(uniques, dtype=object).str.match(r'(?=\D*\d)' + pattern).to_numpy()[codes]
+        for i in (~missing[col] & ~parsed).to_numpy().nonzero()[0]:
+            messages[i].append(f"Unparseable {col}: {present[col].iat[i]}")
+    price = pd.to_numeric(present['Price'], errors='coerce')
+    for i in (~missing['Price'] & ~(price > 0)).to_numpy().nonzero()[0]:
+        messages[i].append(f"Invalid Price: {present['Price'].iat[i]}")
+
+    valid = pd.Series([not m for m in messages], index=df.index, dtype=bool)
+    return valid, ["; ".join(m) for m in messages]
+
 # Function to preprocess data
 def preprocess_data(df):
     try:
-        # Drop missing values
-        df = df.dropna().reset_index(drop=True)
-
-        # Extract Date Features
-        df['Journey_day'] = pd.to_datetime(df['Date_of_Journey'], dayfirst=True).dt.day
-        df['Journey_month'] = pd.to_datetime(df['Date_of_Journey'], dayfirst=True).dt.month
-        df.drop(columns=['Date_of_Journey'], inplace=True)
-
-        # Convert Duration to Minutes
-        def convert_duration(duration):
-            parts = duration.split()
-            hours, minutes = 0, 0
-            if 'h' in parts[0]:
-                hours = int(parts[0].replace('h', ''))
-                if len(parts) > 1:
-                    minutes = int(parts[1].replace('m', ''))
-            else:
-                minutes = int(parts[0].replace('m', ''))
-            return hours * 60 + minutes
-
-        df['Duration'] = df['Duration'].apply(convert_duration)
-
-        # Convert Total Stops to Numerical
-        df['Total_Stops'] = df['Total_Stops'].replace({
-            'non-stop': 0, '1 stop': 1, '2 stops': 2, '3 stops': 3, '4 stops': 4
-        })
-
-        # Extract Hour and Minute from Departure and Arrival Time
-        df['Dep_Time_hour'] = pd.to_datetime(df['Dep_Time']).dt.hour
-        df['Dep_Time_minute'] = pd.to_datetime(df['Dep_Time']).dt.minute
-        df['Arrival_Time_hour'] = pd.to_datetime(df['Arrival_Time']).dt.hour
-        df['Arrival_Time_minute'] = pd.to_datetime(df['Arrival_Time']).dt.minute
-        df.drop(columns=['Dep_Time', 'Arrival_Time'], inplace=True)
+        df = transform_chunk(df)
 
         # Save the preprocessed data
-        df.to_csv(PROCESSED_FILE_PATH, index=False)
+        csv_frame(df).to_csv(PROCESSED_FILE_PATH, index=False)
 
         return df, None
     except Exception as e:
         return None, str(e)
 
+# Read a CSV or Excel file in fixed-size chunks without materializing it
+def iter_file_chunks(data_path, chunksize=DEFAULT_CHUNKSIZE):
+    if data_path.endswith('.csv'):
+        yield from pd.read_csv(data_path, chunksize=chunksize)
+        return
+
+    workbook = openpyxl.load_workbook(data_path, read_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows)
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == chunksize:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+# Streaming mode: preprocess a file chunk by chunk, appending to the output as we go.
+# Output matches preprocess_data as long as each column keeps the same dtype in every chunk.
+def preprocess_file_streaming(file_name, output_path=PROCESSED_FILE_PATH, chunksize=DEFAULT_CHUNKSIZE):
+    try:
+        data_path = os.path.join('data', file_name)
+        if not os.path.exists(data_path):
+            return None, f"File {data_path} not found."
+
+        rows = 0
+        header_written = False
+        tmp_path = output_path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as out:
+            for chunk in iter_file_chunks(data_path, chunksize):
+                chunk = transform_chunk(chunk)
+                if chunk.empty:  # nothing left after dropna; the header comes from the first non-empty chunk
+                    continue
+                csv_frame(chunk).to_csv(out, index=False, header=not header_written)
+                header_written = True
+                rows += len(chunk)
+            if not header_written:
+                out.write(",".join(PROCESSED_COLUMNS) + "\n")
+        os.replace(tmp_path, output_path)
+
+        return rows, None
+    except Exception as e:
+        return None, str(e)
+
 # Flask API Endpoint
 @app.route("/preprocess", methods=["POST"])
 def preprocess_request():
@@ -61,6 +164,19 @@ def preprocess_request():
         if not file_name:
             return jsonify({"status": "Error", "message": "Missing file_name in request."})
 
+        # Streaming mode: constant memory regardless of input size
+        if data.get("stream"):
+            rows, error = preprocess_file_streaming(file_name, chunksize=int(data.get("chunksize", DEFAULT_CHUNKSIZE)))
+            if error:
+                return jsonify({"status": "Error", "message": error})
+
+            return jsonify({
+                "status": "Success",
+                "message": "Data preprocessed successfully!",
+                "rows": rows,
+                "processed_file": PROCESSED_FILE_PATH
+            })
+
         df = load_data(file_name)
         if df is None or df.empty:
             return jsonify({"status": "Error", "message": "Failed to load data or empty file."})
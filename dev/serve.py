@@ -0,0 +1,199 @@
+"""Production serving mode for the Flask services.
+
+Usage (from the project root):
+    python dev/serve.py inference_service --port 5005 --workers 4 --threads 8
+
+The master process imports the service, preloads its model, binds the
+listening socket and then forks the workers. Everything loaded before the
+fork (the forest in particular) is shared copy-on-write between workers.
+Each worker accepts connections from the shared socket and handles them
+with a bounded thread pool. It accepts a connection only when a thread is
+free for it: the others wait in the socket's backlog, where an idle worker
+can take them, instead of queueing without limit inside a busy one. State
+that cannot be shared across a fork (background threads, locks) is
+recreated in each worker by the module that owns it (see PredictionLog),
+and a worker runs its service's shutdown hook before exiting, since it
+leaves through ``os._exit`` without atexit handlers. On platforms without
+``os.fork`` the service runs as a single threaded process.
+"""
+import argparse
+import gc
+import importlib
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer
+
+DEFAULT_WORKERS = os.cpu_count() or 1
+DEFAULT_THREADS = 8
+
+# Hooks that load a service's heavy state so it can be shared by the forked workers
+PRELOAD_HOOKS = {
+    "inference_service": "load_model",
+    "ml_service": "preload",
+}
+
+# Hooks that flush a service's per-process state (e.g. queued prediction log records) on exit
+SHUTDOWN_HOOKS = {
+    "monitoring_service": "shutdown",
+    "ml_service": "shutdown",
+}
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server that handles requests on a fixed-size thread pool.
+
+    At most ``threads`` connections are open at once: the next one is only
+    accepted when one of them is closed.
+    """
+
+    def __init__(self, host, port, app, threads=DEFAULT_THREADS, fd=None):
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="request")
+        self.slots = threading.BoundedSemaphore(threads)
+        super().__init__(host, port, app, fd=fd)
+
+    # Wait for a free thread before accepting, so the pool's queue never grows
+    def get_request(self):
+        self.slots.acquire()
+        try:
+            return super().get_request()
+        except BaseException:
+            self.slots.release()
+            raise
+
+    # Called once for every accepted connection, however its request ended
+    def shutdown_request(self, request):
+        try:
+            super().shutdown_request(request)
+        finally:
+            self.slots.release()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+def load_service(name):
+    module = importlib.import_module(name)
+    hook = PRELOAD_HOOKS.get(name)
+    if hook:
+        getattr(module, hook)()
+    return module.app
+
+def shutdown_service(name):
+    hook = SHUTDOWN_HOOKS.get(name)
+    if hook:
+        try:
+            getattr(importlib.import_module(name), hook)()
+        except Exception:
+            traceback.print_exc()
+
+def bind_socket(host, port, backlog=2048):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def run_worker(service, app, host, port, sock, threads):
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the master handles Ctrl+C
+    server = PooledWSGIServer(host, port, app, threads=threads, fd=sock.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        server.pool.shutdown(wait=True)  # let in-flight requests finish before flushing
+        server.server_close()
+        shutdown_service(service)
+
+def serve(service, host="0.0.0.0", port=5005, workers=DEFAULT_WORKERS, threads=DEFAULT_THREADS):
+    app = load_service(service)
+    sock = bind_socket(host, port)
+
+    if not hasattr(os, "fork") or workers <= 1:
+        print(f"✅ Serving {service} on {host}:{port} (1 process, {threads} threads)")
+        run_worker(service, app, host, port, sock, threads)
+        return
+
+    # Move everything loaded so far out of the GC's reach, so collections in the workers
+    # do not write to (and un-share) the preloaded pages
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(service, app, host, port, sock, threads)
+            except SystemExit:
+                pass
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    for _ in range(workers):
+        spawn()
+    print(f"✅ Serving {service} on {host}:{port} ({workers} workers x {threads} threads, pids {list(children)})")
+
+    stopping = False
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    # Supervise: respawn workers that die unexpectedly
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if not stopping:
+            print(f"❌ Worker {pid} exited with status {status}, restarting")
+            if started is not None and time.monotonic() - started < 1:
+                time.sleep(1)  # avoid a tight crash loop
+            spawn()
+    sock.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("service", help="service module name, e.g. inference_service")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5005)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("WORKERS", DEFAULT_WORKERS)))
+    parser.add_argument("--threads", type=int, default=int(os.environ.get("THREADS", DEFAULT_THREADS)))
+    parser.add_argument("--predictor", choices=["sklearn", "compiled"], default=os.environ.get("PREDICTOR", "sklearn"),
+                        help="forest implementation used for predictions")
+    args = parser.parse_args(argv)
+    os.environ["PREDICTOR"] = args.predictor  # read when the model bundle is loaded
+    serve(args.service, args.host, args.port, args.workers, args.threads)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from prediction_log import file_lock
+
+JOBS_DIR = "models/jobs/"
+MAX_WORKERS = int(os.environ.get("TRAINING_WORKERS", 1))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+class JobCancelled(Exception):
+    pass
+
+def job_dir(job_id, jobs_dir=JOBS_DIR):
+    return os.path.join(jobs_dir, os.path.basename(job_id))
+
+def now():
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+# numpy scalars in metrics and reports are written as plain numbers
+def to_json(value):
+    return value.item() if hasattr(value, "item") else str(value)
+
+# Status files are replaced atomically, so a poller never reads a half-written job
+def write_status(job_id, status, jobs_dir=JOBS_DIR):
+    path = os.path.join(job_dir(job_id, jobs_dir), "status.json")
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(status, f, default=to_json)
+    os.replace(tmp_path, path)
+
+def read_status(job_id, jobs_dir=JOBS_DIR):
+    path = os.path.join(job_dir(job_id, jobs_dir), "status.json")
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+# The service (cancel, crash handling) and the worker both update a job's status: every
+# read-modify-write holds the job's lock, so no process overwrites another's change
+def status_lock(job_id, jobs_dir=JOBS_DIR):
+    return file_lock(os.path.join(job_dir(job_id, jobs_dir), "status.lock"))
+
+# With only_active=True, a job that has already finished keeps its final state
+def update_status(job_id, jobs_dir=JOBS_DIR, only_active=False, **changes):
+    with status_lock(job_id, jobs_dir):
+        status = read_status(job_id, jobs_dir)
+        if only_active and status["state"] in FINISHED_STATES:
+            return status
+        status.update(changes)
+        write_status(job_id, status, jobs_dir)
+        return status
+
+def cancel_requested(job_id, jobs_dir=JOBS_DIR):
+    return os.path.exists(os.path.join(job_dir(job_id, jobs_dir), "CANCEL"))
+
+# Entry point in the worker process: runs one training job and records its outcome
+def run_job(job_id, options, jobs_dir=JOBS_DIR):
+    log_path = os.path.join(job_dir(job_id, jobs_dir), "train.log")
+    with open(log_path, "a", encoding="utf-8", buffering=1) as log_file:
+
+        def log(message):
+            log_file.write(f"{now()} {message}\n")
+
+        def progress(update):
+            if cancel_requested(job_id, jobs_dir):
+                raise JobCancelled()
+            with status_lock(job_id, jobs_dir):
+                status = read_status(job_id, jobs_dir)
+                if update.get("stage") != status["progress"].get("stage"):
+                    log(f"Stage: {update['stage']}")
+                status["progress"] = dict(status["progress"], **update)
+                write_status(job_id, status, jobs_dir)
+
+        try:
+            if cancel_requested(job_id, jobs_dir):
+                raise JobCancelled()
+            if update_status(job_id, jobs_dir, only_active=True, state=RUNNING, started_at=now(),
+                             pid=os.getpid())["state"] != RUNNING:
+                raise JobCancelled()
+            log(f"Job {job_id} started with options {options}")
+
+            from training_services import run_training  # imported here, in the worker process
+            result = run_training(options, progress=progress, log=log)
+
+            update_status(job_id, jobs_dir, state=SUCCEEDED, finished_at=now(), result=result,
+                          progress={"stage": "done"})
+            log("Job succeeded")
+        except JobCancelled:
+            update_status(job_id, jobs_dir, only_active=True, state=CANCELLED, finished_at=now())
+            log("Job cancelled")
+        except Exception as e:
+            update_status(job_id, jobs_dir, state=FAILED, finished_at=now(), error=str(e))
+            log(f"Job failed: {e}\n{traceback.format_exc()}")
+
+_lock = threading.Lock()
+_executor = None
+_futures = {}  # job id -> Future, for jobs submitted by this process
+
+def get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            # Fresh interpreters: the service's threads and open sockets are not inherited
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+# Drop a pool whose worker died (OOM kill, crash): it refuses new work, so the next job gets a new one
+def discard_executor(executor):
+    global _executor
+    with _lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+# Record the outcome of jobs that never got to report it themselves (e.g. a worker crash)
+def _job_done(job_id, future, jobs_dir, executor):
+    _futures.pop(job_id, None)
+    if not future.cancelled() and isinstance(future.exception(), BrokenProcessPool):
+        discard_executor(executor)
+    if read_status(job_id, jobs_dir) is None:
+        return
+    if future.cancelled():
+        update_status(job_id, jobs_dir, only_active=True, state=CANCELLED, finished_at=now())
+    elif future.exception() is not None:
+        update_status(job_id, jobs_dir, only_active=True, state=FAILED, finished_at=now(),
+                      error=str(future.exception()))
+
+def submit(options=None, jobs_dir=JOBS_DIR):
+    options = dict(options or {})
+    job_id = time.strftime("%Y%m%dT%H%M%S", time.gmtime()) + "-" + uuid.uuid4().hex[:6]
+    os.makedirs(job_dir(job_id, jobs_dir))
+    status = {"id": job_id, "state": QUEUED, "options": options, "created_at": now(),
+              "started_at": None, "finished_at": None, "progress": {}, "result": None, "error": None}
+    write_status(job_id, status, jobs_dir)
+
+    try:
+        executor = get_executor()
+        try:
+            future = executor.submit(run_job, job_id, options, jobs_dir)
+        except BrokenProcessPool:  # broken before _job_done could drop it
+            discard_executor(executor)
+            executor = get_executor()
+            future = executor.submit(run_job, job_id, options, jobs_dir)
+    except Exception as e:  # the job never runs: do not leave it queued
+        update_status(job_id, jobs_dir, state=FAILED, finished_at=now(), error=f"Could not start the job: {e}")
+        raise
+    _futures[job_id] = future
+    future.add_done_callback(lambda f: _job_done(job_id, f, jobs_dir, executor))
+    return status
+
+def get(job_id, jobs_dir=JOBS_DIR):
+    return read_status(job_id, jobs_dir)
+
+def list_jobs(jobs_dir=JOBS_DIR):
+    if not os.path.isdir(jobs_dir):
+        return []
+    jobs = []
+    for job_id in sorted(os.listdir(jobs_dir), reverse=True):
+        status = read_status(job_id, jobs_dir)
+        if status is not None:
+            status.pop("result", None)  # full metrics are served per job
+            jobs.append(status)
+    return jobs
+
+def read_log(job_id, jobs_dir=JOBS_DIR):
+    if read_status(job_id, jobs_dir) is None:
+        return None
+    log_path = os.path.join(job_dir(job_id, jobs_dir), "train.log")
+    if not os.path.exists(log_path):
+        return []
+    with open(log_path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+# Queued jobs are dropped from the pool; running jobs stop at their next progress report,
+# before anything is promoted
+def cancel(job_id, jobs_dir=JOBS_DIR):
+    status = read_status(job_id, jobs_dir)
+    if status is None or status["state"] in FINISHED_STATES:
+        return status
+    open(os.path.join(job_dir(job_id, jobs_dir), "CANCEL"), "w").close()
+    future = _futures.get(job_id)
+    if future is not None and future.cancel():
+        return update_status(job_id, jobs_dir, only_active=True, state=CANCELLED, finished_at=now())
+    return read_status(job_id, jobs_dir)
@@ -7,75 +7,100 @@ from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score, c
 from sklearn.model_selection import RandomizedSearchCV
 from sklearn.utils.class_weight import compute_sample_weight
 import os
+import time
 import numpy as np
+from feature_pipeline import load_pipeline, TARGET_COL
+from dataset_cache import load_cached
+from model_bundle import save_bundle, promote_bundle, load_bundle, load_legacy_bundle, current_bundle_path
+from incremental_training import (log_position, read_feedback, feedback_features, holdout_split,
+                                  add_trees, holdout_mae, NEW_TREES, MIN_FEEDBACK_ROWS)
+from compact_forest import CompactForest, node_bytes
+import training_jobs
+from hyperparameter_search import successive_halving_search
+from metrics import instrument
 
 app = Flask(__name__)
+instrument(app, "training_services")
 
 # Ensure the models directory exists
 os.makedirs("models", exist_ok=True)
 
-# Load saved encoders
-def load_encoders():
-    encoders = {}
-    encoder_dir = "models/encoder"
-    
-    # Load encoders for categorical features
-    for col in ['Airline', 'Source', 'Destination', 'Route', 'Total_Stops', 'Additional_Info']:
-        encoder_path = os.path.join(encoder_dir, f"{col}_encoder.pkl")
-        if os.path.exists(encoder_path):
-            encoders[col] = joblib.load(encoder_path)
-    
-    return encoders
-
-# Apply encoders to dataset (handling unseen values)
-def apply_encoding(df, encoders):
-    for col, encoder in encoders.items():
-        if col in df:
-            df[col] = df[col].apply(lambda x: encoder.transform([x])[0] if x in encoder.classes_ else -1)
-    return df
-
-# Load preprocessed data & apply encoding/scaling
+# Load the processed dataset; feature engineering already encoded and scaled it with the saved pipeline
 def load_data():
     processed_data_path = "data/processed_airfare_data.csv"
     
     if not os.path.exists(processed_data_path):
         return None, "Preprocessed data not found. Run feature_engineering first!"
     
-    df = pd.read_csv(processed_data_path)
-
-    # Apply categorical encoding
-    encoders = load_encoders()
-    df = apply_encoding(df, encoders)
+    df = load_cached(processed_data_path)
 
     # Extract features and target variable
-    X = df.drop(columns=['Price'])
-    y = df['Price']
+    X = df.drop(columns=[TARGET_COL])
+    y = df[TARGET_COL]
 
     return X, y
 
-@app.route("/train", methods=["POST"])
-def train_model():
-    try:
-        # Load the processed dataset
-        X, y = load_data()
-        if X is None:
-            return jsonify({"status": "Error", "message": y})  # y contains error message
+# Parameters fitted by {"search": "fixed"} unless overridden with {"params": {...}}
+FIXED_PARAMS = {'n_estimators': 300, 'max_depth': 20, 'min_samples_split': 5, 'min_samples_leaf': 1}
+
+# Split model-ready arrays into training and holdout sets
+def split_data(pipeline, X, y):
+    return pipeline, train_test_split(X, y, test_size=0.2, random_state=42)
+
+# Processed data split into training and holdout arrays (pipeline feature order), and the pipeline
+def load_split():
+    X, y = load_data()
+    if X is None:
+        raise ValueError(y)  # y contains error message
+
+    # The fitted transforms the dataset was produced with; they travel with the model in its bundle
+    pipeline = load_pipeline()
+    if list(X.columns) != pipeline.feature_order:
+        raise ValueError("Processed data does not match the saved feature pipeline. Rerun feature_engineering!")
+
+    # Split data into training and testing sets
+    return split_data(pipeline, X.to_numpy(dtype=np.float64), y.to_numpy())
 
-        # Split data into training and testing sets
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# Write a file next to its destination and move it into place in one step
+def atomic_dump(obj, path):
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
 
-        # Load scaler (already applied in feature engineering)
-        scaler = joblib.load("models/encoder/scaler.pkl")
+# Full training run: search, fit, evaluate, then atomically promote the new model.
+# progress(dict) is called as the run advances (it may raise to abort); log(str) receives messages.
+# data=(pipeline, X, y) trains on arrays already in memory instead of the processed CSV.
+def run_training(options=None, progress=None, log=print, data=None):
+    options = options or {}
+    if options.get("mode", "full") == "incremental":
+        return run_incremental_training(options, progress, log)
+    report_progress = progress or (lambda update: None)
+    feedback_position = log_position()  # feedback logged after this point is new to this model
 
-        # Identify numerical columns
-        numerical_cols = ['Duration', 'Journey_day', 'Journey_month', 
-                          'Dep_Time_hour', 'Dep_Time_minute', 
-                          'Arrival_Time_hour', 'Arrival_Time_minute']
+    # Load the processed dataset and its fitted pipeline
+    report_progress({"stage": "loading_data"})
+    pipeline, (X_train, X_test, y_train, y_test) = load_split() if data is None else split_data(*data)
+    log(f"Loaded {len(X_train) + len(X_test)} rows with {X_train.shape[1]} features")
 
-        # Apply scaling only to numerical features
-        X_train[numerical_cols] = scaler.transform(X_train[numerical_cols])
-        X_test[numerical_cols] = scaler.transform(X_test[numerical_cols])
+    # Sample weighting used by the final model
+    sample_weights = compute_sample_weight("balanced", y_train)
 
+    # Hyperparameter search: successive halving (default) or the original randomized search
+    search_mode = options.get("search", "halving")
+    search_start = time.perf_counter()
+    report_progress({"stage": "search", "search": search_mode})
+    log(f"Starting {search_mode} hyperparameter search")
+
+    if search_mode == "halving":
+        best_params, search_report = successive_halving_search(
+            X_train, y_train, sample_weights, progress=lambda update: report_progress(dict(update, stage="search")))
+
+        # Fit the winner once on the full training split, with the same weighting used in the search
+        report_progress({"stage": "final_fit"})
+        best_rf_model = RandomForestRegressor(random_state=42, n_jobs=-1, **best_params)
+        best_rf_model.fit(X_train, y_train, sample_weight=sample_weights)
+        best_rf_model.set_params(n_jobs=None)
+    elif search_mode == "random":
         # Hyperparameter tuning options
         param_grid = {
             'n_estimators': [100, 200, 300],
@@ -83,47 +108,259 @@ def train_model():
             'min_samples_split': [2, 5, 10],
             'min_samples_leaf': [1, 2, 4]
         }
-        
+
         rf_model = RandomForestRegressor(random_state=42)
         rf_search = RandomizedSearchCV(rf_model, param_grid, n_iter=10, cv=5, scoring='neg_mean_absolute_error', n_jobs=-1, random_state=42)
         rf_search.fit(X_train, y_train)
 
         # Get the best model
         best_rf_model = rf_search.best_estimator_
+        best_params = rf_search.best_params_
+        search_report = None
 
         # Apply sample weighting
-        sample_weights = compute_sample_weight("balanced", y_train)
+        report_progress({"stage": "final_fit"})
+        best_rf_model.fit(X_train, y_train, sample_weight=sample_weights)
+    elif search_mode == "fixed":
+        # No search: fit the given parameters
+        best_params = dict(FIXED_PARAMS, **options.get("params", {}))
+        search_report = None
+        report_progress({"stage": "final_fit"})
+        best_rf_model = RandomForestRegressor(random_state=42, n_jobs=-1, **best_params)
         best_rf_model.fit(X_train, y_train, sample_weight=sample_weights)
+        best_rf_model.set_params(n_jobs=None)
+    else:
+        raise ValueError(f"Unknown search mode: {search_mode}")
+
+    search_time = time.perf_counter() - search_start
+    log(f"Search finished in {search_time:.1f}s, best params: {best_params}")
 
-        # Evaluate the model
-        y_pred = best_rf_model.predict(X_test)
-        mae = mean_absolute_error(y_test, y_pred)
-        mse = mean_squared_error(y_test, y_pred)
-        r2 = r2_score(y_test, y_pred)
+    # Evaluate the model
+    report_progress({"stage": "evaluating"})
+    y_pred = best_rf_model.predict(X_test)
+    mae = mean_absolute_error(y_test, y_pred)
+    mse = mean_squared_error(y_test, y_pred)
+    r2 = r2_score(y_test, y_pred)
+    log(f"Holdout MAE={mae:.2f} MSE={mse:.2f} R2={r2:.4f}")
+
+    # Convert continuous predictions to categorical labels for classification report & confusion matrix
+    y_test_labels = np.digitize(y_test, bins=np.histogram(y_test, bins=5)[1])
+    y_pred_labels = np.digitize(y_pred, bins=np.histogram(y_pred, bins=5)[1])
+    conf_matrix = confusion_matrix(y_test_labels, y_pred_labels).tolist()
+    class_report = classification_report(y_test_labels, y_pred_labels, output_dict=True)
+
+    # Write the inference bundle (model + feature pipeline) without promoting it yet
+    bundle_path = save_bundle(best_rf_model, pipeline, {
+        "params": best_params,
+        "search": search_mode,
+        "metrics": {"MAE": float(mae), "MSE": float(mse), "R2_Score": float(r2)},
+        "n_train_rows": int(len(X_train)),
+        "feedback_log": feedback_position,
+        "training_data": pipeline.source,  # rows the fare index is built from (see fare_index)
+    }, promote=False)
+
+    # Promote: replace the legacy model file and switch the bundle pointer, each in one atomic step
+    report_progress({"stage": "promoting"})
+    atomic_dump(best_rf_model, "models/flight_fare_model.pkl")  # kept for existing tooling
+    promote_bundle(bundle_path)
+    log(f"Promoted {bundle_path}")
+
+    return {
+        "message": "Model trained successfully!",
+        "bundle": bundle_path,
+        "MAE": mae,
+        "MSE": mse,
+        "R2_Score": r2,
+        "Confusion_Matrix": conf_matrix,
+        "Classification_Report": class_report,
+        "Search": {
+            "mode": search_mode,
+            "best_params": best_params,
+            "wall_time": round(search_time, 3),
+            "evaluations": sum(c["evaluations"] for c in search_report) if search_report else None,
+            "candidates": search_report
+        }
+    }
 
-        # Convert continuous predictions to categorical labels for classification report & confusion matrix
-        y_test_labels = np.digitize(y_test, bins=np.histogram(y_test, bins=5)[1])
-        y_pred_labels = np.digitize(y_pred, bins=np.histogram(y_pred, bins=5)[1])
-        conf_matrix = confusion_matrix(y_test_labels, y_pred_labels).tolist()
-        class_report = classification_report(y_test_labels, y_pred_labels, output_dict=True)
+# Incremental update: add trees fitted on feedback logged since the current model was built,
+# and promote the result only if it is at least as accurate on a holdout of that feedback
+def run_incremental_training(options=None, progress=None, log=print):
+    options = options or {}
+    report_progress = progress or (lambda update: None)
+    start = time.perf_counter()
 
-        # Save the trained model
-        model_path = "models/flight_fare_model.pkl"
-        joblib.dump(best_rf_model, model_path)
+    # Private copy of the current model (not memory-mapped: it is about to be modified)
+    report_progress({"stage": "loading_model"})
+    path = current_bundle_path()
+    bundle = load_bundle(path, mmap_mode=None) if path else load_legacy_bundle()
+    if bundle is None:
+        raise ValueError("No trained model found. Run a full training first!")
 
+    # Only rows logged after the current version
+    report_progress({"stage": "loading_feedback"})
+    df, position = read_feedback(bundle.metadata.get("feedback_log"))
+    min_rows = int(options.get("min_rows", MIN_FEEDBACK_ROWS))
+    if len(df) < max(min_rows, 2):
+        raise ValueError(f"Only {len(df)} new feedback rows with Actual_Price since model version "
+                         f"{bundle.version}; at least {max(min_rows, 2)} are needed.")
+    X, y, invalid_rows = feedback_features(df, bundle)
+    if len(y) < 2:
+        raise ValueError("Not enough valid feedback rows to train and evaluate on.")
+    log(f"Loaded {len(y)} new feedback rows ({invalid_rows} invalid) since model version {bundle.version}")
+
+    fit_idx, holdout_idx = holdout_split(len(y), options.get("holdout", 0.2))
+    X_fit, y_fit = X[fit_idx], y[fit_idx]
+    X_holdout, y_holdout = X[holdout_idx], y[holdout_idx]
+    current_mae = holdout_mae(bundle.model, X_holdout, y_holdout)
+
+    # Grow the forest with trees fitted on the new rows only
+    report_progress({"stage": "fitting"})
+    n_trees = int(options.get("n_estimators", NEW_TREES))
+    model = add_trees(bundle.model, X_fit, y_fit, n_trees)
+    candidate_mae = holdout_mae(model, X_holdout, y_holdout)
+    log(f"Holdout MAE: current={current_mae:.2f} candidate={candidate_mae:.2f}")
+
+    promoted = candidate_mae <= current_mae or bool(options.get("force"))
+    bundle_path = save_bundle(model, bundle.pipeline, {
+        "params": model.get_params(),
+        "search": "incremental",
+        "parent_version": bundle.version,
+        "metrics": {"holdout_MAE": candidate_mae, "parent_holdout_MAE": current_mae},
+        "n_train_rows": int(len(y_fit)),
+        "feedback_log": position,
+        "training_data": bundle.metadata.get("training_data"),  # the itineraries are the parent's
+    }, promote=False)
+
+    if promoted:
+        report_progress({"stage": "promoting"})
+        atomic_dump(model, "models/flight_fare_model.pkl")  # kept for existing tooling
+        promote_bundle(bundle_path)
+        log(f"Promoted {bundle_path}")
+    else:
+        log(f"Kept model version {bundle.version}; {bundle_path} was not promoted")
+
+    return {
+        "message": "Model updated incrementally!" if promoted else "Updated model was less accurate and was not promoted.",
+        "bundle": bundle_path,
+        "promoted": promoted,
+        "parent_version": bundle.version,
+        "new_rows": int(len(y)),
+        "invalid_rows": invalid_rows,
+        "holdout_rows": int(len(y_holdout)),
+        "trees_added": n_trees,
+        "n_estimators": len(model.estimators_),
+        "Holdout_MAE": {"current": current_mae, "candidate": candidate_mae},
+        "wall_time": round(time.perf_counter() - start, 3)
+    }
+
+# Size, load time, latency and holdout accuracy of one bundle file
+def measure_variant(name, path, X_test, y_test, reference=None):
+    start = time.perf_counter()
+    bundle = load_bundle(path, mmap_mode=None)
+    load_seconds = time.perf_counter() - start
+    y_pred = bundle.model.predict(X_test)
+    start = time.perf_counter()
+    bundle.model.predict(X_test[:1])
+    predict_ms = (time.perf_counter() - start) * 1000
+    return {
+        "variant": name,
+        "bundle": path,
+        "file_bytes": os.path.getsize(path),
+        "memory_bytes": int(node_bytes(bundle.model)),
+        "nodes": int(bundle.model.node_count) if isinstance(bundle.model, CompactForest)
+                 else int(sum(tree.tree_.node_count for tree in bundle.model.estimators_)),
+        "load_seconds": round(load_seconds, 4),
+        "predict_1_row_ms": round(predict_ms, 3),
+        "MAE": float(mean_absolute_error(y_test, y_pred)),
+        "max_abs_diff": float(np.abs(y_pred - reference).max()) if reference is not None else 0.0,
+    }, y_pred
+
+# Write compact variants of a bundle's forest and report them next to the original.
+# Options: "bundle" (default: current), "n_trees" (list of tree counts to also try), "promote" (variant name)
+def compact_model(options=None):
+    options = options or {}
+    path = options.get("bundle") or current_bundle_path()
+    if path is None:
+        raise ValueError("No model bundle found. Run a training first!")
+    bundle = load_bundle(path, mmap_mode=None)
+    pipeline, (X_train, X_test, y_train, y_test) = load_split()
+
+    original, reference = measure_variant("original", path, X_test, y_test)
+    report = [original]
+    variants = [("compact", None, np.float32), ("compact_float64", None, np.float64)]
+    variants += [(f"compact_{n}_trees", int(n), np.float32) for n in options.get("n_trees", [])]
+    for name, n_trees, value_dtype in variants:
+        compact = CompactForest(bundle.model, n_trees=n_trees, value_dtype=value_dtype)
+        variant_path = save_bundle(compact, bundle.pipeline, dict(
+            {k: v for k, v in bundle.metadata.items() if k in ("params", "search", "feedback_log", "n_train_rows", "training_data")},
+            parent_version=bundle.version, variant=name), promote=False)
+        entry, _ = measure_variant(name, variant_path, X_test, y_test, reference)
+        report.append(entry)
+
+    promote = options.get("promote")
+    if promote:
+        chosen = next((entry for entry in report if entry["variant"] == promote), None)
+        if chosen is None:
+            raise ValueError(f"Unknown variant: {promote}")
+        promote_bundle(chosen["bundle"])
+    return report
+
+@app.route("/compact", methods=["POST"])
+def compact():
+    try:
+        options = request.get_json(silent=True) or {}
+        return jsonify({"status": "Success", "message": "Model variants written!", "variants": compact_model(options),
+                        "promoted": options.get("promote")})
+    except Exception as e:
+        return jsonify({"status": "Error", "message": str(e)})
+
+# Start a training job (or train inline with {"sync": true})
+@app.route("/train", methods=["POST"])
+def train_model():
+    try:
+        options = request.get_json(silent=True) or {}
+        if options.get("sync"):
+            return jsonify(dict(run_training(options), status="Success"))
+
+        job = training_jobs.submit(options)
         return jsonify({
             "status": "Success",
-            "message": "Model trained successfully!",
-            "MAE": mae,
-            "MSE": mse,
-            "R2_Score": r2,
-            "Confusion_Matrix": conf_matrix,
-            "Classification_Report": class_report
-        })
-        
+            "message": "Training job started!",
+            "job_id": job["id"],
+            "job_status": job["state"]
+        }), 202
 
     except Exception as e:
         return jsonify({"status": "Error", "message": str(e)})
 
+# List training jobs, newest first
+@app.route("/train/jobs", methods=["GET"])
+def list_training_jobs():
+    return jsonify({"status": "Success", "jobs": training_jobs.list_jobs()})
+
+# Job status, progress and (when finished) metrics
+@app.route("/train/jobs/<job_id>", methods=["GET"])
+def training_job_status(job_id):
+    job = training_jobs.get(job_id)
+    if job is None:
+        return jsonify({"status": "Error", "message": "Job not found!"}), 404
+    return jsonify({"status": "Success", "job": job})
+
+# Job log lines
+@app.route("/train/jobs/<job_id>/logs", methods=["GET"])
+def training_job_logs(job_id):
+    logs = training_jobs.read_log(job_id)
+    if logs is None:
+        return jsonify({"status": "Error", "message": "Job not found!"}), 404
+    return jsonify({"status": "Success", "logs": logs})
+
+# Cancel a queued or running job
+@app.route("/train/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_training_job(job_id):
+    job = training_jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"status": "Error", "message": "Job not found!"}), 404
+    return jsonify({"status": "Success", "job": job})
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5004, debug=True)
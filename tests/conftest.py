@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+import pandas as pd
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Services import each other as top-level modules from dev/, and data.database from the project root
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "dev"))
+
+DATA_DIR = os.path.join(ROOT, "tests", "data")
+PREPROCESSED_SAMPLE = os.path.join(DATA_DIR, "preprocessed_sample.csv")
+
+@pytest.fixture(scope="session")
+def model_workspace(tmp_path_factory):
+    """Project-like directory whose models/bundles/ holds a current bundle: a small forest
+    trained on tests/data/preprocessed_sample.csv (no fare index)."""
+    from sklearn.ensemble import RandomForestRegressor
+    from fare_schema import apply_schema
+    from feature_pipeline import FeaturePipeline, TARGET_COL
+    from model_bundle import save_bundle
+
+    root = tmp_path_factory.mktemp("workspace")
+    df = apply_schema(pd.read_csv(PREPROCESSED_SAMPLE))
+    pipeline = FeaturePipeline.fit(df)
+    pipeline.source = PREPROCESSED_SAMPLE
+    X = pipeline.transform_array(df[pipeline.feature_order])
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X, df[TARGET_COL].to_numpy())
+    bundle_dir = root / "models" / "bundles"
+    path = save_bundle(model, pipeline, {"training_data": PREPROCESSED_SAMPLE}, bundle_dir=str(bundle_dir), promote=False)
+    (bundle_dir / "CURRENT").write_text(os.path.basename(path), encoding="utf-8")
+    return root
+
+@pytest.fixture
+def records():
+    """Itineraries of the preprocessed sample as /predict payloads (JSON types)."""
+    df = pd.read_csv(PREPROCESSED_SAMPLE).drop(columns=["Price"])
+    return json.loads(df.to_json(orient="records"))
+
+@pytest.fixture
+def inference_client(model_workspace, monkeypatch):
+    """Test client of the inference service, serving the workspace's bundle with an empty cache."""
+    monkeypatch.chdir(model_workspace)
+    import inference_service
+    inference_service.prediction_cache.clear()
+    return inference_service.app.test_client()
@@ -0,0 +1,58 @@
+import glob
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import ROOT
+from category_encoding import CategoryLookup, UNKNOWN_CODE, compile_encoder, load_lookups, apply_lookups
+
+ENCODER_PATHS = sorted(glob.glob(os.path.join(ROOT, "models", "encoder", "*_encoder.pkl"))
+                       + glob.glob(os.path.join(ROOT, "models", "encoder_*.pkl")))
+
+@pytest.mark.parametrize("path", ENCODER_PATHS, ids=os.path.basename)
+def test_lookup_codes_match_label_encoder(path):
+    encoder = joblib.load(path)
+    lookup = compile_encoder(encoder)
+    classes = encoder.classes_
+    expected = encoder.transform(classes)
+    assert [lookup.encode(value) for value in classes] == expected.tolist()
+    assert [lookup.encode(value) for value in classes.tolist()] == expected.tolist()  # plain Python values too
+    assert np.array_equal(lookup.encode_many(pd.Series(classes)), expected)
+    assert np.array_equal(lookup.encode_many(pd.Series(classes[::-1]).astype("category")), expected[::-1])
+    assert [lookup.decode(code) for code in expected] == classes.tolist()
+
+def test_committed_encoders_cover_every_column():
+    lookups = load_lookups(os.path.join(ROOT, "models", "encoder"))
+    assert set(lookups) == {"Airline", "Source", "Destination", "Route", "Total_Stops", "Additional_Info"}
+    assert lookups["Total_Stops"].classes_.dtype.kind == "i"
+
+def test_integer_classes():
+    encoder = joblib.load(os.path.join(ROOT, "models", "encoder", "Total_Stops_encoder.pkl"))
+    lookup = compile_encoder(encoder)
+    stops = np.array([2, 0, 4, 1])
+    assert np.array_equal(lookup.encode_many(stops), encoder.transform(stops))
+    assert lookup.encode(np.int64(1)) == lookup.encode(1) == encoder.transform([1])[0]
+    assert lookup.encode(99) == UNKNOWN_CODE
+
+def test_unseen_values_are_unknown():
+    lookup = CategoryLookup(["Air India", "IndiGo", "SpiceJet"])
+    assert lookup.encode("Vistara") == UNKNOWN_CODE
+    assert "Vistara" not in lookup and "IndiGo" in lookup
+    values = pd.Series(["IndiGo", "Vistara", None, "SpiceJet"])
+    assert lookup.encode_many(values).tolist() == [1, UNKNOWN_CODE, UNKNOWN_CODE, 2]
+    assert lookup.encode_many(values.astype("category")).tolist() == [1, UNKNOWN_CODE, UNKNOWN_CODE, 2]
+    assert lookup.decode(UNKNOWN_CODE) is None
+
+def test_unhashable_values_fall_back_to_unknown():
+    lookup = CategoryLookup(["Air India", "IndiGo"])
+    assert lookup.encode(["IndiGo"]) == UNKNOWN_CODE
+    assert lookup.encode({"airline": "IndiGo"}) == UNKNOWN_CODE
+    values = pd.Series(["IndiGo", ["IndiGo"], "Air India", {"a": 1}], dtype=object)
+    assert lookup.encode_many(values).tolist() == [1, UNKNOWN_CODE, 0, UNKNOWN_CODE]
+
+def test_apply_lookups_encodes_in_place():
+    df = pd.DataFrame({"Airline": ["IndiGo", "Vistara"], "Duration": [120, 90]})
+    apply_lookups(df, {"Airline": CategoryLookup(["Air India", "IndiGo"]), "Source": CategoryLookup(["Delhi"])})
+    assert df["Airline"].tolist() == [1, UNKNOWN_CODE]
+    assert df["Duration"].tolist() == [120, 90]
@@ -0,0 +1,25 @@
+from data import database
+from data.database import ConnectionPool, bulk_insert_ingested
+from preprocessing import transform_chunk
+from test_preprocessing import RAW
+
+def test_preprocessed_rows_link_to_their_own_raw_row(tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "airfare.db"))
+    monkeypatch.setattr(database, "pool", pool)
+    with pool.connection() as conn, conn:
+        # Another row inserted alongside each raw row leaves gaps in the batch's ids
+        conn.execute("""
+            CREATE TRIGGER audit AFTER INSERT ON Airfare_Prices WHEN NEW.Airline != 'audit'
+            BEGIN INSERT INTO Airfare_Prices (Airline) VALUES ('audit'); END
+        """)
+
+    assert bulk_insert_ingested(RAW, transform_chunk(RAW.copy())) == len(RAW)
+    with pool.connection() as conn:
+        rows = conn.execute("""
+            SELECT a.Airline, a.Price, p.Airline, p.Price FROM Preprocessed_Airfare p
+            JOIN Airfare_Prices a ON a.id = p.fare_id ORDER BY p.fare_id
+        """).fetchall()
+    pool.close()
+    assert [(airline, float(price)) for airline, price, _, _ in rows] == \
+        list(zip(RAW["Airline"], RAW["Price"].astype(float)))
+    assert all(row[0] == row[2] and float(row[1]) == float(row[3]) for row in rows)
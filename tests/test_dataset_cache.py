@@ -0,0 +1,98 @@
+import os
+import shutil
+import pandas as pd
+import pytest
+import dataset_cache
+from conftest import DATA_DIR, PREPROCESSED_SAMPLE
+from dataset_cache import load_cached, read_cache
+from fare_schema import apply_schema
+
+RAW_SAMPLE = os.path.join(DATA_DIR, "raw_sample.csv")
+
+@pytest.fixture
+def source(tmp_path):
+    # A private copy, so tests can touch and rewrite it
+    path = str(tmp_path / "fares.csv")
+    shutil.copy(RAW_SAMPLE, path)
+    return path
+
+def entries(cache_dir):
+    return sorted(name for source_dir in os.listdir(cache_dir) for name in os.listdir(os.path.join(cache_dir, source_dir)))
+
+def assert_same_frame(cached, expected):
+    # Categories may come back in a different order; values and dtypes must not
+    assert list(cached.columns) == list(expected.columns)
+    for col in expected.columns:
+        if isinstance(expected[col].dtype, pd.CategoricalDtype):
+            assert isinstance(cached[col].dtype, pd.CategoricalDtype), col
+            assert cached[col].astype(object).equals(expected[col].astype(object)), col
+        else:
+            assert cached[col].dtype == expected[col].dtype, col
+            pd.testing.assert_series_equal(cached[col], expected[col])
+
+@pytest.mark.parametrize("path", [RAW_SAMPLE, PREPROCESSED_SAMPLE], ids=os.path.basename)
+def test_cached_csv_round_trips(path, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    expected = apply_schema(pd.read_csv(path))
+    assert_same_frame(load_cached(path, cache_dir=cache_dir), expected)  # builds the entry
+    assert_same_frame(load_cached(path, cache_dir=cache_dir), expected)  # reads it back
+
+def test_cached_excel_round_trips(tmp_path):
+    path = str(tmp_path / "fares.xlsx")
+    pd.read_csv(RAW_SAMPLE).to_excel(path, index=False)
+    cache_dir = str(tmp_path / "cache")
+    load_cached(path, cache_dir=cache_dir)
+    assert_same_frame(load_cached(path, cache_dir=cache_dir), apply_schema(pd.read_excel(path)))
+
+def test_selected_columns_come_back_in_the_requested_order(source, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    cached = load_cached(source, ["Price", "Airline"], cache_dir=cache_dir)
+    assert_same_frame(cached, apply_schema(pd.read_csv(source))[["Price", "Airline"]])
+    with pytest.raises(KeyError):
+        load_cached(source, ["Price", "Fare_Class"], cache_dir=cache_dir)
+
+def test_changed_source_is_rebuilt_and_stale_entry_removed(source, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    assert load_cached(source, cache_dir=cache_dir)["Price"].iloc[0] == pd.read_csv(source)["Price"].iloc[0]
+    [old_entry] = entries(cache_dir)
+
+    df = pd.read_csv(source)
+    df.loc[0, "Price"] = 12345
+    df.to_csv(source, index=False)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # same second on coarse clocks
+
+    assert load_cached(source, cache_dir=cache_dir)["Price"].iloc[0] == 12345
+    [new_entry] = entries(cache_dir)
+    assert new_entry != old_entry
+
+def test_touched_source_is_rebuilt(source, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    load_cached(source, cache_dir=cache_dir)
+    [old_entry] = entries(cache_dir)
+    stat = os.stat(source)
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    load_cached(source, cache_dir=cache_dir)
+    assert entries(cache_dir) != [old_entry] and len(entries(cache_dir)) == 1
+
+def test_format_version_bump_forces_a_rebuild(source, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    load_cached(source, cache_dir=cache_dir)
+    [old_entry] = entries(cache_dir)
+    assert old_entry.endswith(f"-v{dataset_cache.CACHE_FORMAT}")
+
+    monkeypatch.setattr(dataset_cache, "CACHE_FORMAT", dataset_cache.CACHE_FORMAT + 1)
+    written = []
+    original = dataset_cache.write_cache
+    monkeypatch.setattr(dataset_cache, "write_cache", lambda *args: written.append(args) or original(*args))
+    assert_same_frame(load_cached(source, cache_dir=cache_dir), apply_schema(pd.read_csv(source)))
+    assert len(written) == 1
+    [new_entry] = entries(cache_dir)
+    assert new_entry.endswith(f"-v{dataset_cache.CACHE_FORMAT}") and new_entry != old_entry
+
+def test_existing_entry_is_not_reparsed(source, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    load_cached(source, cache_dir=cache_dir)
+    monkeypatch.setattr(dataset_cache, "_read_source", lambda path: pytest.fail("source parsed again"))
+    entry_dir = dataset_cache._entry_dir(source, cache_dir)
+    assert_same_frame(read_cache(entry_dir), load_cached(source, cache_dir=cache_dir))
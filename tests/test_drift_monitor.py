@@ -0,0 +1,28 @@
+from drift_monitor import DriftMonitor
+from prediction_log import PredictionLog
+
+def monitor(tmp_path):
+    return DriftMonitor(reference_file=str(tmp_path / "missing.csv"))
+
+def test_monitors_over_one_log_agree_and_replay_after_restart(tmp_path):
+    log = PredictionLog(str(tmp_path / "inference_logs.csv"))
+    first, second = monitor(tmp_path), monitor(tmp_path)
+    for i in range(5):
+        log.append({"Airline": "IndiGo", "Total_Stops": 1, "Predicted_Price": 5000 + i, "Actual_Price": 4000})
+    log.flush()
+    first.sync(log)
+    second.sync(log)
+    log.append({"Airline": "Air India", "Predicted_Price": 7000})
+    log.flush()
+    first.sync(log)
+    first.sync(log)  # nothing new: no row counted twice
+
+    restarted = monitor(tmp_path)
+    restarted.sync(PredictionLog(log.path))
+    second.sync(log)
+    for m in (first, second, restarted):
+        stats = m.stats()
+        assert stats["rows_seen"] == 6
+        assert stats["accuracy"]["lifetime_rows"] == 5
+        assert stats["accuracy"]["lifetime_mae"] == 1002.0
+        assert stats["categorical"]["Total_Stops"]["frequencies"] == {"1": 5}
@@ -0,0 +1,159 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+from fare_index import (HOURS, PAIR_STRIDE, FareIndex, build_index, date_code, has_index, index_dir,
+                        latest_index_dir)
+from model_bundle import current_bundle_path, load_bundle
+
+def built(bundle_path, mtime):
+    os.makedirs(index_dir(bundle_path))
+    manifest = os.path.join(index_dir(bundle_path), "manifest.json")
+    with open(manifest, "w", encoding="utf-8") as f:
+        f.write("{}")
+    os.utime(manifest, ns=(mtime, mtime))
+
+def test_pending_bundle_falls_back_to_the_latest_built_index(tmp_path):
+    bundles = [str(tmp_path / f"v{i}.joblib") for i in range(3)]
+    built(bundles[0], 1_000_000_000)
+    built(bundles[1], 2_000_000_000)
+    os.makedirs(index_dir(bundles[2]) + ".tmp-123")  # a build in progress is not an index
+
+    assert not has_index(bundles[2])
+    assert latest_index_dir(bundles[2]) == index_dir(bundles[1])
+
+@pytest.fixture(scope="module")
+def indexed_workspace(model_workspace, tmp_path_factory):
+    """A copy of the model workspace whose current bundle has its fare index built."""
+    root = tmp_path_factory.mktemp("indexed") / "workspace"
+    shutil.copytree(model_workspace, root)
+    build_index(current_bundle_path(str(root / "models" / "bundles")))
+    return root
+
+@pytest.fixture(scope="module")
+def indexed(indexed_workspace):
+    bundle_path = current_bundle_path(str(indexed_workspace / "models" / "bundles"))
+    return load_bundle(bundle_path), FareIndex(index_dir(bundle_path))
+
+def itinerary_records(index, rows, hour):
+    records = []
+    for row in rows:
+        it = index.manifest["itineraries"][index.itinerary[row]]
+        code = int(index.key[row]) % PAIR_STRIDE
+        arrival = hour * 60 + it["duration"]
+        records.append({
+            "Airline": it["airline"], "Source": it["source"], "Destination": it["destination"],
+            "Route": it["route"], "Total_Stops": it["total_stops"], "Additional_Info": it["additional_info"],
+            "Duration": it["duration"], "Journey_day": code % 32, "Journey_month": code // 32,
+            "Dep_Time_hour": hour, "Dep_Time_minute": 0,
+            "Arrival_Time_hour": arrival // 60 % 24, "Arrival_Time_minute": arrival % 60,
+        })
+    return records
+
+def test_indexed_prices_equal_model_predictions(indexed):
+    bundle, index = indexed
+    rows = np.random.RandomState(0).choice(len(index.key), 300, replace=False)
+    for hour in range(HOURS):
+        df = pd.DataFrame(itinerary_records(index, rows, hour))
+        X = bundle.pipeline.transform_array(df[bundle.feature_order])
+        expected = np.round(bundle.predictor.predict(X), 2).astype(np.float32)
+        assert np.array_equal(index.prices[hour, rows], expected), hour
+    assert np.array_equal(index.min_price, index.prices.min(axis=0))
+    assert np.array_equal(index.min_hour, index.prices.argmin(axis=0))
+
+# Per-day cheapest and mean price, straight from the grid
+def brute_force_trends(index, source, destination, start, end, airline=None, stops=None, hours=(0, HOURS - 1)):
+    pair = index.pairs[(source, destination)]
+    itineraries = index.manifest["itineraries"]
+    days = {}
+    for row in range(len(index.key)):
+        key = int(index.key[row])
+        it = itineraries[index.itinerary[row]]
+        if key // PAIR_STRIDE != pair or not date_code(*start) <= key % PAIR_STRIDE <= date_code(*end):
+            continue
+        if (airline is not None and it["airline"] != airline) or (stops is not None and it["total_stops"] != stops):
+            continue
+        prices = index.prices[hours[0]:hours[1] + 1, row]
+        days.setdefault(key % PAIR_STRIDE, []).append((prices.min(), prices.mean(), it))
+    return [{"month": code // 32, "day": code % 32,
+             "min_price": round(float(min(low for low, _, _ in rows)), 2),
+             "mean_price": round(float(np.mean([mean for _, mean, _ in rows])), 2),
+             "airlines": {it["airline"] for _, _, it in rows}}
+            for code, rows in sorted(days.items())]
+
+@pytest.mark.parametrize("query", [
+    dict(),
+    dict(airline="Jet Airways"),
+    dict(stops=1),
+    dict(airline="Air India", stops=2),
+    dict(hours=(6, 11)),
+    dict(airline="IndiGo", hours=(18, 23)),
+], ids=str)
+def test_trends_across_a_month_boundary_match_the_grid(indexed, query):
+    _, index = indexed
+    start, end = (3, 28), (4, 3)
+    days = index.trends("Delhi", "Cochin", start, end, **query)
+    expected = brute_force_trends(index, "Delhi", "Cochin", start, end, **query)
+    assert expected, query
+    dates = [(day["month"], day["day"]) for day in days]
+    assert dates == [(day["month"], day["day"]) for day in expected]
+    assert (3, 31) in dates and (4, 1) in dates
+    for day, reference in zip(days, expected):
+        assert day["min_price"] == reference["min_price"]
+        assert day["mean_price"] == pytest.approx(reference["mean_price"], abs=0.011)
+        assert day["airline"] in reference["airlines"]
+        if "airline" in query:
+            assert day["airline"] == query["airline"]
+        if "stops" in query:
+            assert day["total_stops"] == query["stops"]
+        first, last = query.get("hours", (0, HOURS - 1))
+        assert first <= day["dep_hour"] <= last
+
+def test_unknown_pairs_and_filters_match_nothing(indexed):
+    _, index = indexed
+    assert index.trends("Delhi", "Atlantis", (3, 1), (6, 30)) == []
+    assert index.trends("Delhi", "Cochin", (3, 1), (6, 30), airline="Nowhere Air") == []
+    assert index.trends("Delhi", "Cochin", (1, 1), (2, 28)) == []  # months not in the training data
+
+@pytest.fixture
+def trends_client(indexed_workspace, monkeypatch):
+    import inference_service
+    monkeypatch.chdir(indexed_workspace)
+    return inference_service.app.test_client()
+
+def test_fare_trends_endpoint(trends_client, indexed):
+    bundle, index = indexed
+    response = trends_client.get("/fare_trends", query_string={
+        "source": "Delhi", "destination": "Cochin", "date_from": "2019-03-30", "date_to": "02/04/2019",
+        "airline": "Jet Airways", "stops": 2, "dep_hour_from": 6, "dep_hour_to": 11}).get_json()
+    assert response["status"] == "Success", response
+    assert response["model_version"] == bundle.version and not response["index_pending"]
+    assert [day["date"] for day in response["days"]] == ["2019-03-30", "2019-03-31", "2019-04-01", "2019-04-02"]
+    expected = index.trends("Delhi", "Cochin", (3, 30), (4, 2), airline="Jet Airways", stops=2, hours=(6, 11))
+    for day, reference in zip(response["days"], expected):
+        assert {key: value for key, value in day.items() if key != "date"} == \
+            {key: value for key, value in reference.items() if key not in ("month", "day")}
+
+    # The cheapest hour of a day is the price /predict gives for that departure
+    day = response["days"][2]
+    it = next(it for it in index.manifest["itineraries"]
+              if (it["airline"], it["route"], it["source"]) == (day["airline"], day["route"], "Delhi"))
+    arrival = day["dep_hour"] * 60 + it["duration"]
+    record = {"Airline": it["airline"], "Source": "Delhi", "Destination": "Cochin", "Route": it["route"],
+              "Total_Stops": it["total_stops"], "Additional_Info": it["additional_info"], "Duration": it["duration"],
+              "Journey_day": 1, "Journey_month": 4, "Dep_Time_hour": day["dep_hour"], "Dep_Time_minute": 0,
+              "Arrival_Time_hour": arrival // 60 % 24, "Arrival_Time_minute": arrival % 60}
+    predicted = trends_client.post("/predict", json=record).get_json()["predicted_price"]
+    assert np.float32(predicted) == np.float32(day["min_price"])
+
+@pytest.mark.parametrize("query, message", [
+    ({"destination": "Cochin"}, "Missing source or destination."),
+    ({"source": "Delhi", "destination": "Cochin", "date_from": "2019-04-02", "date_to": "2019-03-30"},
+     "date_from must not be after date_to, within one year."),
+    ({"source": "Delhi", "destination": "Cochin", "dep_hour_from": 12, "dep_hour_to": 24},
+     "Departure hours must be within 0-23."),
+])
+def test_fare_trends_rejects_bad_queries(trends_client, query, message):
+    response = trends_client.get("/fare_trends", query_string=query).get_json()
+    assert response == {"status": "Error", "message": message}
@@ -0,0 +1,35 @@
+import io
+import numpy as np
+import pandas as pd
+from fare_schema import apply_schema
+from feature_pipeline import FeaturePipeline
+from preprocessing import transform_chunk
+from test_preprocessing import RAW
+
+def preprocessed_csv():
+    raw = pd.concat([RAW] * 50, ignore_index=True)
+    raw["Price"] = np.arange(len(raw)) * 37 + 1500
+    return transform_chunk(raw).to_csv(index=False)
+
+def test_compact_and_default_dtypes_fit_and_transform_identically():
+    text = preprocessed_csv()
+    default = pd.read_csv(io.StringIO(text))
+    compact = apply_schema(default)
+    assert compact["Airline"].dtype == "category" and compact["Duration"].dtype == np.int16
+
+    fitted = [FeaturePipeline.fit(df) for df in (default, compact)]
+    for col, classes in fitted[0].classes.items():
+        assert np.array_equal(fitted[1].classes[col], classes)
+        assert fitted[1].classes[col].dtype == classes.dtype
+    assert np.array_equal(fitted[1].scaler.mean_, fitted[0].scaler.mean_)
+    assert np.array_equal(fitted[1].scaler.scale_, fitted[0].scaler.scale_)
+    X = [pipeline.transform_array(df) for pipeline, df in zip(fitted, (default, compact))]
+    assert np.array_equal(X[0], X[1])
+    assert np.array_equal(compact["Price"].to_numpy(dtype=np.float64), default["Price"].to_numpy(dtype=np.float64))
+
+def test_only_price_is_narrowed_to_float32():
+    df = apply_schema(pd.DataFrame({"Price": [3897.0, 7662.0], "Predicted_Price": [4012.37, 7650.81],
+                                    "Actual_Price": [3897.5, 7662.25]}))
+    assert df["Price"].dtype == np.float32
+    assert df["Predicted_Price"].dtype == df["Actual_Price"].dtype == np.float64
+    assert df["Predicted_Price"].tolist() == [4012.37, 7650.81]
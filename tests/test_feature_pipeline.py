@@ -0,0 +1,47 @@
+import functools
+import numpy as np
+import pandas as pd
+import pytest
+from feature_pipeline import FeaturePipeline, FeatureStats
+
+CATEGORICAL = ["Airline", "Total_Stops"]
+NUMERICAL = ["Duration", "Dep_Time_hour", "Distance"]
+
+@pytest.fixture(scope="module")
+def frame():
+    rng = np.random.default_rng(0)
+    n = 5000
+    return pd.DataFrame({
+        "Airline": rng.choice(["IndiGo", "Air India", "Jet Airways", "SpiceJet"], n),
+        "Total_Stops": rng.integers(0, 4, n),
+        "Duration": rng.integers(5, 2900, n),
+        "Dep_Time_hour": rng.integers(0, 24, n),
+        "Distance": rng.normal(1200.0, 300.0, n),  # not integer: merged in floating point
+        "Price": rng.integers(1500, 80000, n),
+    })
+
+@pytest.mark.parametrize("chunks", [1, 3, 7])
+def test_merged_stats_match_standard_scaler_fit(frame, chunks):
+    fitted = FeaturePipeline.fit(frame, CATEGORICAL, NUMERICAL)
+    parts = [FeatureStats.from_frame(frame.iloc[rows], CATEGORICAL, NUMERICAL)
+             for rows in np.array_split(np.arange(len(frame)), chunks)]
+    merged = functools.reduce(FeatureStats.merge, parts).pipeline()
+
+    for col in CATEGORICAL:
+        assert np.array_equal(merged.classes[col], fitted.classes[col])
+    assert merged.feature_order == fitted.feature_order
+    expected, actual = fitted.scaler, merged.scaler
+    assert actual.n_samples_seen_ == expected.n_samples_seen_
+    assert list(actual.feature_names_in_) == list(expected.feature_names_in_)
+    assert np.array_equal(actual.mean_[:2], expected.mean_[:2])  # integer columns: exact
+    np.testing.assert_allclose(actual.mean_, expected.mean_, rtol=1e-13)
+    np.testing.assert_allclose(actual.var_, expected.var_, rtol=1e-13)
+    np.testing.assert_allclose(actual.scale_, expected.scale_, rtol=1e-13)
+    np.testing.assert_allclose(merged.transform_array(frame), fitted.transform_array(frame), rtol=1e-12, atol=1e-12)
+
+def test_constant_column_keeps_unit_scale(frame):
+    df = frame.assign(Dep_Time_hour=7)
+    fitted = FeaturePipeline.fit(df, CATEGORICAL, NUMERICAL)
+    merged = functools.reduce(FeatureStats.merge, [FeatureStats.from_frame(df.iloc[:100], CATEGORICAL, NUMERICAL),
+                                                   FeatureStats.from_frame(df.iloc[100:], CATEGORICAL, NUMERICAL)]).pipeline()
+    assert fitted.scaler.scale_[1] == merged.scaler.scale_[1] == 1.0
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+from compiled_forest import CompiledForest
+from compact_forest import CompactForest
+
+@pytest.fixture(scope="module")
+def forest_and_inputs():
+    rng = np.random.RandomState(0)
+    # Encoded categories and scaled numbers, like the processed dataset
+    X = np.column_stack([rng.randint(0, 12, 2000), rng.randint(0, 5, 2000), rng.normal(size=(2000, 4))])
+    y = 3000 + 900 * X[:, 0] + 1500 * X[:, 1] + 400 * np.sin(3 * X[:, 2]) + rng.normal(0, 50, 2000)
+    model = RandomForestRegressor(n_estimators=25, max_depth=12, random_state=0).fit(X, y)
+    X_test = np.vstack([X[:300], rng.normal(scale=3, size=(700, X.shape[1]))])
+    # Values exactly on a split threshold, where float32 rounding decides the branch
+    tree = model.estimators_[0].tree_
+    split = np.flatnonzero(tree.children_left != -1)[:50]
+    on_threshold = np.repeat(X_test[:1], len(split), axis=0)
+    on_threshold[np.arange(len(split)), tree.feature[split]] = tree.threshold[split]
+    return model, np.vstack([X_test, on_threshold])
+
+@pytest.mark.parametrize("max_rows", [None, 1, 256])
+def test_compiled_forest_is_bit_identical_to_sklearn(forest_and_inputs, max_rows):
+    model, X = forest_and_inputs
+    compiled = CompiledForest(model, max_rows=max_rows)
+    assert np.array_equal(compiled.predict(X), model.predict(X))
+    for row in X[:20]:  # the single-row path inference uses
+        assert np.array_equal(compiled.predict(row[None, :]), model.predict(row[None, :]))
+
+def test_compiled_forest_follows_missing_value_directions():
+    rng = np.random.RandomState(1)
+    X = rng.normal(size=(1500, 4))
+    X[rng.rand(*X.shape) < 0.1] = np.nan
+    y = np.nan_to_num(X[:, 0], nan=2.0) * 100 + rng.normal(size=1500)
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    assert np.array_equal(CompiledForest(model, max_rows=None).predict(X), model.predict(X))
+
+def test_full_compact_forest_with_float64_values_is_identical(forest_and_inputs):
+    model, X = forest_and_inputs
+    compact = CompactForest(model, value_dtype=np.float64)
+    assert np.array_equal(compact.predict(X), model.predict(X))
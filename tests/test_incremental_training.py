@@ -0,0 +1,86 @@
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import fare_index
+from conftest import PREPROCESSED_SAMPLE
+from incremental_training import FEEDBACK_LOG, holdout_split, log_position
+from model_bundle import current_bundle_path, load_bundle
+from prediction_log import PredictionLog
+from training_services import run_incremental_training
+
+@pytest.fixture
+def workspace(model_workspace, tmp_path, monkeypatch):
+    """A private copy of the model workspace (these tests promote bundles), with an empty feedback log."""
+    root = tmp_path / "workspace"
+    shutil.copytree(model_workspace, root)
+    (root / "data").mkdir()
+    monkeypatch.chdir(root)
+    monkeypatch.setattr(fare_index, "build_in_background", lambda path: None)
+    return root
+
+def sample():
+    return pd.read_csv(PREPROCESSED_SAMPLE)
+
+def log_feedback(df, prices):
+    log = PredictionLog(FEEDBACK_LOG)
+    for record, price in zip(df.drop(columns=["Price"]).to_dict(orient="records"), prices):
+        log.append(dict(record, Predicted_Price=0, Actual_Price=price))
+    log.flush()
+
+def quiet(message):
+    pass
+
+def test_less_accurate_update_is_not_promoted_unless_forced(workspace):
+    df = sample().iloc[:60]
+    fit_idx, holdout_idx = holdout_split(len(df))
+    prices = df["Price"].to_numpy(dtype=float)
+    prices[fit_idx] = 1_000_000  # new trees learn nonsense; the holdout keeps real prices
+    log_feedback(df, prices)
+    parent = current_bundle_path()
+
+    result = run_incremental_training({}, log=quiet)
+    assert not result["promoted"]
+    assert result["Holdout_MAE"]["candidate"] > result["Holdout_MAE"]["current"]
+    assert current_bundle_path() == parent
+
+    forced = run_incremental_training({"force": True}, log=quiet)  # rejected versions do not move the cursor
+    assert forced["promoted"] and forced["new_rows"] == 60
+    assert current_bundle_path() == forced["bundle"] != parent
+
+def test_feedback_cursor_advances_with_each_version(workspace):
+    df = sample()
+    log_feedback(df.iloc[:40], df["Price"].iloc[:40])
+    first = run_incremental_training({"force": True}, log=quiet)
+    assert first["new_rows"] == 40
+    assert load_bundle(first["bundle"]).metadata["feedback_log"] == log_position()
+
+    with pytest.raises(ValueError, match="Only 0 new feedback rows"):
+        run_incremental_training({"force": True}, log=quiet)
+
+    log_feedback(df.iloc[40:70], df["Price"].iloc[40:70])
+    second = run_incremental_training({"force": True}, log=quiet)
+    assert second["new_rows"] == 30  # the first 40 rows are not consumed twice
+    assert second["parent_version"] == load_bundle(first["bundle"]).version
+
+def test_rows_without_actual_price_are_not_feedback(workspace):
+    df = sample().iloc[:30]
+    prices = df["Price"].to_numpy(dtype=float)
+    prices[::3] = np.nan
+    log_feedback(df, prices)
+    with pytest.raises(ValueError, match="Only 20 new feedback rows"):
+        run_incremental_training({"min_rows": 25}, log=quiet)
+
+def test_existing_trees_are_unchanged(workspace):
+    parent = load_bundle(current_bundle_path(), mmap_mode=None)
+    df = sample()
+    log_feedback(df.iloc[:50], df["Price"].iloc[:50] * 1.1)
+    result = run_incremental_training({"force": True, "n_estimators": 5}, log=quiet)
+
+    model = load_bundle(result["bundle"], mmap_mode=None).model
+    n_parent = len(parent.model.estimators_)
+    assert len(model.estimators_) == result["n_estimators"] == n_parent + 5
+    for old, new in zip(parent.model.estimators_, model.estimators_[:n_parent]):
+        for attr in ("feature", "threshold", "children_left", "children_right", "value"):
+            assert np.array_equal(getattr(old.tree_, attr), getattr(new.tree_, attr)), attr
+    assert not model.warm_start
@@ -0,0 +1,46 @@
+import inference_service
+
+def predict(client, payload):
+    response = client.post("/predict", json=payload).get_json()
+    assert response["status"] == "Success", response
+    return response
+
+def test_batch_results_keep_input_order_with_per_row_errors(inference_client, records):
+    missing = dict(records[1])
+    del missing["Duration"]
+    invalid = dict(records[2], Duration="two hours", Journey_day="x")
+    batch = [records[0], missing, invalid, records[3]]
+
+    response = predict(inference_client, batch)
+    results = response["results"]
+    assert [result["index"] for result in results] == [0, 1, 2, 3]
+    assert [result["status"] for result in results] == ["Success", "Error", "Error", "Success"]
+    assert results[1]["message"] == "Missing fields: Duration"
+    assert results[2]["message"] == "Invalid numeric value for: Duration, Journey_day"
+    assert response["rows"] == 4 and response["failed_rows"] == 2
+
+def test_missing_and_invalid_fields_of_one_row_are_both_reported(inference_client, records):
+    row = dict(records[0], Duration="?")
+    del row["Airline"]
+    result = predict(inference_client, [row])["results"][0]
+    assert result["message"] == "Missing fields: Airline; Invalid numeric value for: Duration"
+
+def test_batch_predictions_equal_single_row_predictions(inference_client, records):
+    batch = predict(inference_client, records[:40])["results"]
+    inference_service.prediction_cache.clear()  # single rows must go through the forest too
+    singles = [predict(inference_client, record) for record in records[:40]]
+    assert not any(single.get("cached") for single in singles)
+    assert [result["predicted_price"] for result in batch] == [single["predicted_price"] for single in singles]
+
+def test_columnar_payload_matches_records(inference_client, records):
+    rows = records[:10]
+    columnar = {col: [row[col] for row in rows] for col in rows[0]}
+    by_rows = predict(inference_client, rows)["results"]
+    by_columns = predict(inference_client, columnar)["results"]
+    assert by_columns == by_rows
+
+def test_columnar_payload_with_unequal_lengths_is_rejected(inference_client, records):
+    columnar = {col: [records[0][col], records[1][col]] for col in records[0]}
+    columnar["Duration"] = columnar["Duration"][:1]
+    response = inference_client.post("/predict", json=columnar).get_json()
+    assert response == {"status": "Error", "message": "All columns in a columnar payload must have the same length."}
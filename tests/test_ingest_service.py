@@ -0,0 +1,146 @@
+import asyncio
+import json
+import os
+import threading
+import pandas as pd
+import pytest
+import ingest_service
+from conftest import DATA_DIR
+from data import database
+from data.database import ConnectionPool
+from ingest_service import Ingestor, create_handler
+from preprocessing import validate_chunk
+
+SAMPLE = pd.read_csv(os.path.join(DATA_DIR, "raw_sample.csv"))
+VALID_ROWS = int(validate_chunk(SAMPLE.copy())[0].sum())
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    pool = ConnectionPool(str(tmp_path / "airfare.db"))
+    monkeypatch.setattr(database, "pool", pool)
+    yield pool
+    pool.close()
+
+def stored_prices(pool):
+    with pool.connection() as conn:
+        return sorted(float(price) for (price,) in conn.execute("SELECT Price FROM Preprocessed_Airfare"))
+
+def ndjson(df):
+    return df.to_json(orient="records", lines=True, force_ascii=False).encode("utf-8")
+
+def request(body, target="/ingest", headers=(), method="POST", close=True):
+    lines = [f"{method} {target} HTTP/1.1", "Host: test", f"Content-Length: {len(body)}", *headers]
+    if close:
+        lines.append("Connection: close")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+def chunked_request(body, chunk_size, target="/ingest", headers=()):
+    chunks = b"".join(b"%x;ext=1\r\n%s\r\n" % (len(body[i:i + chunk_size]), body[i:i + chunk_size])
+                      for i in range(0, len(body), chunk_size))
+    head = "\r\n".join([f"POST {target} HTTP/1.1", "Transfer-Encoding: chunked", "Connection: close", *headers])
+    return (head + "\r\n\r\n").encode("latin-1") + chunks + b"0\r\nX-Trailer: 1\r\n\r\n"
+
+def parse_responses(data):
+    responses = []
+    while data:
+        head, _, data = data.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        length = int(headers["Content-Length"])
+        body, data = data[:length], data[length:]
+        payload = json.loads(body) if headers["Content-Type"] == "application/json" else body.decode("utf-8")
+        responses.append((int(lines[0].split(" ")[1]), payload))
+    return responses
+
+# Send raw bytes to an ingest server on a free port and return the parsed responses
+def exchange(*payloads, ingestor_factory=Ingestor):
+    async def run():
+        ingestor = ingestor_factory()
+        ingestor.start()
+        server = await asyncio.start_server(create_handler(ingestor), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for payload in payloads:
+                writer.write(payload)
+                await writer.drain()
+            data = await asyncio.wait_for(reader.read(), timeout=30)
+            writer.close()
+            return parse_responses(data), ingestor.stats()
+        finally:
+            server.close()
+            ingestor.worker.cancel()
+            ingestor.executor.shutdown()
+    return asyncio.run(run())
+
+def test_content_length_ndjson_body_is_stored(store):
+    [(status, body)], _ = exchange(request(ndjson(SAMPLE)))
+    assert status == 200 and body["status"] == "Success"
+    assert body["received"] == len(SAMPLE)
+    assert (body["accepted"], body["rejected"]) == (VALID_ROWS, len(SAMPLE) - VALID_ROWS)
+    assert stored_prices(store) == sorted(SAMPLE.dropna()["Price"].astype(float))
+
+@pytest.mark.parametrize("chunk_size", [7, 1000, 1 << 20])
+def test_chunked_body_gives_the_same_result(store, chunk_size):
+    [(_, by_length)], _ = exchange(request(ndjson(SAMPLE)))
+    [(status, chunked)], _ = exchange(chunked_request(ndjson(SAMPLE), chunk_size))
+    assert status == 200
+    assert {key: chunked[key] for key in ("received", "accepted", "rejected", "errors")} == \
+        {key: by_length[key] for key in ("received", "accepted", "rejected", "errors")}
+
+@pytest.mark.parametrize("target, headers", [("/ingest", ["Content-Type: text/csv"]), ("/ingest?format=csv", [])])
+def test_csv_body_matches_ndjson(store, target, headers):
+    [(status, body)], _ = exchange(request(SAMPLE.to_csv(index=False).encode("utf-8"), target, headers))
+    assert status == 200
+    assert (body["received"], body["accepted"]) == (len(SAMPLE), VALID_ROWS)
+    assert stored_prices(store) == sorted(SAMPLE.dropna()["Price"].astype(float))
+
+def test_bad_records_are_reported_by_record_number(store):
+    lines = ndjson(SAMPLE.iloc[:3]).splitlines()
+    body = b"\n".join([lines[0], b"{not json", lines[1], b"[1, 2]", lines[2]]) + b"\n"
+    [(status, result)], _ = exchange(request(body))
+    assert status == 200 and result["accepted"] == 3
+    assert result["errors"] == [{"record": 2, "message": "Invalid JSON"},
+                                {"record": 4, "message": "Expected a JSON object"}]
+
+    csv_body = b"Airline,Price\nIndiGo\n"
+    [(_, result)], _ = exchange(request(csv_body, "/ingest?format=csv"))
+    assert result["errors"] == [{"record": 1, "message": "Expected 2 fields, got 1"}]
+
+def test_requests_share_a_keep_alive_connection(store):
+    first = request(ndjson(SAMPLE.iloc[:10]), close=False)
+    stats = request(b"", "/ingest/stats", method="GET")
+    [(_, ingested), (status, totals)], _ = exchange(first, stats)
+    assert ingested["accepted"] == 10
+    assert status == 200 and totals["requests"] == 1 and totals["accepted"] == 10
+
+@pytest.mark.parametrize("payload, message", [
+    (b"GARBAGE\r\n\r\n", "Malformed request line"),
+    (b"POST /ingest HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n", "Malformed chunked body"),
+    (b"POST /ingest?format=xml HTTP/1.1\r\nContent-Length: 0\r\n\r\n", "Unsupported format: xml"),
+])
+def test_malformed_requests_get_400_and_close(store, payload, message):
+    [(status, body)], _ = exchange(payload, request(b"", "/ingest/stats", method="GET"))
+    assert status == 400 and body == {"status": "Error", "message": message}  # no second response
+
+def test_unknown_paths_and_methods(store):
+    [(missing, _), (not_allowed, body)], _ = exchange(request(b"", "/nope", method="GET", close=False),
+                                                      request(b"x", "/ingest", method="GET"))
+    assert (missing, not_allowed) == (404, 405)
+    assert body["message"] == "GET not allowed on /ingest"
+
+def test_full_queue_pauses_reading_until_batches_are_written(store, monkeypatch):
+    monkeypatch.setattr(ingest_service, "BATCH_RECORDS", 10)
+    release = threading.Event()
+    process_batch = ingest_service.process_batch
+
+    def slow_process_batch(*args):
+        release.wait(timeout=30)
+        return process_batch(*args)
+
+    monkeypatch.setattr(ingest_service, "process_batch", slow_process_batch)
+    threading.Timer(0.5, release.set).start()
+    [(status, body)], stats = exchange(request(ndjson(SAMPLE)), ingestor_factory=lambda: Ingestor(queue_batches=1))
+    assert status == 200 and body["accepted"] == VALID_ROWS
+    assert stats["batches"] == -(-len(SAMPLE) // 10) and stats["queue_full_waits"] > 0
+    assert stored_prices(store) == sorted(SAMPLE.dropna()["Price"].astype(float))
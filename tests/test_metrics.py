@@ -0,0 +1,80 @@
+import pytest
+from flask import Flask
+import metrics
+from metrics import CONTENT_TYPE, Counter, Gauge, Histogram, escape, instrument
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    # Metrics made by a test are rendered on their own and not left in the shared registry
+    monkeypatch.setattr(metrics, "REGISTRY", [])
+
+def test_label_values_are_escaped():
+    assert escape('C:\\fares "new"\nline') == 'C:\\\\fares \\"new\\"\\nline'
+    counter = Counter("fares_total", "Fares.", ("airline",))
+    counter.inc(airline='Jet "Airways"\\\n')
+    assert metrics.render().splitlines() == [
+        "# HELP fares_total Fares.",
+        "# TYPE fares_total counter",
+        'fares_total{airline="Jet \\"Airways\\"\\\\\\n"} 1',
+    ]
+
+def test_counters_and_gauges_render_one_sample_per_label_set():
+    counter = Counter("requests_total", "Requests.", ("endpoint", "status"))
+    counter.inc(endpoint="/predict", status=200)
+    counter.inc(2, endpoint="/predict", status=200)
+    counter.inc(endpoint="/predict", status=500)
+    gauge = Gauge("queue_depth", "Queued rows.")
+    gauge.set(0.5)
+    lines = metrics.render().splitlines()
+    assert 'requests_total{endpoint="/predict",status="200"} 3' in lines
+    assert 'requests_total{endpoint="/predict",status="500"} 1' in lines
+    assert "queue_depth 0.5" in lines
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1, 10))
+    for value in (0.05, 0.1, 0.5, 3, 20):
+        histogram.observe(value, stage="predict")
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{stage="predict",le="0.1"} 2',  # upper bounds are inclusive
+        'latency_seconds_bucket{stage="predict",le="1.0"} 3',
+        'latency_seconds_bucket{stage="predict",le="10.0"} 4',
+        'latency_seconds_bucket{stage="predict",le="+Inf"} 5',
+        'latency_seconds_sum{stage="predict"} 23.65',
+        'latency_seconds_count{stage="predict"} 5',
+    ]
+
+def sample(text, name, **labels):
+    prefix = name + "{" + ",".join(f'{key}="{value}"' for key, value in labels.items())
+    values = [line.rsplit(" ", 1)[1] for line in text.splitlines() if line.startswith(prefix)]
+    return float(values[0]) if values else 0.0
+
+def test_requests_are_counted_by_endpoint_once_per_app(monkeypatch):
+    # The shared request metrics, registered for this test only
+    monkeypatch.setattr(metrics, "HTTP_REQUESTS", Counter("http_requests_total", "HTTP requests handled.",
+                                                          ("service", "endpoint", "method", "status")))
+    monkeypatch.setattr(metrics, "HTTP_LATENCY", Histogram("http_request_duration_seconds", "HTTP request latency.",
+                                                           ("service", "endpoint")))
+    app = Flask(__name__)
+
+    @app.route("/fares/<airline>", methods=["GET"])
+    def fares(airline):
+        return airline
+
+    instrument(app, "test_service")
+    instrument(app, "test_service")  # e.g. a module instrumented again when re-imported
+    assert [rule.rule for rule in app.url_map.iter_rules()].count("/metrics") == 1
+
+    client = app.test_client()
+    client.get("/fares/IndiGo")
+    client.get("/fares/SpiceJet")
+    client.get("/missing")
+    client.get("/metrics")
+    response = client.get("/metrics")
+    text = response.get_data(as_text=True)
+    assert response.content_type == CONTENT_TYPE
+
+    labels = dict(service="test_service", endpoint="/fares/<airline>", method="GET")
+    assert sample(text, "http_requests_total", **labels, status=200) == 2
+    assert sample(text, "http_requests_total", service="test_service", endpoint="unmatched", method="GET", status=404) == 1
+    assert sample(text, "http_requests_total", service="test_service", endpoint="/metrics") == 0
+    assert sample(text, "http_request_duration_seconds_count", service="test_service", endpoint="/fares/<airline>") == 2
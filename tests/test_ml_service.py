@@ -0,0 +1,81 @@
+import os
+import shutil
+import numpy as np
+import pandas as pd
+import pytest
+import fare_index
+from conftest import DATA_DIR
+from model_bundle import load_bundle
+
+TRAIN_OPTIONS = {"search": "fixed", "params": {"n_estimators": 20}}
+
+# Run from a private project directory: importing ml_service imports the hosted services, and
+# monitoring opens data/inference_logs.csv relative to the working directory
+def make_workspace(root, monkeypatch):
+    (root / "data").mkdir(parents=True)
+    (root / "models").mkdir()
+    shutil.copy(os.path.join(DATA_DIR, "raw_sample.csv"), root / "data" / "fares.csv")
+    monkeypatch.chdir(root)
+    monkeypatch.setattr(fare_index, "build_in_background", lambda path: None)
+
+def quiet(message):
+    pass
+
+def files_under(root):
+    return {os.path.relpath(os.path.join(path, name), root)
+            for path, _, names in os.walk(root) for name in names}
+
+def run_csv_stages():
+    from dev_run_v0 import load_data
+    from preprocessing import preprocess_data
+    from feature_engineering import run_feature_engineering
+    from training_services import run_training
+
+    _, error = preprocess_data(load_data("fares.csv"))
+    assert error is None
+    run_feature_engineering("preprocessed_airfare_data.csv")
+    return run_training(TRAIN_OPTIONS, log=quiet)
+
+def test_in_memory_run_matches_the_csv_stages(tmp_path, monkeypatch):
+    make_workspace(tmp_path / "csv", monkeypatch)
+    by_csv = run_csv_stages()
+    csv_bundle = load_bundle(os.path.abspath(by_csv["bundle"]))
+
+    make_workspace(tmp_path / "memory", monkeypatch)
+    from ml_service import run_in_memory
+    in_memory = run_in_memory("fares.csv", TRAIN_OPTIONS, log=quiet)
+    memory_bundle = load_bundle(os.path.abspath(in_memory["bundle"]))
+
+    assert in_memory["rows"] == len(pd.read_csv(tmp_path / "csv" / "data" / "preprocessed_airfare_data.csv"))
+    assert in_memory["MAE"] == pytest.approx(by_csv["MAE"], rel=1e-12)
+    assert in_memory["R2_Score"] == pytest.approx(by_csv["R2_Score"], rel=1e-12)
+
+    csv_pipeline, memory_pipeline = csv_bundle.pipeline, memory_bundle.pipeline
+    assert memory_pipeline.feature_order == csv_pipeline.feature_order
+    assert memory_pipeline.numerical_cols == csv_pipeline.numerical_cols
+    assert memory_pipeline.classes.keys() == csv_pipeline.classes.keys()
+    for col, classes in csv_pipeline.classes.items():
+        assert memory_pipeline.classes[col].tolist() == classes.tolist(), col
+    assert np.allclose(memory_pipeline.scaler.mean_, csv_pipeline.scaler.mean_, rtol=1e-12)
+    assert np.allclose(memory_pipeline.scaler.scale_, csv_pipeline.scaler.scale_, rtol=1e-12)
+    assert memory_pipeline.source == os.path.join("data", "fares.csv")  # the raw rows, for the fare index
+
+def test_in_memory_run_without_persist_writes_only_the_model(tmp_path, monkeypatch):
+    make_workspace(tmp_path, monkeypatch)
+    from ml_service import run_in_memory
+    before = files_under(tmp_path)
+    result = run_in_memory("fares.csv", TRAIN_OPTIONS, persist=False, log=quiet)
+
+    written = files_under(tmp_path) - before
+    bundle = os.path.relpath(os.path.abspath(result["bundle"]), tmp_path)
+    cache = {path for path in written if path.startswith(os.path.join("data", ".cache") + os.sep)}
+    assert written - cache == {bundle, os.path.join("models", "bundles", "CURRENT"),
+                               os.path.join("models", "flight_fare_model.pkl")}
+    assert not os.path.exists(os.path.join("models", "encoder", "pipeline.pkl"))
+
+def test_in_memory_run_with_persist_writes_the_stage_outputs(tmp_path, monkeypatch):
+    make_workspace(tmp_path, monkeypatch)
+    from ml_service import run_in_memory
+    run_in_memory("fares.csv", TRAIN_OPTIONS, persist=True, log=quiet)
+    for path in ["data/preprocessed_airfare_data.csv", "data/processed_airfare_data.csv", "models/encoder/pipeline.pkl"]:
+        assert os.path.exists(path), path
@@ -0,0 +1,57 @@
+import os
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+import fare_index
+from model_bundle import load_bundle, save_bundle, promote_bundle, current_bundle_path, get_bundle, LEGACY_MODEL_PATH
+
+@pytest.fixture
+def current(model_workspace):
+    return load_bundle(current_bundle_path(str(model_workspace / "models" / "bundles")))
+
+def features(bundle, records):
+    return bundle.pipeline.transform_array(pd.DataFrame(records)[bundle.feature_order])
+
+def test_loaded_bundle_predicts_like_its_model(current, records):
+    X = features(current, records)
+    assert current.metadata["training_data"].endswith("preprocessed_sample.csv")
+    assert np.array_equal(current.predictor.predict(X), current.model.predict(X))
+
+def test_named_model_keeps_its_feature_names(current, records, tmp_path):
+    X = features(current, records)
+    named = RandomForestRegressor(n_estimators=5, random_state=0).fit(
+        pd.DataFrame(X, columns=current.feature_order), np.arange(len(X)))
+    bundle = load_bundle(save_bundle(named, current.pipeline, bundle_dir=str(tmp_path), promote=False))
+    assert list(bundle.model.feature_names_in_) == current.feature_order  # reusable as fitted
+    assert not hasattr(bundle.predictor, "feature_names_in_")
+    assert bundle.predictor.estimators_ is bundle.model.estimators_  # the trees are shared, not copied
+    assert np.array_equal(bundle.predictor.predict(X), named.predict(pd.DataFrame(X, columns=current.feature_order)))
+
+def test_promotion_switches_the_served_bundle(current, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    builds = []
+    monkeypatch.setattr(fare_index, "build_in_background", builds.append)
+    first = save_bundle(current.model, current.pipeline, {"version": "v1"})
+    assert get_bundle().version == "v1" and builds == [first]
+
+    second = save_bundle(current.model, current.pipeline, {"version": "v2"}, promote=False)
+    assert get_bundle().version == "v1"  # saved, not promoted
+    promote_bundle(second)
+    assert current_bundle_path() == second
+    assert get_bundle().version == "v2" and builds == [first, second]
+
+def test_legacy_model_is_served_without_bundles(current, records, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("models")
+    named = RandomForestRegressor(n_estimators=5, random_state=0).fit(
+        pd.DataFrame(features(current, records), columns=current.feature_order), np.arange(len(records)))
+    joblib.dump(named, LEGACY_MODEL_PATH)
+    current.pipeline.save(os.path.join("models", "encoder"))
+
+    bundle = get_bundle()
+    assert bundle.version.startswith("legacy-") and bundle.path == LEGACY_MODEL_PATH
+    assert bundle.feature_order == list(named.feature_names_in_)
+    assert np.array_equal(bundle.predictor.predict(features(bundle, records)),
+                          named.predict(pd.DataFrame(features(bundle, records), columns=bundle.feature_order)))
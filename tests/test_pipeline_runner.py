@@ -0,0 +1,12 @@
+from pipeline_runner import STAGES, code_files
+
+def test_train_key_covers_every_module_training_imports():
+    files = code_files(STAGES["train"]["code"])
+    for module in ["training_services.py", "hyperparameter_search.py", "model_bundle.py", "incremental_training.py",
+                   "compiled_forest.py", "compact_forest.py", "training_jobs.py", "fare_index.py",
+                   "feature_pipeline.py", "category_encoding.py", "dataset_cache.py", "fare_schema.py"]:
+        assert module in files
+
+def test_stage_code_follows_transitive_imports():
+    assert "parallel_features.py" in code_files(STAGES["feature_engineering"]["code"])
+    assert "dataset_cache.py" in code_files(STAGES["preprocess"]["code"])
@@ -0,0 +1,87 @@
+import pytest
+import prediction_cache
+import inference_service
+from prediction_cache import PredictionCache, itinerary_key
+
+FEATURES = ["Airline", "Duration", "Journey_day"]
+NUMERICAL = {"Duration", "Journey_day"}
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(prediction_cache.time, "monotonic", lambda: now[0])
+    return now
+
+def test_least_recently_used_entry_is_evicted_at_capacity():
+    cache = PredictionCache(maxsize=2, ttl=60)
+    cache.put("v1", "a", 1.0)
+    cache.put("v1", "b", 2.0)
+    assert cache.get("v1", "a") == 1.0  # "b" is now the least recently used
+    cache.put("v1", "c", 3.0)
+    assert cache.get("v1", "b") is None
+    assert cache.get("v1", "a") == 1.0 and cache.get("v1", "c") == 3.0
+    stats = cache.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+def test_entries_expire_after_ttl(clock):
+    cache = PredictionCache(maxsize=10, ttl=60)
+    cache.put("v1", "a", 1.0)
+    clock[0] += 60
+    assert cache.get("v1", "a") == 1.0
+    clock[0] += 0.5
+    assert cache.get("v1", "a") is None
+    assert cache.stats()["expirations"] == 1 and cache.stats()["size"] == 0
+
+def test_new_model_version_invalidates_the_cache():
+    cache = PredictionCache(maxsize=10, ttl=60)
+    cache.put("v1", "a", 1.0)
+    assert cache.get("v2", "a") is None
+    cache.put("v2", "a", 5.0)
+    assert cache.get("v1", "a") is None  # switching back does not resurrect old prices
+    stats = cache.stats()
+    assert stats["invalidations"] == 2 and stats["model_version"] == "v1"
+
+def test_zero_size_cache_stores_nothing():
+    cache = PredictionCache(maxsize=0, ttl=60)
+    cache.put("v1", "a", 1.0)
+    assert cache.get("v1", "a") is None and cache.stats()["size"] == 0
+
+def test_numeric_strings_share_a_key_with_numbers():
+    keys = {itinerary_key({"Airline": "IndiGo", "Duration": duration, "Journey_day": day}, FEATURES, NUMERICAL)
+            for duration, day in [("120", 24), (120, "24"), (120.0, 24.0), (" 120 ", "24.0")]}
+    assert keys == {("IndiGo", 120.0, 24.0)}
+
+def test_categorical_values_are_not_coerced():
+    key = itinerary_key({"Airline": "1", "Duration": 1, "Journey_day": 1}, FEATURES, NUMERICAL)
+    assert key == ("1", 1.0, 1.0)
+    assert itinerary_key({"Airline": 1, "Duration": 1, "Journey_day": 1}, FEATURES, NUMERICAL) != key
+
+def test_numeric_strings_hit_the_cache(inference_client, records):
+    record = records[0]
+    numerical = inference_service.load_model().numerical_cols
+    as_strings = {col: str(value) if col in numerical else value for col, value in record.items()}
+    first = inference_client.post("/predict", json=record).get_json()
+    second = inference_client.post("/predict", json=as_strings).get_json()
+    assert not first.get("cached") and second["cached"]
+    assert second["predicted_price"] == first["predicted_price"]
+
+def test_unhashable_values_are_not_cached(inference_client, records):
+    record = dict(records[0], Additional_Info=["No info"])
+    for _ in range(2):
+        response = inference_client.post("/predict", json=record).get_json()
+        assert response["status"] == "Success" and not response.get("cached")
+    assert inference_service.prediction_cache.stats()["size"] == 0
+
+def test_batch_with_cache_hits_matches_uncached_batch(inference_client, records):
+    batch = records[:60]
+    uncached = inference_client.post("/predict", json=batch).get_json()
+    assert uncached["cache_hits"] == 0
+    inference_service.prediction_cache.clear()
+    warm = batch[::3]
+    inference_client.post("/predict", json=warm)  # warm a third of the rows
+    cached = inference_client.post("/predict", json=batch).get_json()
+    warm_rows = {tuple(sorted(record.items())) for record in warm}
+    assert cached["cache_hits"] == sum(tuple(sorted(record.items())) in warm_rows for record in batch)
+    assert cached["cache_hits"] >= len(warm)
+    assert cached["results"] == uncached["results"]
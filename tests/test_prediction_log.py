@@ -0,0 +1,62 @@
+import csv
+import os
+import time
+import pytest
+from prediction_log import PredictionLog, PredictionLogReader, LOG_COLUMNS
+
+LEGACY_COLUMNS = [col for col in LOG_COLUMNS if col != "Logged_At"]
+
+def test_legacy_log_gets_logged_at_column(tmp_path):
+    path = str(tmp_path / "inference_logs.csv")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LEGACY_COLUMNS)
+        writer.writerow(["IndiGo"] + [""] * (len(LEGACY_COLUMNS) - 1))
+
+    log = PredictionLog(path)
+    assert log.columns == LOG_COLUMNS
+    log.append({"Airline": "Air India"})
+    log.flush()
+
+    rows = [row for _, _, row in log.iter_rows()]
+    assert [row["Airline"] for row in rows] == ["IndiGo", "Air India"]
+    assert "Logged_At" not in rows[0]  # legacy row: no timestamp
+    assert rows[1]["Logged_At"]
+    assert log.row_count() == 2
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_child_flushes_its_own_records(tmp_path):
+    path = str(tmp_path / "inference_logs.csv")
+    log = PredictionLog(path, flush_interval=0.05)
+    pid = os.fork()
+    if pid == 0:  # the child only has the thread that forked: the flusher must be its own
+        status = 1
+        try:
+            for i in range(5):
+                log.append({"Airline": f"child-{i}"})
+            deadline = time.monotonic() + 5
+            while log.pending.qsize() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            with log.write_lock:  # the flusher may still be writing the batch it took
+                status = 0 if log.pending.qsize() == 0 else 1
+        finally:
+            os._exit(status)
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+    assert [row["Airline"] for _, _, row in log.iter_rows()] == [f"child-{i}" for i in range(5)]
+
+def test_reader_matches_writer_and_skips_partial_rows(tmp_path):
+    path = str(tmp_path / "inference_logs.csv")
+    log = PredictionLog(path)
+    for i in range(3):
+        log.append({"Airline": f"a{i}", "User_Feedback": "multi\nline"})
+    log.flush()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("half-written,row")  # an append in progress, no newline yet
+
+    reader = PredictionLogReader(path)
+    assert reader.columns == log.columns
+    assert reader.position() == (os.path.getsize(path) - len("half-written,row"), 3)
+    assert [row["Airline"] for _, _, row in reader.iter_rows()] == ["a0", "a1", "a2"]
+    offset, row_id = reader.position()
+    assert list(reader.iter_rows(offset, row_id)) == []
@@ -0,0 +1,33 @@
+import pandas as pd
+import pytest
+from model_bundle import load_bundle, current_bundle_path
+
+@pytest.fixture
+def client(model_workspace, monkeypatch):
+    monkeypatch.chdir(model_workspace)  # the service refuses to start without a trained model
+    import prediction_service
+    return prediction_service.app.test_client()
+
+@pytest.fixture
+def matrix(model_workspace, records):
+    bundle = load_bundle(current_bundle_path(str(model_workspace / "models" / "bundles")))
+    X = bundle.pipeline.transform_array(pd.DataFrame(records[:3])[bundle.feature_order])
+    return X, bundle.model.predict(X)
+
+def test_rows_and_a_single_row_are_predicted(client, matrix):
+    X, expected = matrix
+    response = client.post("/predict", json={"processed_data": X.tolist()}).get_json()
+    assert response["status"] == "Success" and response["predicted_price"] == expected.tolist()
+    response = client.post("/predict", json={"processed_data": X[0].tolist()}).get_json()
+    assert response["predicted_price"] == expected[:1].tolist()
+
+@pytest.mark.parametrize("payload", [
+    lambda X: [row[:5] for row in X.tolist()],  # the old 5-feature rows
+    lambda X: X.reshape(-1).tolist()[:26],      # several rows flattened into one list
+    lambda X: [X[0].tolist(), X[1].tolist()[:-1]],
+    lambda X: [],
+])
+def test_rows_of_the_wrong_width_are_rejected(client, matrix, payload):
+    response = client.post("/predict", json={"processed_data": payload(matrix[0])}).get_json()
+    assert response["status"] == "Error"
+    assert "processed_data" in response["message"]
@@ -0,0 +1,77 @@
+import os
+import shutil
+import pandas as pd
+from dev_run_v0 import load_data
+from fare_schema import csv_frame
+from preprocessing import preprocess_data, preprocess_file_streaming, transform_chunk, validate_chunk, PROCESSED_COLUMNS
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+RAW = pd.DataFrame({
+    'Airline': ['IndiGo', 'Air India', 'Jet Airways', 'IndiGo'],
+    'Date_of_Journey': ['24/03/2019', '1/05/2019', '9/06/2019', '12/05/2019'],
+    'Source': ['Banglore', 'Kolkata', 'Delhi', 'Kolkata'],
+    'Destination': ['New Delhi', 'Banglore', 'Cochin', 'Banglore'],
+    'Route': ['BLR → DEL', 'CCU → IXR → BBI → BLR', 'DEL → LKO → BOM → COK', 'CCU → NAG → BLR'],
+    'Dep_Time': ['22:20', '05:50', '09:25', '18:05'],
+    'Arrival_Time': ['01:10 22 Mar', '13:15', '04:25 10 Jun', '23:30'],
+    'Duration': ['2h 50m', '7h 25m', '19h', '5h 25m'],
+    'Total_Stops': ['non-stop', '2 stops', '2 stops', '1 stop'],
+    'Additional_Info': ['No info', 'No info', 'No info', 'No info'],
+    'Price': [3897, 7662, 13882, 6218],
+})
+
+def stream(tmp_path, monkeypatch, df, chunksize):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    df.to_csv(os.path.join("data", "raw.csv"), index=False)
+    rows, error = preprocess_file_streaming("raw.csv", output_path="out.csv", chunksize=chunksize)
+    assert error is None
+    with open("out.csv", encoding="utf-8") as f:
+        return rows, f.read()
+
+def test_streaming_header_only_input_writes_one_header(tmp_path, monkeypatch):
+    rows, text = stream(tmp_path, monkeypatch, RAW.iloc[:0], chunksize=2)
+    assert rows == 0
+    assert text == ",".join(PROCESSED_COLUMNS) + "\n"
+
+def test_streaming_empty_first_chunk_writes_one_header(tmp_path, monkeypatch):
+    raw = RAW.copy()
+    raw.loc[:1, 'Price'] = None  # the whole first chunk is dropped
+    rows, text = stream(tmp_path, monkeypatch, raw, chunksize=2)
+    assert rows == 2
+    assert text.count("Airline,") == 1
+
+def test_streaming_matches_single_pass(tmp_path, monkeypatch):
+    rows, text = stream(tmp_path, monkeypatch, RAW, chunksize=1)
+    assert rows == len(RAW)
+    assert text == csv_frame(transform_chunk(RAW.copy())).to_csv(index=False)
+
+def test_validation_messages_show_plain_values():
+    df = RAW.copy()
+    df["Price"] = [3897, -5, 13882, 6218]
+    df["Duration"] = df["Duration"].astype(object)
+    df.loc[2, "Duration"] = "soon"
+    valid, messages = validate_chunk(df)
+    assert valid.tolist() == [True, False, False, True]
+    assert messages[1] == "Invalid Price: -5"
+    assert messages[2] == "Unparseable Duration: soon"
+
+# preprocessed_sample.csv is what the original (row-by-row) preprocess_data wrote for raw_sample.csv,
+# 150 rows of Data_Train.xlsx plus its row with a missing value
+def test_preprocessed_csv_is_byte_identical_to_the_original_output(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+    shutil.copy(os.path.join(DATA_DIR, "raw_sample.csv"), "data")
+    with open(os.path.join(DATA_DIR, "preprocessed_sample.csv"), "rb") as f:
+        expected = f.read()
+
+    df, error = preprocess_data(load_data("raw_sample.csv"))
+    assert error is None and df["Price"].dtype == "float32"  # compact in memory only
+    with open(os.path.join("data", "preprocessed_airfare_data.csv"), "rb") as f:
+        assert f.read() == expected
+
+    rows, error = preprocess_file_streaming("raw_sample.csv", output_path="streamed.csv", chunksize=40)
+    assert error is None and rows == 150
+    with open("streamed.csv", "rb") as f:
+        assert f.read() == expected
@@ -0,0 +1,53 @@
+import http.client
+import threading
+import time
+from flask import Flask
+from serve import PooledWSGIServer
+
+def test_connections_beyond_the_threads_wait_in_the_backlog():
+    app = Flask(__name__)
+    release = threading.Event()
+    started = []
+
+    @app.route("/slow")
+    def slow():
+        started.append(time.monotonic())
+        release.wait(timeout=30)
+        return "done"
+
+    server = PooledWSGIServer("127.0.0.1", 0, app, threads=2)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    port = server.socket.getsockname()[1]
+    results = []
+
+    def get():
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        connection.request("GET", "/slow")
+        results.append(connection.getresponse().read())
+        connection.close()
+
+    clients = [threading.Thread(target=get) for _ in range(5)]
+    try:
+        for client in clients:
+            client.start()
+        deadline = time.monotonic() + 5
+        while len(started) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.3)
+        assert len(started) == 2
+        assert server.pool._work_queue.qsize() == 0  # the other three were not accepted
+
+        release.set()
+        for client in clients:
+            client.join(timeout=30)
+        assert results == [b"done"] * 5
+        deadline = time.monotonic() + 5  # the server closes a connection after its response is sent
+        while server.slots._value < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert server.slots._value == 2  # every connection gave its slot back
+    finally:
+        release.set()
+        server.shutdown()
+        server.pool.shutdown(wait=True)
+        server.server_close()
@@ -0,0 +1,71 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import pytest
+import training_jobs
+from training_jobs import (update_status, read_status, write_status, job_dir, CANCELLED, RUNNING, QUEUED,
+                           FAILED, FINISHED_STATES)
+
+def make_job(jobs_dir, job_id="job"):
+    os.makedirs(job_dir(job_id, jobs_dir))
+    write_status(job_id, {"id": job_id, "state": QUEUED, "progress": {}}, jobs_dir)
+    return job_id
+
+def test_concurrent_updates_are_not_lost(tmp_path):
+    jobs_dir = str(tmp_path)
+    job_id = make_job(jobs_dir)
+    threads = [threading.Thread(target=lambda i=i: [update_status(job_id, jobs_dir, **{f"k{i}_{n}": n})
+                                                    for n in range(20)])
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    status = read_status(job_id, jobs_dir)
+    assert all(f"k{i}_{n}" in status for i in range(8) for n in range(20))
+
+def test_finished_state_is_not_overwritten(tmp_path):
+    jobs_dir = str(tmp_path)
+    job_id = make_job(jobs_dir)
+    update_status(job_id, jobs_dir, only_active=True, state=CANCELLED)
+    status = update_status(job_id, jobs_dir, only_active=True, state=RUNNING)
+    assert status["state"] == CANCELLED
+    assert read_status(job_id, jobs_dir)["state"] == CANCELLED
+
+def wait_finished(job_id, jobs_dir, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = read_status(job_id, jobs_dir)
+        if status["state"] in FINISHED_STATES:
+            return status
+        time.sleep(0.1)
+    raise AssertionError(f"job {job_id} did not finish: {status}")
+
+@pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+def test_pool_is_replaced_after_a_worker_dies(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # no processed data: jobs fail fast, from inside the worker
+    monkeypatch.setattr(training_jobs, "_executor", None)
+    jobs_dir = str(tmp_path / "jobs")
+    try:
+        first = wait_finished(training_jobs.submit({}, jobs_dir)["id"], jobs_dir)
+        assert first["state"] == FAILED and "Preprocessed data not found" in first["error"]
+
+        # OOM kill of the idle worker: the pool is broken
+        broken = training_jobs.get_executor()
+        for worker in multiprocessing.active_children():
+            os.kill(worker.pid, signal.SIGKILL)
+        orphan = training_jobs.submit({}, jobs_dir)["id"]
+        orphaned = wait_finished(orphan, jobs_dir)
+
+        # The next job gets a new pool and runs
+        status = training_jobs.submit({}, jobs_dir)
+        assert status["state"] == QUEUED
+        assert training_jobs.get_executor() is not broken
+        later = wait_finished(status["id"], jobs_dir)
+        assert later["state"] == FAILED and "Preprocessed data not found" in later["error"]
+        assert orphaned["state"] == FAILED
+    finally:
+        if training_jobs._executor is not None:
+            training_jobs._executor.shutdown(cancel_futures=True)